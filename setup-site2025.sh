@@ -23,6 +23,9 @@ cd /var/www/agenciakaizen/src
 source ../venv/bin/activate
 python manage.py collectstatic --noinput --clear
 echo -e "${GREEN}✅${NC} Arquivos estáticos coletados"
+# Tabela do cache compartilhado entre os workers (sem REDIS_URL); não faz nada se já existir
+python manage.py createcachetable
+echo -e "${GREEN}✅${NC} Tabela de cache verificada"
 
 # 2. Criar diretórios de log se não existirem
 echo ""
@@ -0,0 +1,22 @@
+"""
+ASGI config for agenciakaizen_cms project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Usado com workers uvicorn (ver docs/ASGI.md); o wsgi.py continua válido.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "agenciakaizen_cms.settings.production")
+
+application = get_asgi_application()
+
+# Redirects legados em memória antes da primeira requisição (common/redirects.py)
+from common.redirects import warm_up  # noqa: E402
+
+warm_up()
@@ -78,6 +78,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista; só atua com SQL_PROFILER['ENABLED'] (ver common/profiling.py)
+    'common.profiling.QueryProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -87,7 +89,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'wagtail.contrib.redirects.middleware.RedirectMiddleware',
+    # Redirects do Wagtail compilados em memória (ver common/redirects.py)
+    'common.redirects.RedirectIndexMiddleware',
 ]
 
 ROOT_URLCONF = 'agenciakaizen_cms.urls'
@@ -113,6 +116,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'agenciakaizen_cms.wsgi.application'
+ASGI_APPLICATION = 'agenciakaizen_cms.asgi.application'
 
 # Database
 DATABASES = {
@@ -203,7 +207,7 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
-# Cache - Desabilitado completamente
+# Cache - sem cache por padrão; dev usa LocMem e produção um cache compartilhado (ver production.py)
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
@@ -232,6 +236,62 @@ COMMERCIAL_EMAIL = os.environ.get('COMMERCIAL_EMAIL', 'maquinadevendas@agenciaka
 # SendGrid Settings
 SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
 
+# Ingestão de touchpoints em lote (ver common/touchpoints.py)
+TOUCHPOINT_BUFFER = {
+    'MAX_EVENTS': int(os.environ.get('TOUCHPOINT_MAX_EVENTS', 5000)),
+    'FLUSH_SIZE': int(os.environ.get('TOUCHPOINT_FLUSH_SIZE', 200)),
+    'FLUSH_INTERVAL': float(os.environ.get('TOUCHPOINT_FLUSH_INTERVAL', 2.0)),
+    'MAX_BATCH': 100,
+    'SPOOL_DIR': os.environ.get('TOUCHPOINT_SPOOL_DIR', str(BASE_DIR.parent / 'var' / 'touchpoints')),
+}
+
+# Fila de emails (ver contact/outbox.py); o envio é feito por `manage.py send_outbox`
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50)),
+    'MAX_ATTEMPTS': int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)),
+    'BACKOFF_BASE': 30,
+    'BACKOFF_MAX': 3600,
+    'LEASE': 300,
+    'POLL_INTERVAL': 5.0,
+}
+
+# Uploads em partes (ver common/uploads.py); pós-processamento por `manage.py process_uploads`
+UPLOADS = {
+    'STAGING_DIR': os.environ.get('UPLOADS_STAGING_DIR', str(MEDIA_ROOT / 'uploads' / 'partial')),
+    'MAX_CHUNK_SIZE': 5 * 1024 * 1024,
+    'EXPIRE_AFTER': 24 * 60 * 60,
+    'UNATTACHED_TTL': 24 * 60 * 60,
+    'MAX_PENDING_PER_IP': 10,
+}
+
+# Coletor first-party de eventos (ver analytics/collector.py); agregados por `manage.py compact_events`
+EVENT_COLLECTOR = {
+    'LOG_DIR': os.environ.get('EVENT_COLLECTOR_LOG_DIR', str(BASE_DIR.parent / 'var' / 'events')),
+    'MAX_BATCH': 200,
+    'FSYNC': os.environ.get('EVENT_COLLECTOR_FSYNC', 'False').lower() == 'true',
+}
+
+# Perfil de SQL por requisição (ver common/profiling.py): Server-Timing, log amostrado e orçamentos por view
+SQL_PROFILER = {
+    'ENABLED': os.environ.get('SQL_PROFILER_ENABLED', 'False').lower() == 'true',
+    'SAMPLE_RATE': float(os.environ.get('SQL_PROFILER_SAMPLE_RATE', '0.01')),
+}
+
+# Snippets de tracking (ver analytics/tracking.py); STATIC_EVENTS_JS serve o JS de eventos como arquivo estático
+TRACKING = {
+    'STATIC_EVENTS_JS': os.environ.get('TRACKING_STATIC_EVENTS_JS', 'False').lower() == 'true',
+}
+
+# Cache de renderização por bloco de StreamField (ver common/blockcache.py); taxa de acerto em `manage.py block_cache`
+BLOCK_CACHE = {
+    'ENABLED': os.environ.get('BLOCK_CACHE_ENABLED', 'True').lower() == 'true',
+}
+
+# sitemap.xml em shards por faixa de id, com cache por shard (ver common/sitemap.py)
+SITEMAP = {
+    'SHARD_SIZE': 1000,
+}
+
 # OpenAI Configuration for CrewAI
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
@@ -19,13 +19,34 @@ X_FRAME_OPTIONS = 'DENY'
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 
-# Static files
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+# Static e media: nomes com hash + irmãos .gz/.br gerados no collectstatic (ver common/staticfiles.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'common.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+STATIC_PIPELINE = {
+    'MINIFY': os.environ.get('STATIC_MINIFY', 'False').lower() == 'true',
+}
 
-# Media files
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
-
-# Cache desabilitado - usando configuração do base.py
+# Cache compartilhado entre os workers: snapshot de configurações, fragmentos,
+# blocos, sitemap, feeds e as chaves de versão que invalidam os caches em
+# memória de cada worker (ex.: índice de redirects) só funcionam com ele.
+# Com REDIS_URL usa Redis (pacote `redis`); sem, a tabela criada por
+# `manage.py createcachetable`.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
 
 # Logging para produção
 if 'handlers' in LOGGING and 'file' in LOGGING['handlers']:
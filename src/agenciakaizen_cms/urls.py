@@ -7,8 +7,12 @@ from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
 from search import views as search_views
+from analytics import urls as analytics_urls
 from blog import urls as blog_urls
 from blog import api_urls as blog_api_urls
+from cases import api_urls as cases_api_urls
+from common import api_urls as uploads_api_urls
+from common import views as common_views
 from leads import urls as leads_urls
 from contact import urls as contact_urls
 from franchise import urls as franchise_urls
@@ -21,9 +25,14 @@ urlpatterns = [
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("sitemap.xml", common_views.sitemap_index, name="sitemap"),
+    path("sitemap-<slug:section>-<int:shard>.xml", common_views.sitemap_shard, name="sitemap_shard"),
     path("blog/", include(blog_urls)),
     path("api/blog/", include(blog_api_urls)),
+    path("api/cases/", include(cases_api_urls)),
+    path("api/uploads/", include(uploads_api_urls)),
     path("leads/", include(leads_urls)),
+    path("", include(analytics_urls)),
     path("franchise/", include(franchise_urls)),
     path("", include(services_urls)),
     path("", include(contact_urls)),
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "agenciakaizen_cms.settings.production")
 
 application = get_wsgi_application()
+
+# Redirects legados em memória antes da primeira requisição (common/redirects.py)
+from common.redirects import warm_up  # noqa: E402
+
+warm_up()
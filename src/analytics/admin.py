@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomEvent
+from .models import CustomEvent, EventDailyAggregate
 
 
 @admin.register(CustomEvent)
@@ -9,3 +9,17 @@ class CustomEventAdmin(admin.ModelAdmin):
     search_fields = ['name', 'display_name', 'description']
     list_editable = ['is_active']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(EventDailyAggregate)
+class EventDailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'event_name', 'path', 'events', 'value_total']
+    list_filter = ['event_name', 'date']
+    search_fields = ['event_name', 'path']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,367 @@
+"""
+Coletor first-party de eventos (POST /collect).
+
+Os eventos chegam em lotes (array JSON, {"events": [...]} ou payload de
+navigator.sendBeacon) e são validados contra o registro em memória dos
+CustomEvent ativos: nomes desconhecidos são recusados e, quando o evento
+declara custom_parameters, apenas essas chaves são mantidas.
+
+A requisição não toca o banco: os eventos aceitos viram linhas JSON
+compactas anexadas (O_APPEND, uma escrita por lote) ao log do processo,
+particionado por hora UTC:
+
+    LOG_DIR/AAAAMMDD/HH.<host>-<pid>-<token>.jsonl
+
+`manage.py compact_events` soma as partições fechadas em
+EventDailyAggregate e remove os arquivos. Cada arquivo é registrado em
+CompactedEventLog na mesma transação dos agregados, então um arquivo
+nunca é contado duas vezes (nem com dois compactadores em paralelo).
+
+O registro de eventos é recarregado quando um CustomEvent é salvo
+(versão no cache compartilhado, ver analytics.signals) ou, sem cache
+compartilhado, a cada REGISTRY_TTL segundos.
+"""
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from common.touchpoints import parse_payload
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_VERSION_KEY = 'analytics:custom_events:version'
+
+DEFAULTS = {
+    'LOG_DIR': None,            # None: BASE_DIR/../var/events
+    'MAX_BATCH': 200,           # eventos por requisição
+    'MAX_BODY': 256 * 1024,     # bytes por requisição
+    'MAX_PARAMS': 20,           # parâmetros por evento
+    'MAX_VALUE_LENGTH': 200,    # tamanho máximo de cada valor de parâmetro
+    'FSYNC': False,             # fsync a cada lote (mais durável, bem mais lento)
+    'REGISTRY_TTL': 60,         # segundos; recarga do registro sem cache compartilhado
+    'VERSION_CHECK_INTERVAL': 1.0,  # segundos entre consultas da versão no cache
+    'COMPACT_GRACE': 120,       # segundos após o fim da hora antes de compactar a partição
+}
+
+
+def collector_settings():
+    options = {**DEFAULTS, **getattr(settings, 'EVENT_COLLECTOR', {})}
+    if not options['LOG_DIR']:
+        options['LOG_DIR'] = os.path.join(os.path.dirname(settings.BASE_DIR), 'var', 'events')
+    return options
+
+
+class EventRegistry:
+    """CustomEvent ativos em memória: nome -> chaves de parâmetro permitidas (ou None)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = None
+        self.version = None
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+
+    def load(self):
+        from .models import CustomEvent
+
+        events = {}
+        for name, parameters in CustomEvent.objects.filter(is_active=True).values_list('name', 'custom_parameters'):
+            events[name] = set(parameters) if isinstance(parameters, dict) and parameters else None
+        return events
+
+    def get_events(self, options):
+        now = time.monotonic()
+        version = self.version
+        if now - self.checked_at >= options['VERSION_CHECK_INTERVAL']:
+            version = cache.get(REGISTRY_VERSION_KEY) or 0
+            self.checked_at = now
+        events = self.events
+        if events is None or version != self.version or now - self.loaded_at > options['REGISTRY_TTL']:
+            with self.lock:
+                events = self.load()
+                self.events, self.version, self.loaded_at = events, version, now
+        return events
+
+    def clear(self):
+        with self.lock:
+            self.events = None
+            self.checked_at = 0.0
+
+
+registry = EventRegistry()
+
+
+def invalidate_registry():
+    """Troca a versão do registro em todos os processos"""
+    cache.set(REGISTRY_VERSION_KEY, time.time_ns(), None)
+    registry.clear()
+
+
+def clean_params(params, allowed, options):
+    """Parâmetros planos (escalares), limitados em quantidade e tamanho"""
+    if not isinstance(params, dict):
+        raise ValueError('params deve ser um objeto')
+    cleaned = {}
+    for key, value in params.items():
+        if allowed is not None and key not in allowed:
+            continue
+        if isinstance(value, str):
+            value = value[:options['MAX_VALUE_LENGTH']]
+        elif not isinstance(value, (int, float, bool)) and value is not None:
+            continue
+        cleaned[str(key)[:50]] = value
+        if len(cleaned) >= options['MAX_PARAMS']:
+            break
+    return cleaned
+
+
+def normalize_events(events, referer, options):
+    """
+    Valida os eventos e os converte em linhas do log.
+    Retorna (linhas, rejeitados), onde rejeitados é [(índice, motivo)].
+    """
+    registered = registry.get_events(options)
+    received_at = int(time.time())
+    rows, rejected = [], []
+    for index, event in enumerate(events):
+        name = event.get('name') or event.get('event')
+        if name not in registered:
+            rejected.append((index, 'Evento não registrado'))
+            continue
+        value = event.get('value')
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            rejected.append((index, 'value deve ser numérico'))
+            continue
+        try:
+            params = clean_params(event.get('params') or {}, registered[name], options)
+        except ValueError as e:
+            rejected.append((index, str(e)))
+            continue
+        row = {'n': name, 't': received_at, 'p': str(event.get('path') or referer)[:255]}
+        if value is not None:
+            row['v'] = value
+        if params:
+            row['d'] = params
+        rows.append(row)
+    return rows, rejected
+
+
+class EventLog:
+    """Log append-only do processo, um arquivo por hora"""
+
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.pid = None
+        self.fd = None
+        self.partition = None
+
+    def path_for(self, partition):
+        day, hour = partition[:8], partition[8:]
+        return os.path.join(self.directory, day, f"{hour}.{self.owner}.jsonl")
+
+    def append(self, rows):
+        data = ''.join(json.dumps(row, separators=(',', ':'), ensure_ascii=False) + '\n' for row in rows).encode()
+        partition = datetime.now(dt_timezone.utc).strftime('%Y%m%d%H')
+        with self.lock:
+            if self.pid != os.getpid():
+                # Processo filho (fork do servidor): arquivo próprio
+                self.fd = None
+                self.pid = os.getpid()
+                self.owner = f"{socket.gethostname()}-{self.pid}-{uuid.uuid4().hex[:8]}"
+            if partition != self.partition or self.fd is None:
+                self.close_file()
+                path = self.path_for(partition)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o640)
+                self.partition = partition
+            view = memoryview(data)
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+            if self.fsync:
+                os.fsync(self.fd)
+        return len(rows)
+
+    def close_file(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def close(self):
+        with self.lock:
+            self.close_file()
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_log():
+    global _log
+    with _log_lock:
+        if _log is None:
+            options = collector_settings()
+            _log = EventLog(options['LOG_DIR'], options['FSYNC'])
+        return _log
+
+
+def reset_log(**kwargs):
+    """Recria o log quando EVENT_COLLECTOR muda (ex.: override_settings)"""
+    global _log
+    if kwargs.get('setting') != 'EVENT_COLLECTOR':
+        return
+    with _log_lock:
+        if _log is not None:
+            _log.close()
+        _log = None
+
+
+setting_changed.connect(reset_log)
+
+
+def collect(request):
+    """Corpo do endpoint /collect: valida o lote e anexa ao log (202)"""
+    options = collector_settings()
+    if len(request.body) > options['MAX_BODY']:
+        return JsonResponse({'success': False, 'error': 'Requisição muito grande'}, status=413)
+    try:
+        events = parse_payload(request.body)
+    except (ValueError, KeyError):
+        return JsonResponse({'success': False, 'error': 'Requisição inválida'}, status=400)
+    if len(events) > options['MAX_BATCH']:
+        return JsonResponse({'success': False, 'error': 'Lote de eventos muito grande'}, status=413)
+
+    try:
+        rows, rejected = normalize_events(events, request.META.get('HTTP_REFERER', ''), options)
+        if not rows:
+            return JsonResponse({
+                'success': False,
+                'error': rejected[0][1] if rejected else 'Nenhum evento enviado',
+                'rejected': len(rejected),
+            }, status=400)
+        accepted = get_log().append(rows)
+    except Exception as e:
+        logger.error(f"Erro no coletor de eventos: {e}")
+        return JsonResponse({'success': False, 'error': 'Erro interno do servidor'}, status=500)
+
+    return JsonResponse({'success': True, 'accepted': accepted, 'rejected': len(rejected)}, status=202)
+
+
+# Compactação
+
+def closed_partitions(directory, grace, now=None):
+    """Arquivos de horas já encerradas há mais de `grace` segundos"""
+    now = now or datetime.now(dt_timezone.utc)
+    for path in sorted(glob.glob(os.path.join(directory, '*', '*.jsonl'))):
+        day = os.path.basename(os.path.dirname(path))
+        hour = os.path.basename(path).split('.', 1)[0]
+        try:
+            start = datetime.strptime(day + hour, '%Y%m%d%H').replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            continue
+        if start + timedelta(hours=1, seconds=grace) <= now:
+            yield path
+
+
+def aggregate_file(path):
+    """Soma um arquivo do log: (data local, evento, página) -> [eventos, valor]"""
+    totals = defaultdict(lambda: [0, 0.0])
+    with open(path, 'rb') as log:
+        for line in log:
+            try:
+                row = json.loads(line)
+                moment = datetime.fromtimestamp(row['t'], dt_timezone.utc)
+                key = (timezone.localdate(moment), row['n'], row.get('p', '')[:255])
+            except (ValueError, KeyError, TypeError):
+                # Linha truncada (ex.: disco cheio): ignora
+                continue
+            totals[key][0] += 1
+            totals[key][1] += row.get('v') or 0
+    return totals
+
+
+def apply_totals(totals):
+    """Soma os totais nos agregados existentes e cria os que faltam"""
+    from .models import EventDailyAggregate
+
+    existing = {
+        (aggregate.date, aggregate.event_name, aggregate.path): aggregate
+        for aggregate in EventDailyAggregate.objects.select_for_update().filter(
+            date__in={key[0] for key in totals},
+            event_name__in={key[1] for key in totals},
+        )
+    }
+    to_update, to_create = [], []
+    for key, (events, value) in totals.items():
+        aggregate = existing.get(key)
+        if aggregate is None:
+            date, event_name, path = key
+            to_create.append(EventDailyAggregate(
+                date=date, event_name=event_name, path=path, events=events, value_total=value,
+            ))
+        else:
+            aggregate.events += events
+            aggregate.value_total += value
+            to_update.append(aggregate)
+    EventDailyAggregate.objects.bulk_create(to_create)
+    EventDailyAggregate.objects.bulk_update(to_update, ['events', 'value_total'])
+
+
+def compact_file(path, directory):
+    """Soma um arquivo nos agregados e o remove. Retorna o número de eventos."""
+    from .models import CompactedEventLog
+
+    name = os.path.relpath(path, directory)
+    totals = aggregate_file(path)
+    events = sum(count for count, _ in totals.values())
+    try:
+        with transaction.atomic():
+            CompactedEventLog.objects.create(name=name, events=events)
+            if totals:
+                apply_totals(totals)
+    except IntegrityError:
+        if not CompactedEventLog.objects.filter(name=name).exists():
+            raise
+        # Já compactado (por outro processo ou antes de uma queda): só remove
+        logger.info(f"Log de eventos {name} já compactado")
+        events = 0
+    os.remove(path)
+    return events
+
+
+def compact(options=None):
+    """Compacta todas as partições fechadas. Retorna (arquivos, eventos)."""
+    options = options or collector_settings()
+    directory = options['LOG_DIR']
+    files = events = 0
+    for path in closed_partitions(directory, options['COMPACT_GRACE']):
+        try:
+            events += compact_file(path, directory)
+            files += 1
+        except Exception as e:
+            logger.error(f"Erro ao compactar {path}: {e}")
+    # Diretórios de dias anteriores já vazios
+    today = datetime.now(dt_timezone.utc).strftime('%Y%m%d')
+    for day in glob.glob(os.path.join(directory, '*', '')):
+        if os.path.basename(os.path.dirname(day)) < today:
+            try:
+                os.rmdir(day)
+            except OSError:
+                pass
+    return files, events
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.collector import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta o log de eventos do coletor (/collect) em agregados diários "
+        "(EventDailyAggregate) e remove as partições já somadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Segundos entre compactações; 0 executa uma vez e sai (ex.: cron)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            files, events = compact()
+            self.stdout.write(self.style.SUCCESS(f"{files} arquivo(s) compactados, {events} evento(s)"))
+            if not options['interval']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
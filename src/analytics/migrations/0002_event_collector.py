@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactedEventLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Arquivo')),
+                ('events', models.PositiveIntegerField(default=0, verbose_name='Eventos')),
+                ('compacted_at', models.DateTimeField(auto_now_add=True, verbose_name='Compactado em')),
+            ],
+            options={
+                'verbose_name': 'Log de Eventos Compactado',
+                'verbose_name_plural': 'Logs de Eventos Compactados',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventDailyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('event_name', models.CharField(max_length=100, verbose_name='Evento')),
+                ('path', models.CharField(blank=True, max_length=255, verbose_name='Página')),
+                ('events', models.PositiveIntegerField(default=0, verbose_name='Eventos')),
+                ('value_total', models.FloatField(default=0, verbose_name='Valor total')),
+            ],
+            options={
+                'verbose_name': 'Agregado Diário de Eventos',
+                'verbose_name_plural': 'Agregados Diários de Eventos',
+                'ordering': ['-date', 'event_name', 'path'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'event_name', 'path'), name='analytics_event_daily_unique')],
+            },
+        ),
+    ]
@@ -192,3 +192,40 @@ class CustomEvent(models.Model):
     
     def __str__(self):
         return f"{self.display_name} ({self.name})"
+
+
+class EventDailyAggregate(models.Model):
+    """
+    Total diário de eventos do coletor first-party (/collect) por evento e
+    página. Mantido por `manage.py compact_events` a partir do log de eventos.
+    """
+    date = models.DateField(verbose_name="Data")
+    event_name = models.CharField(max_length=100, verbose_name="Evento")
+    path = models.CharField(max_length=255, blank=True, verbose_name="Página")
+    events = models.PositiveIntegerField(default=0, verbose_name="Eventos")
+    value_total = models.FloatField(default=0, verbose_name="Valor total")
+
+    class Meta:
+        verbose_name = "Agregado Diário de Eventos"
+        verbose_name_plural = "Agregados Diários de Eventos"
+        ordering = ['-date', 'event_name', 'path']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'event_name', 'path'], name='analytics_event_daily_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.event_name} {self.path}: {self.events}"
+
+
+class CompactedEventLog(models.Model):
+    """Arquivo do log de eventos já somado nos agregados (evita contar duas vezes)"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Arquivo")
+    events = models.PositiveIntegerField(default=0, verbose_name="Eventos")
+    compacted_at = models.DateTimeField(auto_now_add=True, verbose_name="Compactado em")
+
+    class Meta:
+        verbose_name = "Log de Eventos Compactado"
+        verbose_name_plural = "Logs de Eventos Compactados"
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+
+from .collector import invalidate_registry
+from .models import CustomEvent
+
+
+def on_custom_event_changed(sender, **kwargs):
+    invalidate_registry()
+
+
+post_save.connect(on_custom_event_changed, sender=CustomEvent)
+post_delete.connect(on_custom_event_changed, sender=CustomEvent)
@@ -0,0 +1,97 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .collector import collector_settings, compact, registry
+from .models import CompactedEventLog, CustomEvent, EventDailyAggregate
+
+
+class EventCollectorTests(TestCase):
+    """Coletor /collect: validação pelo registro, log append-only e compactação"""
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+        override = override_settings(EVENT_COLLECTOR={'LOG_DIR': self.log_dir})
+        override.enable()
+        self.addCleanup(override.disable)
+        registry.clear()
+        self.addCleanup(registry.clear)
+        CustomEvent.objects.create(name='whatsapp_click', display_name="WhatsApp")
+        CustomEvent.objects.create(
+            name='form_submit', display_name="Formulário", custom_parameters={'form': ''},
+        )
+
+    def post(self, payload):
+        return self.client.post('/collect', json.dumps(payload), content_type='text/plain')
+
+    def log_rows(self):
+        rows = []
+        for path in glob.glob(os.path.join(self.log_dir, '*', '*.jsonl')):
+            with open(path) as log:
+                rows.extend(json.loads(line) for line in log)
+        return rows
+
+    def test_accepts_registered_events_without_database(self):
+        self.post({'name': 'whatsapp_click'})  # carrega o registro
+        with self.assertNumQueries(0):
+            response = self.post({'events': [
+                {'name': 'whatsapp_click', 'path': '/contato/'},
+                {'name': 'form_submit', 'value': 10, 'params': {'form': 'contato', 'email': 'a@b.c'}},
+                {'name': 'desconhecido'},
+            ]})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'success': True, 'accepted': 2, 'rejected': 1})
+        form_row = next(row for row in self.log_rows() if row['n'] == 'form_submit')
+        # Apenas os parâmetros declarados no CustomEvent são mantidos
+        self.assertEqual(form_row['d'], {'form': 'contato'})
+        self.assertEqual(form_row['v'], 10)
+
+        self.assertEqual(self.post([{'name': 'desconhecido'}]).status_code, 400)
+        self.assertEqual(self.post([{'name': 'whatsapp_click'}] * 201).status_code, 413)
+
+    def test_registry_reloads_when_event_is_saved(self):
+        self.assertEqual(self.post({'name': 'phone_click'}).status_code, 400)
+        CustomEvent.objects.create(name='phone_click', display_name="Telefone")
+        self.assertEqual(self.post({'name': 'phone_click'}).status_code, 202)
+
+    def write_partition(self, moment, rows, owner='host-1-abc'):
+        path = os.path.join(self.log_dir, moment.strftime('%Y%m%d'), f"{moment:%H}.{owner}.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as log:
+            for row in rows:
+                log.write(json.dumps(row) + '\n')
+        return path
+
+    def test_compaction_builds_daily_aggregates_once(self):
+        past = datetime.now(dt_timezone.utc) - timedelta(hours=3)
+        stamp = int(past.timestamp())
+        self.write_partition(past, [
+            {'n': 'form_submit', 't': stamp, 'p': '/contato/', 'v': 10},
+            {'n': 'form_submit', 't': stamp, 'p': '/contato/', 'v': 5},
+        ])
+        self.write_partition(past, [{'n': 'form_submit', 't': stamp, 'p': '/contato/'}], owner='host-2-def')
+        # Partição da hora atual ainda está aberta
+        current = self.write_partition(datetime.now(dt_timezone.utc), [{'n': 'whatsapp_click', 't': stamp, 'p': '/'}])
+
+        self.assertEqual(compact(collector_settings()), (2, 3))
+        aggregate = EventDailyAggregate.objects.get()
+        self.assertEqual(
+            (aggregate.date, aggregate.event_name, aggregate.path, aggregate.events, aggregate.value_total),
+            (timezone.localdate(past), 'form_submit', '/contato/', 3, 15),
+        )
+        self.assertEqual(self.log_rows(), [{'n': 'whatsapp_click', 't': stamp, 'p': '/'}])
+        self.assertTrue(os.path.exists(current))
+
+        # Arquivo já registrado (queda entre o commit e a remoção): não soma de novo
+        path = self.write_partition(past, [{'n': 'form_submit', 't': stamp, 'p': '/contato/'}], owner='host-3-ghi')
+        CompactedEventLog.objects.create(name=os.path.relpath(path, self.log_dir))
+        self.assertEqual(compact(collector_settings()), (1, 0))
+        self.assertEqual(EventDailyAggregate.objects.get().events, 3)
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,102 @@
+"""
+Snippets de tracking (GTM, GA4, Facebook Pixel, LinkedIn e eventos).
+
+O HTML do <head>, do início do <body> e dos eventos é renderizado uma
+única vez por site e guardado no snapshot de configurações
+(site_settings.snapshot), que é invalidado quando AnalyticsSettings é
+salvo. As páginas só copiam as strings prontas.
+
+O código de eventos fica em static/js/tracking-events.js; apenas as
+flags (window.kaizenTracking) vão inline. Com TRACKING['STATIC_EVENTS_JS']
+o arquivo é referenciado por <script src> com o hash do conteúdo na URL
+(no próprio nome, com o storage de manifesto de common.staticfiles), então
+o navegador o guarda em cache em vez de receber o script inteiro em cada
+página.
+"""
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.signals import setting_changed
+from django.template.loader import render_to_string
+
+from common.staticfiles import asset_url, serves_hashed_names
+
+EVENTS_JS = 'js/tracking-events.js'
+
+DEFAULTS = {
+    'STATIC_EVENTS_JS': False,  # True: <script src> com hash em vez do script inline
+}
+
+# Flags de AnalyticsSettings expostas em window.kaizenTracking
+CONFIG_FIELDS = {
+    'gtmEnabled': 'gtm_enabled',
+    'facebookPixelEnabled': 'facebook_pixel_enabled',
+    'linkedinEnabled': 'linkedin_enabled',
+    'trackFormSubmissions': 'track_form_submissions',
+    'trackPhoneClicks': 'track_phone_clicks',
+    'trackWhatsappClicks': 'track_whatsapp_clicks',
+    'trackEmailClicks': 'track_email_clicks',
+    'trackExternalLinks': 'track_external_links',
+    'trackScrollDepth': 'track_scroll_depth',
+}
+
+
+def tracking_settings():
+    return {**DEFAULTS, **getattr(settings, 'TRACKING', {})}
+
+
+@lru_cache(maxsize=None)
+def events_js():
+    """Conteúdo do arquivo de eventos (lido uma vez por processo)"""
+    path = finders.find(EVENTS_JS)
+    if path is None:
+        with staticfiles_storage.open(EVENTS_JS) as stored:
+            return stored.read().decode()
+    with open(path, encoding='utf-8') as source:
+        return source.read()
+
+
+@lru_cache(maxsize=None)
+def events_js_url():
+    """URL do arquivo de eventos com o hash do conteúdo"""
+    if serves_hashed_names():
+        return asset_url(EVENTS_JS)
+    digest = hashlib.sha256(events_js().encode()).hexdigest()[:12]
+    return f"{asset_url(EVENTS_JS)}?v={digest}"
+
+
+def render_tracking(analytics_settings):
+    """
+    Renderiza os três snippets de um site. Retorna {'head', 'body',
+    'events'}; tudo vazio quando o site não tem AnalyticsSettings.
+    """
+    if analytics_settings is None:
+        return {'head': '', 'body': '', 'events': ''}
+
+    config = {key: bool(getattr(analytics_settings, field)) for key, field in CONFIG_FIELDS.items()}
+    context = {
+        'analytics': analytics_settings,
+        'tracking_config': json.dumps(config),
+    }
+    if tracking_settings()['STATIC_EVENTS_JS']:
+        context['events_src'] = events_js_url()
+    else:
+        context['events_js'] = events_js()
+    return {
+        'head': render_to_string('includes/gtm_head.html', context).strip(),
+        'body': render_to_string('includes/gtm_body.html', context).strip(),
+        'events': render_to_string('includes/tracking_events.html', context).strip(),
+    }
+
+
+def reset_events_js(*, setting, **kwargs):
+    if setting in ('TRACKING', 'STATIC_URL', 'STATICFILES_DIRS', 'STORAGES', 'DEBUG'):
+        events_js.cache_clear()
+        events_js_url.cache_clear()
+
+
+setting_changed.connect(reset_events_js)
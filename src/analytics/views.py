@@ -0,0 +1,14 @@
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .collector import collect
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def collect_events(request):
+    """
+    Coletor first-party de eventos: um evento, uma lista ou {"events": [...]}
+    (também via navigator.sendBeacon), validados contra os CustomEvent ativos.
+    """
+    return collect(request)
@@ -1,50 +1,47 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
 from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.template.loader import render_to_string
-from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
-from .models import BlogPage, BlogIndexPage
-import json
+from common.profiling import query_budget
+from .listing import keyset_page, listing_queryset, render_post_cards
 
 
+@query_budget(queries=5, duplicates=0)
 @require_GET
-def load_more_posts(request):
+async def load_more_posts(request):
     """
-    API endpoint para carregar mais posts via AJAX
+    API endpoint para carregar mais posts via AJAX (scroll infinito por cursor)
     """
     try:
-        page = int(request.GET.get('page', 1))
+        cursor = request.GET.get('cursor', '')
         category = request.GET.get('category', '')
+        tag = request.GET.get('tag', '')
         search = request.GET.get('search', '')
         
         # Buscar posts
-        posts = BlogPage.objects.live().order_by('-date')
-        
-        # Filtrar por categoria se especificada
-        if category:
-            posts = posts.filter(categories__slug=category)
+        posts = listing_queryset(category=category, tag=tag, prefetch=False)
         
         # Filtrar por busca se especificada
         if search:
             posts = posts.filter(title__icontains=search)
         
-        # Paginação
-        paginator = Paginator(posts, 6)  # 6 posts por página
-        page_obj = paginator.get_page(page)
+        # Paginação por cursor (date, id) - sem COUNT/OFFSET
+        try:
+            page_posts, next_cursor = await sync_to_async(keyset_page)(posts, cursor, page_size=6)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
         
-        # Renderizar HTML dos posts
-        posts_html = render_to_string('blog/partials/blog_posts.html', {
-            'blogpages': page_obj,
-            'request': request
-        })
+        # HTML dos posts montado a partir dos fragmentos em cache
+        posts_html = await sync_to_async(render_post_cards)(page_posts, request)
         
         return JsonResponse({
             'success': True,
             'html': posts_html,
-            'has_next': page_obj.has_next(),
-            'current_page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_posts': paginator.count
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor,
         })
         
     except Exception as e:
@@ -54,8 +51,9 @@ def load_more_posts(request):
         }, status=500)
 
 
+@query_budget(queries=5, duplicates=0)
 @require_GET
-def search_posts(request):
+async def search_posts(request):
     """
     API endpoint para buscar posts
     """
@@ -70,29 +68,25 @@ def search_posts(request):
             }, status=400)
         
         # Buscar posts
-        posts = BlogPage.objects.live().filter(
+        posts = listing_queryset(prefetch=False).filter(
             title__icontains=search_query
-        ).order_by('-date')
+        )
         
         # Filtrar por categoria se especificada
         if category:
             posts = posts.filter(categories__slug=category)
         
-        # Paginação
-        paginator = Paginator(posts, 6)
-        page_obj = paginator.get_page(1)
-        
-        # Renderizar HTML dos posts
-        posts_html = render_to_string('blog/partials/blog_posts.html', {
-            'blogpages': page_obj,
-            'request': request
-        })
+        # Primeira página por cursor; as seguintes vêm de load_more_posts
+        page_posts, next_cursor = await sync_to_async(keyset_page)(posts, page_size=6)
+        posts_html = await sync_to_async(render_post_cards)(page_posts, request)
+        total_posts = await posts.acount()
         
         return JsonResponse({
             'success': True,
             'html': posts_html,
-            'has_next': page_obj.has_next(),
-            'total_posts': paginator.count,
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor,
+            'total_posts': total_posts,
             'search_query': search_query
         })
         
@@ -103,23 +97,26 @@ def search_posts(request):
         }, status=500)
 
 
+@query_budget(queries=2, duplicates=0)
 @require_GET
-def get_categories(request):
+async def get_categories(request):
     """
     API endpoint para obter categorias
     """
     try:
         from .models import BlogCategory
         
-        categories = BlogCategory.objects.all().order_by('name')
+        categories = BlogCategory.objects.annotate(
+            post_count=Count('blogpage', filter=Q(blogpage__live=True))
+        ).order_by('name')
         
         categories_data = []
-        for category in categories:
+        async for category in categories:
             categories_data.append({
                 'id': category.id,
                 'name': category.name,
                 'slug': category.slug,
-                'post_count': BlogPage.objects.live().filter(categories=category).count()
+                'post_count': category.post_count
             })
         
         return JsonResponse({
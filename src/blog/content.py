@@ -0,0 +1,91 @@
+"""
+Normalização do conteúdo dos posts, feita uma vez ao salvar.
+
+Os filtros clean_content/fix_newlines rodavam as mesmas substituições sobre
+o corpo inteiro a cada renderização. Agora BlogPage.save() (editor,
+publicação de revisões e importações do WordPress) grava o resultado em
+campos próprios:
+- intro_html/body_html: HTML normalizado, ainda no formato do banco do Wagtail;
+- body_text: texto puro do corpo;
+- excerpt: resumo para feeds e listagens;
+- reading_time: minutos de leitura (WORDS_PER_MINUTE).
+
+Links internos e embeds dependem da URL atual da página/imagem, então
+continuam sendo expandidos na renderização, mas só quando existem no HTML.
+`manage.py normalize_blog_content` preenche os posts já existentes.
+"""
+import html
+import re
+
+from django.utils.safestring import mark_safe
+from wagtail.rich_text import expand_db_html
+
+# Campos derivados gravados junto com intro/body
+CONTENT_FIELDS = ('intro_html', 'body_html', 'body_text', 'excerpt', 'reading_time')
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 30
+EXCERPT_MAX_LENGTH = 300
+
+NEWLINES_RE = re.compile(r'\n{3,}')
+PARAGRAPH_BREAK_RE = re.compile(r'<br>\s*<br>')
+TAG_RE = re.compile(r'<[^>]+>')
+
+# Trechos que exigem o expand_db_html (links internos e embeds do Wagtail)
+DB_REFERENCES = ('linktype=', '<embed')
+
+
+def unescape_imported(text):
+    """Remove os escapes de aspas e barras deixados pelas importações"""
+    return text.replace('\\"', '"').replace("\\'", "'").replace('\\\\', '\\')
+
+
+def fix_newlines(text):
+    """Converte \\n em <br>/parágrafos, sem quebras duplicadas"""
+    text = NEWLINES_RE.sub('\n\n', text)
+    text = text.replace('\n', '<br>')
+    text = PARAGRAPH_BREAK_RE.sub('</p><p>', text)
+    if not text.startswith('<p>'):
+        text = '<p>' + text
+    if not text.endswith('</p>'):
+        text = text + '</p>'
+    return text
+
+
+def normalize_html(value):
+    if not value:
+        return ''
+    return fix_newlines(unescape_imported(str(value)))
+
+
+def plain_text(value):
+    """Texto puro de um HTML (tags viram espaço, entidades decodificadas)"""
+    return ' '.join(html.unescape(TAG_RE.sub(' ', value or '')).split())
+
+
+def reading_time(text):
+    return max(1, len(text.split()) // WORDS_PER_MINUTE)
+
+
+def excerpt(intro, text):
+    """Resumo: a introdução do post ou o começo do corpo"""
+    words = (plain_text(unescape_imported(intro)) if intro else text).split()
+    if len(words) > EXCERPT_WORDS:
+        return (' '.join(words[:EXCERPT_WORDS]) + '…')[:EXCERPT_MAX_LENGTH]
+    return ' '.join(words)[:EXCERPT_MAX_LENGTH]
+
+
+def normalize_post(post):
+    """Preenche os campos derivados (CONTENT_FIELDS) a partir de intro/body"""
+    post.intro_html = normalize_html(post.intro)
+    post.body_html = normalize_html(post.body)
+    post.body_text = plain_text(post.body_html)
+    post.excerpt = excerpt(post.intro, post.body_text)
+    post.reading_time = reading_time(post.body_text)
+
+
+def render_html(value):
+    """HTML normalizado pronto para o template"""
+    if any(reference in value for reference in DB_REFERENCES):
+        value = expand_db_html(value)
+    return mark_safe(value)
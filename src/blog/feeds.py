@@ -0,0 +1,131 @@
+"""
+Feeds RSS 2.0 e Atom do blog (geral, por categoria e por tag).
+
+Cada feed é gerado uma vez e guardado em cache como bytes prontos, junto
+com o ETag (hash do conteúdo) e o Last-Modified (publicação mais recente).
+A chave inclui a versão do blog, trocada a cada publicação, despublicação
+ou exclusão de post e a cada alteração de categoria (ver blog.signals).
+Com o feed em cache uma requisição não consulta o banco; agregadores que
+mandam If-None-Match/If-Modified-Since recebem 304 sem corpo.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+
+VERSION_KEY = 'blog:feed:version'
+FEED_ITEMS = 20
+FEED_TIMEOUT = 60 * 60 * 24  # 24 horas; a chave já muda a cada publicação
+FEED_MAX_AGE = 300           # cache do agregador/proxy, em segundos
+
+FEED_CLASSES = {
+    'rss': Rss201rev2Feed,
+    'atom': Atom1Feed,
+}
+
+# Campos lidos pelo feed (título, URL, resumo e datas)
+FEED_FIELDS = (
+    'id', 'title', 'slug', 'path', 'depth', 'url_path', 'locale',
+    'first_published_at', 'last_published_at', 'date', 'excerpt', 'search_description',
+)
+
+
+def bump_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def feed_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Cache limpo: uma versão nova descarta feeds montados antes
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY) or 0
+    return version
+
+
+def feed_scope(scope, slug):
+    """(título, link relativo, queryset) do feed; Http404 para categoria/tag inexistente"""
+    from taggit.models import Tag as TaggitTag
+
+    from .models import BlogCategory, BlogPage
+
+    posts = BlogPage.objects.live().public()
+    if scope == 'category':
+        category = BlogCategory.objects.filter(slug=slug).first()
+        if category is None:
+            raise Http404
+        return category.name, reverse('blog:blog_category', args=(slug,)), posts.filter(categories=category)
+    if scope == 'tag':
+        tag = TaggitTag.objects.filter(slug=slug).first()
+        if tag is None:
+            raise Http404
+        return f"#{tag.name}", reverse('blog:blog_tag', args=(slug,)), posts.filter(blogpagetag__tag=tag)
+    return None, reverse('blog:blog_index'), posts
+
+
+def build_feed(request, kind, scope, slug, version):
+    """Monta o feed lendo só os campos usados, com as categorias em uma consulta"""
+    title, link, posts = feed_scope(scope, slug)
+    latest = posts.aggregate(latest=Max('last_published_at'))['latest']
+    # Despublicar não muda a publicação mais recente; a versão (momento da troca) sim
+    last_modified = max(int(latest.timestamp()) if latest else 0, version // 10**9)
+    posts = (
+        posts.only(*FEED_FIELDS)
+        .prefetch_related('categories')
+        .order_by('-first_published_at', '-pk')[:FEED_ITEMS]
+    )
+
+    feed = FEED_CLASSES[kind](
+        title=f"Blog Agência Kaizen — {title}" if title else "Blog Agência Kaizen",
+        link=request.build_absolute_uri(link),
+        description="Marketing digital, vendas e crescimento: artigos da Agência Kaizen",
+        language='pt-br',
+        feed_url=request.build_absolute_uri(request.path),
+        feed_guid=request.build_absolute_uri(request.path),
+    )
+    for post in posts:
+        url = post.get_full_url(request)
+        feed.add_item(
+            title=post.title,
+            link=url,
+            description=post.excerpt or post.search_description,
+            unique_id=url,
+            pubdate=post.first_published_at,
+            updateddate=post.last_published_at,
+            categories=[category.name for category in post.categories.all()],
+        )
+
+    content = feed.writeString('utf-8').encode('utf-8')
+    return {
+        'content': content,
+        'content_type': feed.content_type,
+        'etag': f'"{hashlib.md5(content).hexdigest()}"',
+        'last_modified': last_modified or None,
+    }
+
+
+def feed_response(request, kind, scope=None, slug=None):
+    """Feed do cache (ou montado na hora), respeitando os cabeçalhos condicionais"""
+    if kind not in FEED_CLASSES:
+        raise Http404
+    version = feed_version()
+    key = f"blog:feed:{version}:{kind}:{scope or 'all'}:{slug or ''}:{request.get_host()}"
+    feed = cache.get(key)
+    if feed is None:
+        feed = build_feed(request, kind, scope, slug, version)
+        cache.set(key, feed, FEED_TIMEOUT)
+
+    response = get_conditional_response(request, etag=feed['etag'], last_modified=feed['last_modified'])
+    if response is None:
+        response = HttpResponse(feed['content'], content_type=feed['content_type'])
+    response['ETag'] = feed['etag']
+    if feed['last_modified'] is not None:
+        response['Last-Modified'] = http_date(feed['last_modified'])
+    patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+    return response
@@ -0,0 +1,169 @@
+"""
+Utilitários de listagem do blog.
+
+- Queryset de listagem sem N+1 (categorias, tags, imagem e renditions)
+- Paginação por cursor (keyset) ordenada por (date, id), sem COUNT/OFFSET
+- Cache de fragmentos HTML por post, versionado pela revisão publicada e
+  por uma versão geral (CARD_VERSION_KEY), trocada quando muda algo que o
+  card mostra sem nova revisão: categorias, imagens e o backfill do
+  normalize_blog_content
+"""
+import base64
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from wagtail.images import get_image_model
+
+from common.renditions import specs_for
+
+# Renditions usadas pelos cards nas listagens do blog (ver common.renditions)
+CARD_RENDITIONS = tuple(specs_for('blog_cards'))
+
+# Campos lidos pelos templates de card (pageurl, data, intro, chave de cache)
+CARD_FIELDS = (
+    'id', 'title', 'slug', 'path', 'depth', 'url_path', 'live', 'locale',
+    'first_published_at', 'last_published_at', 'live_revision', 'latest_revision',
+    'date', 'intro', 'excerpt', 'reading_time', 'is_featured', 'social_image',
+)
+
+CARD_TEMPLATE = 'blog/partials/blog_post_card.html'
+EMPTY_TEMPLATE = 'blog/partials/blog_posts.html'
+CARD_CACHE_TIMEOUT = 60 * 60 * 24  # 24 horas
+CARD_VERSION_KEY = 'blog:card:version'
+
+
+def card_prefetches():
+    """Relacionamentos lidos pelos cards (categorias, tags e renditions)"""
+    from .models import BlogPageTag
+
+    renditions = get_image_model().get_rendition_model().objects.filter(
+        filter_spec__in=CARD_RENDITIONS
+    )
+    return [
+        'categories',
+        Prefetch(
+            'blogpagetag_set',
+            queryset=BlogPageTag.objects.select_related('tag'),
+            to_attr='prefetched_tags',
+        ),
+        Prefetch('social_image__renditions', queryset=renditions),
+    ]
+
+
+def listing_queryset(parent=None, category=None, tag=None, prefetch=True):
+    """
+    Queryset base das listagens do blog, já com os relacionamentos dos cards
+    carregados: o número de consultas não depende do tamanho da página.
+
+    Com prefetch=False os relacionamentos ficam para render_post_cards, que
+    só os carrega para os cards ausentes do cache.
+    """
+    from .models import BlogPage
+
+    posts = BlogPage.objects.live()
+    if parent is not None:
+        posts = posts.child_of(parent)
+    if category:
+        posts = posts.filter(categories__slug=category)
+    if tag:
+        posts = posts.filter(blogpagetag__tag__slug=tag)
+
+    posts = posts.only(*CARD_FIELDS).select_related('social_image')
+    if prefetch:
+        posts = posts.prefetch_related(*card_prefetches())
+    return posts
+
+
+def encode_cursor(post):
+    """Gera um cursor opaco a partir da posição (date, id) do post"""
+    raw = f"{post.date.isoformat()}:{post.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Converte o cursor de volta para (date, id).
+    Levanta ValueError se o cursor for inválido.
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_str, pk = raw.split(':', 1)
+        return datetime.date.fromisoformat(date_str), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def keyset_page(queryset, cursor=None, page_size=6):
+    """
+    Retorna (posts, next_cursor) em ordem decrescente de (date, id).
+
+    Busca page_size + 1 linhas para descobrir se há próxima página,
+    evitando o COUNT completo do Paginator.
+    """
+    queryset = queryset.order_by('-date', '-pk')
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk))
+
+    posts = list(queryset[:page_size + 1])
+    has_next = len(posts) > page_size
+    posts = posts[:page_size]
+    next_cursor = encode_cursor(posts[-1]) if has_next else None
+    return posts, next_cursor
+
+
+def bump_card_version():
+    cache.set(CARD_VERSION_KEY, time.time_ns(), None)
+
+
+def card_version():
+    version = cache.get(CARD_VERSION_KEY)
+    if version is None:
+        # Cache limpo: uma versão nova descarta cards montados antes
+        cache.add(CARD_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CARD_VERSION_KEY) or 0
+    return version
+
+
+def card_cache_key(post, version):
+    """Chave do fragmento do card, invalidada a cada nova revisão publicada"""
+    revision_id = post.live_revision_id or post.latest_revision_id or 0
+    return f"blog:card:{version}:{post.pk}:{revision_id}"
+
+
+def render_post_cards(posts, request=None):
+    """
+    Renderiza os cards dos posts reaproveitando fragmentos em cache.
+    Apenas os posts sem fragmento em cache são renderizados.
+    """
+    if not posts:
+        return render_to_string(EMPTY_TEMPLATE, {'blogpages': [], 'request': request})
+
+    version = card_version()
+    keys = [card_cache_key(post, version) for post in posts]
+    cached = cache.get_many(keys)
+
+    # Relacionamentos carregados em lote apenas para os cards a renderizar
+    to_render = [post for post, key in zip(posts, keys) if key not in cached]
+    if to_render:
+        prefetch_related_objects(to_render, *card_prefetches())
+
+    fragments = []
+    missing = {}
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post, 'request': request})
+            missing[key] = html
+        fragments.append(html)
+
+    if missing:
+        cache.set_many(missing, CARD_CACHE_TIMEOUT)
+
+    # Fragmentos vindos de templates (já escapados)
+    return mark_safe(''.join(fragments))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.content import CONTENT_FIELDS, normalize_post
+from blog.feeds import bump_version as bump_feed_version
+from blog.listing import bump_card_version
+from blog.models import BlogPage
+
+
+class Command(BaseCommand):
+    help = "Normaliza o conteúdo dos posts do blog em lotes (HTML, texto, resumo e tempo de leitura)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts gravados por transação')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = BlogPage.objects.order_by('pk').only('id', 'intro', 'body')
+        total = posts.count()
+
+        started = time.monotonic()
+        done = 0
+        last_pk = 0
+        while True:
+            # Lotes por faixa de pk: cada lote é uma consulta e um bulk_update
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                normalize_post(post)
+            with transaction.atomic():
+                BlogPage.objects.bulk_update(batch, CONTENT_FIELDS)
+            last_pk = batch[-1].pk
+            done += len(batch)
+            self.stdout.write(f"  {done}/{total} posts processados")
+
+        # Os feeds e os cards em cache usam o resumo e o tempo de leitura
+        bump_feed_version()
+        bump_card_version()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Conteúdo normalizado: {done} posts em {elapsed:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import RelatedPost, RelatedPostQueue
+from blog.related import TOP_K, RelatedIndex, store_neighbours
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de posts relacionados do blog em lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts gravados por transação')
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Vizinhos armazenados por post')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        top_k = options['top_k']
+
+        started = time.monotonic()
+        started_at = timezone.now()
+        index = RelatedIndex()
+        post_ids = index.post_ids
+        self.stdout.write(f"Corpus carregado: {len(post_ids)} posts publicados")
+
+        # Remove relações de posts que não estão mais publicados
+        RelatedPost.objects.exclude(source_id__in=post_ids).delete()
+
+        total_rows = 0
+        for start in range(0, len(post_ids), batch_size):
+            batch = post_ids[start:start + batch_size]
+            total_rows += store_neighbours(index, batch, top_k)
+            self.stdout.write(f"  {min(start + batch_size, len(post_ids))}/{len(post_ids)} posts processados")
+
+        # A reconstrução cobre tudo que entrou na fila antes dela começar
+        RelatedPostQueue.objects.filter(queued_at__lte=started_at).delete()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice reconstruído: {total_rows} relações em {elapsed:.1f}s"
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.related import TOP_K, process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker dos posts relacionados: recalcula os vizinhos dos posts publicados "
+        "ou despublicados (fila RelatedPostQueue), um índice por lote"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa a fila uma vez e sai (ex.: cron)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Posts da fila por lote')
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Vizinhos armazenados por post')
+        parser.add_argument('--sleep', type=float, default=10.0, help='Espera (s) quando a fila está vazia')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = process_queue(options['batch_size'], options['top_k'])
+            if processed or options['once']:
+                self.stdout.write(self.style.SUCCESS(f"{processed} post(s) da fila atualizados"))
+            if options['once']:
+                return
+            if not processed:
+                try:
+                    time.sleep(options['sleep'])
+                except KeyboardInterrupt:
+                    return
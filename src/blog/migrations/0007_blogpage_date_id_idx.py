@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blogpage_is_featured_blogpage_meta_description_and_more'),
+        ('wagtailcore', '0095_groupsitepermission'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpage',
+            index=models.Index(fields=['date', 'page_ptr'], name='blog_blogpage_date_id_idx'),
+        ),
+    ]
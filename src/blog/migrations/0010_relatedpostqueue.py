@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_blogpage_normalized_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPostQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queued_at', models.DateTimeField()),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.blogpage')),
+            ],
+            options={
+                'verbose_name': 'Post na Fila de Relacionados',
+                'verbose_name_plural': 'Fila de Posts Relacionados',
+            },
+        ),
+    ]
@@ -12,10 +12,15 @@ from wagtail.blocks import (
     StreamBlock, PageChooserBlock, URLBlock
 )
 from taggit.models import Tag as TaggitTag, TaggedItemBase
+from common.profiling import QueryBudget
+
+from .content import CONTENT_FIELDS, normalize_post, render_html
 
 
 class BlogIndexPage(Page):
     """Página índice do blog - lista todos os posts"""
+    query_budget = QueryBudget(queries=25, duplicates=4)
+
     intro = RichTextField(blank=True)
     
     content_panels = Page.content_panels + [
@@ -26,8 +31,9 @@ class BlogIndexPage(Page):
         # Atualizar contexto para incluir apenas posts publicados
         context = super().get_context(request)
         
-        # Buscar posts filhos publicados
-        blogpages = self.get_children().live().type(BlogPage).order_by('-first_published_at')
+        # Buscar posts filhos publicados (com categorias, tags e imagens pré-carregadas)
+        from .listing import listing_queryset
+        blogpages = listing_queryset(parent=self).order_by('-first_published_at')
         
         # Paginação
         from django.core.paginator import Paginator
@@ -77,6 +83,8 @@ class BlogCategory(models.Model):
 
 class BlogPage(Page):
     """Modelo para posts do blog"""
+    query_budget = QueryBudget(queries=30, duplicates=6)
+
     date = models.DateField("Data de publicação")
     intro = models.CharField(max_length=250, blank=True)
     body = RichTextField(blank=True)
@@ -84,7 +92,12 @@ class BlogPage(Page):
     is_featured = models.BooleanField(default=False, verbose_name='Post em destaque')
     meta_description = models.TextField(blank=True, help_text='Descrição para SEO (máximo 160 caracteres)', max_length=160)
     meta_keywords = models.CharField(blank=True, help_text='Palavras-chave separadas por vírgula', max_length=255)
-    reading_time = models.PositiveIntegerField(default=5, help_text='Tempo estimado de leitura em minutos')
+    reading_time = models.PositiveIntegerField(default=5, editable=False, help_text='Tempo estimado de leitura em minutos (calculado ao salvar)')
+    # Derivados de intro/body, gravados no save (ver blog.content)
+    intro_html = models.TextField(blank=True, editable=False)
+    body_html = models.TextField(blank=True, editable=False)
+    body_text = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
     social_image = models.ForeignKey('wagtailimages.Image', blank=True, null=True, on_delete=models.SET_NULL, related_name='+', verbose_name='Imagem para redes sociais')
     
     search_fields = Page.search_fields + [
@@ -98,7 +111,6 @@ class BlogPage(Page):
             FieldPanel('intro'),
             FieldPanel('categories', widget=CheckboxSelectMultiple),
             FieldPanel('is_featured'),
-            FieldPanel('reading_time'),
             FieldPanel('social_image'),
         ], heading="Informações do Post"),
         FieldPanel('body'),
@@ -108,9 +120,59 @@ class BlogPage(Page):
         ], heading="SEO"),
     ]
     
+    @property
+    def tag_list(self):
+        """Tags do post, usando o prefetch das listagens quando disponível"""
+        if hasattr(self, 'prefetched_tags'):
+            return [item.tag for item in self.prefetched_tags]
+        return [item.tag for item in self.blogpagetag_set.select_related('tag')]
+    
+    @property
+    def rendered_intro(self):
+        return render_html(self.intro_html or self.content_fallback('intro'))
+
+    @property
+    def rendered_body(self):
+        return render_html(self.body_html or self.content_fallback('body'))
+
+    def content_fallback(self, field):
+        # Post ainda sem backfill (normalize_blog_content): normaliza na hora
+        value = getattr(self, field)
+        if not value:
+            return ''
+        normalize_post(self)
+        return getattr(self, f'{field}_html')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'intro', 'body'} & set(update_fields):
+            normalize_post(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *CONTENT_FIELDS}
+        return super().save(*args, **kwargs)
+
+    def serve_preview(self, request, mode_name):
+        # O preview monta a página do formulário, sem passar pelo save
+        normalize_post(self)
+        return super().serve_preview(request, mode_name)
+
+    class Meta:
+        indexes = [
+            # Suporta a paginação por cursor (date, id) do scroll infinito
+            models.Index(fields=['date', 'page_ptr'], name='blog_blogpage_date_id_idx'),
+        ]
+    
     def get_context(self, request):
         context = super().get_context(request)
-        context['related_posts'] = BlogPage.objects.live().exclude(id=self.id)[:3]
+        # Relacionados pré-calculados (blog.related); fallback enquanto o índice não existe
+        related_posts = list(
+            BlogPage.objects.live()
+            .filter(related_incoming__source=self)
+            .order_by('related_incoming__rank')[:3]
+        )
+        if not related_posts:
+            related_posts = BlogPage.objects.live().exclude(id=self.id)[:3]
+        context['related_posts'] = related_posts
         return context
 
 
@@ -118,6 +180,36 @@ class BlogPage(Page):
 BlogPage.tags = models.ManyToManyField(TaggitTag, through=BlogPageTag, blank=True)
 
 
+class RelatedPost(models.Model):
+    """Vizinhos pré-calculados de cada post (ver blog.related)"""
+    source = models.ForeignKey(BlogPage, on_delete=models.CASCADE, related_name='related_links')
+    target = models.ForeignKey(BlogPage, on_delete=models.CASCADE, related_name='related_incoming')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        verbose_name = "Post Relacionado"
+        verbose_name_plural = "Posts Relacionados"
+        ordering = ['source', 'rank']
+        unique_together = [('source', 'rank')]
+    
+    def __str__(self):
+        return f"{self.source_id} -> {self.target_id} ({self.score:.3f})"
+
+
+class RelatedPostQueue(models.Model):
+    """Posts publicados/despublicados aguardando o recálculo dos relacionados (blog.related)"""
+    post = models.OneToOneField(BlogPage, on_delete=models.CASCADE, related_name='+')
+    queued_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = "Post na Fila de Relacionados"
+        verbose_name_plural = "Fila de Posts Relacionados"
+    
+    def __str__(self):
+        return f"{self.post_id} ({self.queued_at:%Y-%m-%d %H:%M:%S})"
+
+
 class CategoryIndexPage(Page):
     """Página índice de categorias"""
     intro = RichTextField(blank=True)
@@ -0,0 +1,202 @@
+"""
+Motor de posts relacionados do blog.
+
+A similaridade entre dois posts combina categorias em comum, tags em comum
+(BlogPageTag) e a sobreposição de termos TF-IDF de intro/body. Os K vizinhos
+mais próximos de cada post são gravados em RelatedPost, de modo que a página
+do post lê os relacionados com uma única consulta indexada.
+
+Publicar ou despublicar um post só grava o post em RelatedPostQueue, na
+mesma transação da publicação; o recálculo (que carrega o corpus inteiro)
+roda no worker `manage.py update_related_posts`, que monta o índice uma
+vez por lote de posts da fila.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+TOP_K = 6
+CATEGORY_WEIGHT = 0.3
+TAG_WEIGHT = 0.3
+TEXT_WEIGHT = 0.4
+
+TOKEN_RE = re.compile(r'[a-zà-ÿ0-9]{3,}')
+STOPWORDS = {
+    'para', 'com', 'que', 'uma', 'por', 'mais', 'como', 'dos', 'das', 'nos',
+    'nas', 'seu', 'sua', 'seus', 'suas', 'ele', 'ela', 'são', 'foi', 'ser',
+    'ter', 'tem', 'isso', 'esse', 'essa', 'este', 'esta', 'também', 'quando',
+    'muito', 'pela', 'pelo', 'entre', 'sobre', 'você', 'vocês', 'mas', 'não',
+    'sim', 'the', 'and', 'for', 'with',
+}
+
+
+def tokenize(text):
+    """Extrai termos normalizados de um texto (HTML já removido)"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class RelatedIndex:
+    """
+    Corpus em memória com os sinais de todos os posts publicados.
+
+    Carregado com três consultas (posts, categorias, tags), independente do
+    número de posts.
+    """
+
+    def __init__(self):
+        from .models import BlogPage, BlogPageTag
+
+        posts = BlogPage.objects.live().only('id', 'title', 'intro', 'body')
+        self.post_ids = []
+        term_counts = {}
+        for post in posts.iterator():
+            self.post_ids.append(post.pk)
+            text = f"{post.title} {post.intro} {strip_tags(post.body or '')}"
+            term_counts[post.pk] = Counter(tokenize(text))
+
+        self.categories = defaultdict(set)
+        through = BlogPage.categories.through
+        for page_id, category_id in through.objects.filter(
+            blogpage_id__in=self.post_ids
+        ).values_list('blogpage_id', 'blogcategory_id'):
+            self.categories[page_id].add(category_id)
+
+        self.tags = defaultdict(set)
+        for page_id, tag_id in BlogPageTag.objects.filter(
+            content_object_id__in=self.post_ids
+        ).values_list('content_object_id', 'tag_id'):
+            self.tags[page_id].add(tag_id)
+
+        self.vectors = self._tfidf(term_counts)
+
+    def _tfidf(self, term_counts):
+        """Vetores TF-IDF normalizados (norma L2) por post"""
+        total = len(term_counts) or 1
+        document_frequency = Counter()
+        for counts in term_counts.values():
+            document_frequency.update(counts.keys())
+
+        vectors = {}
+        for pk, counts in term_counts.items():
+            length = sum(counts.values()) or 1
+            vector = {
+                term: (count / length) * math.log((1 + total) / (1 + document_frequency[term]))
+                for term, count in counts.items()
+            }
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            vectors[pk] = {term: w / norm for term, w in vector.items()}
+        return vectors
+
+    def cosine(self, a, b):
+        va, vb = self.vectors.get(a, {}), self.vectors.get(b, {})
+        if len(va) > len(vb):
+            va, vb = vb, va
+        return sum(w * vb.get(term, 0.0) for term, w in va.items())
+
+    def score(self, a, b):
+        return (
+            CATEGORY_WEIGHT * jaccard(self.categories[a], self.categories[b])
+            + TAG_WEIGHT * jaccard(self.tags[a], self.tags[b])
+            + TEXT_WEIGHT * self.cosine(a, b)
+        )
+
+    def neighbours(self, pk, k=TOP_K):
+        """Retorna [(post_id, score), ...] dos K posts mais similares"""
+        scored = [
+            (other, self.score(pk, other))
+            for other in self.post_ids
+            if other != pk
+        ]
+        scored = [item for item in scored if item[1] > 0]
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        return scored[:k]
+
+
+def store_neighbours(index, post_ids, k=TOP_K):
+    """Substitui as linhas de RelatedPost dos posts informados"""
+    from .models import RelatedPost
+
+    rows = []
+    for pk in post_ids:
+        for rank, (target_id, score) in enumerate(index.neighbours(pk, k)):
+            rows.append(RelatedPost(source_id=pk, target_id=target_id, score=score, rank=rank))
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(source_id__in=post_ids).delete()
+        RelatedPost.objects.bulk_create(rows)
+    return len(rows)
+
+
+def update_related_for_post(post_id, k=TOP_K, index=None):
+    """
+    Atualiza o índice após publicar/despublicar um post: recalcula os vizinhos
+    do próprio post, dos posts que já o tinham como relacionado e dos posts
+    cujo top-K passaria a incluí-lo.
+    """
+    from .models import RelatedPost
+
+    index = index or RelatedIndex()
+    affected = set(
+        RelatedPost.objects.filter(target_id=post_id).values_list('source_id', flat=True)
+    )
+
+    if post_id in index.vectors:
+        affected.add(post_id)
+        # Posts cujo top-K passaria a incluir o post publicado
+        current = {
+            row['source_id']: row
+            for row in RelatedPost.objects.values('source_id').annotate(
+                total=Count('id'), lowest=Min('score')
+            )
+        }
+        for other in index.post_ids:
+            if other == post_id:
+                continue
+            score = index.score(other, post_id)
+            stats = current.get(other)
+            if score > 0 and (not stats or stats['total'] < k or score > stats['lowest']):
+                affected.add(other)
+    else:
+        # Despublicado: deixa de ter relacionados próprios
+        RelatedPost.objects.filter(source_id=post_id).delete()
+
+    if affected:
+        store_neighbours(index, sorted(affected), k)
+
+
+def enqueue(post_id):
+    """Coloca o post na fila do worker (na transação de quem chamou)"""
+    from .models import RelatedPostQueue
+
+    # Post já na fila: só atualiza o horário, para o worker não descartar a nova entrada
+    RelatedPostQueue.objects.bulk_create(
+        [RelatedPostQueue(post_id=post_id, queued_at=timezone.now())],
+        update_conflicts=True, unique_fields=['post'], update_fields=['queued_at'],
+    )
+
+
+def process_queue(batch_size=50, k=TOP_K):
+    """Processa um lote da fila com um único índice; retorna quantos posts foram atualizados"""
+    from .models import RelatedPostQueue
+
+    pending = list(RelatedPostQueue.objects.order_by('queued_at').values_list('post_id', 'queued_at')[:batch_size])
+    if not pending:
+        return 0
+
+    index = RelatedIndex()
+    for post_id, queued_at in pending:
+        update_related_for_post(post_id, k, index)
+        # Reenfileirado durante o processamento: fica para o próximo lote
+        RelatedPostQueue.objects.filter(post_id=post_id, queued_at=queued_at).delete()
+    return len(pending)
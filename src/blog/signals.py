@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.images import get_image_model
+from wagtail.signals import page_published, page_unpublished
+
+from common.renditions import IMAGE_METADATA_FIELDS
+
+from .feeds import bump_version as bump_feed_version
+from .listing import bump_card_version
+from .models import BlogCategory, BlogPage
+from .related import enqueue as enqueue_related
+
+
+def update_related_posts(sender, instance, **kwargs):
+    """Enfileira o recálculo dos relacionados; o worker update_related_posts faz o resto"""
+    # Na transação da publicação: se ela for desfeita, a entrada na fila também é
+    enqueue_related(instance.pk)
+
+
+page_published.connect(update_related_posts, sender=BlogPage)
+page_unpublished.connect(update_related_posts, sender=BlogPage)
+
+
+def invalidate_feeds(sender, **kwargs):
+    # Depois do commit, para nenhum worker remontar o feed com o estado antigo
+    transaction.on_commit(bump_feed_version)
+
+
+page_published.connect(invalidate_feeds, sender=BlogPage)
+page_unpublished.connect(invalidate_feeds, sender=BlogPage)
+post_delete.connect(invalidate_feeds, sender=BlogPage)
+post_save.connect(invalidate_feeds, sender=BlogCategory)
+post_delete.connect(invalidate_feeds, sender=BlogCategory)
+
+
+def invalidate_cards(sender, **kwargs):
+    # Nome da categoria aparece nos cards, sem nova revisão do post
+    transaction.on_commit(bump_card_version)
+
+
+def invalidate_cards_on_image_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IMAGE_METADATA_FIELDS:
+        return
+    if BlogPage.objects.filter(social_image=instance).exists():
+        transaction.on_commit(bump_card_version)
+
+
+post_save.connect(invalidate_cards, sender=BlogCategory)
+post_delete.connect(invalidate_cards, sender=BlogCategory)
+post_save.connect(invalidate_cards_on_image_change, sender=get_image_model())
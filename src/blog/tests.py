@@ -0,0 +1,330 @@
+import datetime
+import re
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from taggit.models import Tag as TaggitTag
+
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+from wagtail.test.utils import WagtailPageTestCase
+
+from blog.content import CONTENT_FIELDS
+from blog.listing import CARD_RENDITIONS, listing_queryset
+from common.profiling import enforce_query_budgets
+from blog.models import BlogCategory, BlogIndexPage, BlogPage, BlogPageTag, RelatedPost, RelatedPostQueue
+from blog.related import RelatedIndex
+
+
+class BlogFixtureMixin:
+    """Índice do blog, categoria, tag e imagem de capa; add_posts publica posts"""
+
+    def setUp(self):
+        # Renditions e fragmentos de cards ficam no cache entre testes
+        cache.clear()
+
+        root_page = Page.objects.get(pk=1)
+        self.blog_index = BlogIndexPage(title="Aprenda Marketing", slug="aprenda-marketing")
+        root_page.get_children().first().add_child(instance=self.blog_index)
+
+        self.category = BlogCategory.objects.create(name="SEO", slug="seo")
+        self.tag = TaggitTag.objects.create(name="google", slug="google")
+        self.image = Image.objects.create(title="Capa", file=get_test_image_file())
+        for spec in CARD_RENDITIONS:
+            self.image.get_rendition(spec)
+
+        self.post_count = 0
+
+    def add_posts(self, total):
+        for _ in range(total):
+            self.post_count += 1
+            post = BlogPage(
+                title=f"Post {self.post_count}",
+                slug=f"post-{self.post_count}",
+                date=datetime.date(2024, 1, 1) + datetime.timedelta(days=self.post_count),
+                intro="Introdução",
+                social_image=self.image,
+            )
+            self.blog_index.add_child(instance=post)
+            post.categories.add(self.category)
+            BlogPageTag.objects.create(content_object=post, tag=self.tag)
+            post.save_revision().publish()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class BlogListingQueryCountTests(BlogFixtureMixin, WagtailPageTestCase):
+    """
+    As listagens do blog devem executar o mesmo número de consultas
+    independentemente de quantos posts aparecem na página.
+    """
+
+    def assertConstantQueries(self, url, small=2, large=8):
+        # Primeira requisição aquece caches do Wagtail (ex.: raízes do site)
+        self.client.get(url)
+        self.add_posts(small)
+        small_count = self.count_queries(url)
+        self.add_posts(large - small)
+        large_count = self.count_queries(url)
+        self.assertEqual(
+            small_count, large_count,
+            f"{url}: {small_count} consultas com {small} posts, {large_count} com {large}",
+        )
+
+    def test_blog_index_page_constant_queries(self):
+        self.assertConstantQueries(self.blog_index.url)
+
+    def test_blog_index_view_constant_queries(self):
+        self.assertConstantQueries("/blog/")
+
+    def test_blog_category_view_constant_queries(self):
+        self.assertConstantQueries("/blog/categorias/seo/")
+
+    def test_blog_tag_view_constant_queries(self):
+        self.assertConstantQueries("/blog/tags/google/")
+
+    def test_load_more_api_constant_queries(self):
+        self.assertConstantQueries("/api/blog/load-more/", small=2, large=6)
+
+    @enforce_query_budgets()
+    def test_pages_within_query_budgets(self):
+        self.add_posts(8)
+        post = BlogPage.objects.get(slug="post-3")
+        for url in (self.blog_index.url, post.url, "/blog/", "/blog/categorias/seo/", "/api/blog/load-more/"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        # Páginas do Wagtail (TemplateResponse) também medem o template
+        self.assertIn("tpl;dur=", self.client.get(post.url)["Server-Timing"])
+
+    def test_listing_prefetches_tags(self):
+        self.add_posts(1)
+        post = BlogPage.objects.get(slug="post-1")
+        listed = listing_queryset().get(pk=post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual([tag.slug for tag in listed.tag_list], ["google"])
+            self.assertEqual([c.slug for c in listed.categories.all()], ["seo"])
+
+
+class BlogLoadMoreTests(BlogFixtureMixin, WagtailPageTestCase):
+    """Carregar mais por cursor, a partir do estado renderizado na listagem"""
+
+    def setUp(self):
+        super().setUp()
+        self.add_posts(15)
+
+    def load_more(self, **params):
+        response = self.client.get("/api/blog/load-more/", params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return re.findall(r'title="(Post \d+)"', data['html']), data
+
+    def test_walk_pages_from_listing(self):
+        response = self.client.get("/blog/")
+        self.assertContains(response, 'id="blog-data"')
+        self.assertContains(response, 'js/blog-load-more.js')
+        blog_data = response.context['blog_data']
+        self.assertTrue(blog_data['has_next'])
+
+        # A listagem mostra os 12 mais recentes; o cursor continua do 3 para baixo
+        titles, data = self.load_more(cursor=blog_data['next_cursor'])
+        self.assertEqual(titles, ["Post 3", "Post 2", "Post 1"])
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_walk_api_pages(self):
+        seen = []
+        cursor = ''
+        while True:
+            titles, data = self.load_more(cursor=cursor)
+            seen += titles
+            if not data['has_next']:
+                break
+            cursor = data['next_cursor']
+        self.assertEqual(seen, [f"Post {n}" for n in range(15, 0, -1)])
+
+    def test_category_page_passes_filter(self):
+        blog_data = self.client.get("/blog/categorias/seo/").context['blog_data']
+        self.assertEqual(blog_data['category'], 'seo')
+        titles, _ = self.load_more(cursor=blog_data['next_cursor'], category='seo')
+        self.assertEqual(len(titles), 3)
+        titles, _ = self.load_more(tag='outra')
+        self.assertEqual(titles, [])
+
+    def test_listing_and_api_share_card_markup(self):
+        response = self.client.get("/blog/")
+        grid = re.search(r'<div class="blog-posts blog-posts-grid">(.*?)<!-- Carregar mais', response.content.decode(), re.S).group(1)
+        self.assertEqual(grid.count('<article class="blog-post card'), 12)
+        self.assertContains(response, 'class="blog-pagination"')
+        _, data = self.load_more(cursor=response.context['blog_data']['next_cursor'])
+        self.assertEqual(data['html'].count('<article class="blog-post card'), 3)
+
+    def test_cards_follow_category_and_backfill(self):
+        self.assertIn("SEO", self.load_more()[1]['html'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Otimização"
+            self.category.save()
+        self.assertIn("Otimização", self.load_more()[1]['html'])
+
+        # O backfill muda o resumo sem nova revisão
+        BlogPage.objects.update(intro="Resumo novo do post")
+        call_command('normalize_blog_content', stdout=mock.Mock())
+        self.assertIn("Resumo novo do post", self.load_more()[1]['html'])
+
+    def test_malformed_cursor(self):
+        response = self.client.get("/api/blog/load-more/", {'cursor': 'nao-e-um-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class RelatedPostsTests(BlogFixtureMixin, WagtailPageTestCase):
+    """Similaridade entre posts e recálculo pela fila fora da publicação"""
+
+    def add_post(self, slug, body, category=None, tag=None):
+        post = BlogPage(title=slug, slug=slug, date=datetime.date(2024, 1, 1), body=body)
+        self.blog_index.add_child(instance=post)
+        if category:
+            post.categories.add(category)
+        if tag:
+            BlogPageTag.objects.create(content_object=post, tag=tag)
+        post.save_revision().publish()
+        return post
+
+    def test_scoring(self):
+        ads = self.add_post('ads', '<p>Campanhas de anúncios pagos no Google Ads</p>', self.category, self.tag)
+        ads2 = self.add_post('ads-2', '<p>Anúncios pagos: otimize campanhas no Google</p>', self.category, self.tag)
+        other = BlogCategory.objects.create(name="Vendas", slug="vendas")
+        sales = self.add_post('vendas', '<p>Treinamento comercial da equipe</p>', other)
+
+        index = RelatedIndex()
+        self.assertGreater(index.score(ads.pk, ads2.pk), index.score(ads.pk, sales.pk))
+        self.assertEqual(index.score(ads.pk, ads2.pk), index.score(ads2.pk, ads.pk))
+        self.assertEqual(index.score(ads.pk, sales.pk), 0)
+        # Sem o próprio post e sem vizinhos de similaridade zero
+        self.assertEqual([pk for pk, _ in index.neighbours(ads.pk)], [ads2.pk])
+
+    def test_publish_only_enqueues(self):
+        a = self.add_post('a', '<p>SEO técnico para blogs</p>', self.category)
+        b = self.add_post('b', '<p>SEO técnico e conteúdo</p>', self.category)
+        self.assertEqual(set(RelatedPostQueue.objects.values_list('post_id', flat=True)), {a.pk, b.pk})
+        self.assertFalse(RelatedPost.objects.exists())
+
+        call_command('update_related_posts', once=True, stdout=mock.MagicMock())
+        self.assertFalse(RelatedPostQueue.objects.exists())
+        self.assertEqual(
+            set(RelatedPost.objects.values_list('source_id', 'target_id')),
+            {(a.pk, b.pk), (b.pk, a.pk)},
+        )
+
+        b.unpublish()
+        call_command('update_related_posts', once=True, stdout=mock.MagicMock())
+        self.assertFalse(RelatedPost.objects.exists())
+
+    def test_rebuild_command(self):
+        self.add_posts(3)
+        call_command('rebuild_related_posts', batch_size=2, stdout=mock.MagicMock())
+        self.assertEqual(RelatedPost.objects.count(), 6)
+        self.assertFalse(RelatedPostQueue.objects.exists())
+
+
+class BlogFeedTests(BlogFixtureMixin, WagtailPageTestCase):
+    """Feeds RSS/Atom servidos do cache com ETag, Last-Modified e 304"""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_posts(3)
+
+    def test_rss_and_atom(self):
+        response = self.client.get('/blog/feed/rss/')
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        for n in range(1, 4):
+            self.assertContains(response, f'<title>Post {n}</title>')
+        self.assertContains(response, '<category>SEO</category>', count=3)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/blog/feed/atom/')
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, '<entry>', count=3)
+        self.assertEqual(self.client.get('/blog/feed/json/').status_code, 404)
+
+    def test_category_and_tag_feeds(self):
+        self.assertContains(self.client.get('/blog/categorias/seo/feed/rss/'), '<item>', count=3)
+        self.assertContains(self.client.get('/blog/tags/google/feed/atom/'), '<entry>', count=3)
+        self.assertEqual(self.client.get('/blog/categorias/outra/feed/rss/').status_code, 404)
+
+    def test_conditional_get_and_invalidation(self):
+        first = self.client.get('/blog/feed/rss/')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/blog/feed/rss/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        not_modified = self.client.get('/blog/feed/rss/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_posts(1)
+        response = self.client.get('/blog/feed/rss/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<title>Post 4</title>')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+
+class BlogContentTests(BlogFixtureMixin, WagtailPageTestCase):
+    """Conteúdo normalizado no save e servido sem reprocessar"""
+
+    def add_post(self, body, intro=''):
+        post = BlogPage(title="Post", slug="post", date=datetime.date(2024, 1, 1), intro=intro, body=body)
+        self.blog_index.add_child(instance=post)
+        post.save_revision().publish()
+        return BlogPage.objects.get(pk=post.pk)
+
+    def test_normalized_on_save(self):
+        words = ' '.join(['palavra'] * 450)
+        post = self.add_post(f'Texto com \\"aspas\\"\n\n\n\n{words}', intro='Resumo do post')
+        self.assertEqual(post.body_html, f'<p>Texto com "aspas"</p><p>{words}</p>')
+        self.assertEqual(post.intro_html, '<p>Resumo do post</p>')
+        self.assertTrue(post.body_text.startswith('Texto com "aspas" palavra'))
+        self.assertEqual(post.excerpt, 'Resumo do post')
+        self.assertEqual(post.reading_time, 2)
+
+        post.intro = ''
+        post.save(update_fields=['intro'])
+        post.refresh_from_db()
+        self.assertEqual(post.intro_html, '')
+        self.assertEqual(post.excerpt, ' '.join(['Texto', 'com', '"aspas"'] + ['palavra'] * 27) + '…')
+
+    def test_render_uses_stored_html(self):
+        target = self.add_post('Destino')
+        target.slug = 'destino'
+        target.save()
+        post = BlogPage(
+            title="Com link", slug="com-link", date=datetime.date(2024, 1, 2), intro="Intro",
+            body=f'<p>Veja <a linktype="page" id="{target.pk}">o outro post</a></p>',
+        )
+        self.blog_index.add_child(instance=post)
+        post.save_revision().publish()
+
+        with mock.patch('blog.content.normalize_html', side_effect=AssertionError):
+            response = self.client.get(post.url)
+        self.assertContains(response, f'<a href="{target.url}">o outro post</a>', html=True)
+
+    def test_backfill_command(self):
+        post = self.add_post('Linha 1\nLinha 2', intro='Intro')
+        BlogPage.objects.filter(pk=post.pk).update(**{field: '' for field in CONTENT_FIELDS if field != 'reading_time'})
+
+        # Antes do backfill o template normaliza na hora
+        self.assertContains(self.client.get(post.url), '<p>Linha 1<br>Linha 2</p>', html=True)
+
+        call_command('normalize_blog_content', batch_size=1, stdout=mock.MagicMock())
+        post.refresh_from_db()
+        self.assertEqual(post.body_html, '<p>Linha 1<br>Linha 2</p>')
+        self.assertEqual(post.body_text, 'Linha 1 Linha 2')
+        self.assertEqual(post.excerpt, 'Intro')
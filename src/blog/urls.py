@@ -5,8 +5,11 @@ app_name = 'blog'
 
 urlpatterns = [
     path('', views.blog_index, name='blog_index'),
+    path('feed/<slug:kind>/', views.blog_feed, name='blog_feed'),
     path('categorias/<slug:slug>/', views.blog_category, name='blog_category'),
+    path('categorias/<slug:slug>/feed/<slug:kind>/', views.blog_feed, {'scope': 'category'}, name='blog_category_feed'),
     path('tags/<slug:slug>/', views.blog_tag, name='blog_tag'),
+    path('tags/<slug:slug>/feed/<slug:kind>/', views.blog_feed, {'scope': 'tag'}, name='blog_tag_feed'),
     path('<slug:slug>/', views.blog_post, name='blog_post'),
     path('api/', include('blog.api_urls')),
 ]
@@ -1,40 +1,64 @@
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 from django.core.paginator import Paginator
 from wagtail.models import Page
 from taggit.models import Tag as TaggitTag
+from common.profiling import query_budget
+from .feeds import feed_response
+from .listing import encode_cursor, listing_queryset, render_post_cards
 from .models import BlogPage, BlogIndexPage, BlogCategory
 
 
+def load_more_data(page_obj, category='', tag=''):
+    """Estado inicial do blog-load-more.js: cursor a partir do último post da página"""
+    has_next = page_obj.has_next()
+    return {
+        'current_page': page_obj.number,
+        'next_cursor': encode_cursor(page_obj[len(page_obj) - 1]) if has_next else None,
+        'has_next': has_next,
+        'total_posts': page_obj.paginator.count,
+        'category': category,
+        'tag': tag,
+    }
+
+
+def listing_context(request, posts, category='', tag=''):
+    """Página atual (12 posts), cards renderizados e estado do carregar mais"""
+    paginator = Paginator(posts.order_by('-date', '-pk'), 12)  # 12 posts por página
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return {
+        'page_obj': page_obj,
+        'blogpages': page_obj,  # Para compatibilidade com o template
+        'posts_html': render_post_cards(list(page_obj), request),
+        'categories': BlogCategory.objects.all().order_by('name'),
+        'popular_tags': TaggitTag.objects.all()[:10],
+        'blog_data': load_more_data(page_obj, category=category, tag=tag),
+    }
+
+
+@query_budget(queries=20, duplicates=2)
 def blog_index(request):
     """
     View para listar todos os posts do blog
     """
     blog_index = BlogIndexPage.objects.first()
     if not blog_index:
-        return render(request, 'blog/blog_index.html', {'blogpages': []})
-    
-    posts = BlogPage.objects.live().order_by('-date')
+        return render(request, 'blog/blog_index.html', {
+            'blogpages': [], 'posts_html': render_post_cards([], request),
+        })
     
-    # Paginação
-    paginator = Paginator(posts, 12)  # 12 posts por página (grid 3x4)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Categorias para o filtro
-    categories = BlogCategory.objects.all().order_by('name')
-    popular_tags = TaggitTag.objects.all()[:10]
+    # Relacionamentos dos cards só para os que não estão em cache
+    posts = listing_queryset(prefetch=False)
     
     context = {
         'blog_index': blog_index,
-        'page_obj': page_obj,
-        'blogpages': page_obj,  # Para compatibilidade com o template
-        'categories': categories,
-        'popular_tags': popular_tags,
+        **listing_context(request, posts),
     }
     
     return render(request, 'blog/blog_index.html', context)
 
 
+@query_budget(queries=20, duplicates=2)
 def blog_category(request, slug):
     """
     Lista posts por categoria em rota SEO: /categorias/<slug>/
@@ -44,26 +68,17 @@ def blog_category(request, slug):
     except BlogCategory.DoesNotExist:
         category = None
 
-    posts = BlogPage.objects.live().filter(categories__slug=slug).order_by('-date')
-
-    paginator = Paginator(posts, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    categories = BlogCategory.objects.all().order_by('name')
-    popular_tags = TaggitTag.objects.all()[:10]
+    posts = listing_queryset(category=slug, prefetch=False)
 
     context = {
         'blog_index': BlogIndexPage.objects.first(),
-        'page_obj': page_obj,
-        'blogpages': page_obj,
-        'categories': categories,
-        'popular_tags': popular_tags,
         'current_category': category,
+        **listing_context(request, posts, category=slug),
     }
     return render(request, 'blog/blog_index.html', context)
 
 
+@query_budget(queries=20, duplicates=2)
 def blog_tag(request, slug):
     """
     Lista posts por tag em rota SEO: /tags/<slug>/
@@ -73,26 +88,17 @@ def blog_tag(request, slug):
     except TaggitTag.DoesNotExist:
         tag = None
 
-    posts = BlogPage.objects.live().filter(tags__slug=slug).order_by('-date')
-
-    paginator = Paginator(posts, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    categories = BlogCategory.objects.all().order_by('name')
-    popular_tags = TaggitTag.objects.all()[:10]
+    posts = listing_queryset(tag=slug, prefetch=False)
 
     context = {
         'blog_index': BlogIndexPage.objects.first(),
-        'page_obj': page_obj,
-        'blogpages': page_obj,
-        'categories': categories,
-        'popular_tags': popular_tags,
         'current_tag': tag,
+        **listing_context(request, posts, tag=slug),
     }
     return render(request, 'blog/blog_index.html', context)
 
 
+@query_budget(queries=30, duplicates=6)
 def blog_post(request, slug):
     """
     View para exibir um post individual do blog
@@ -105,3 +111,12 @@ def blog_post(request, slug):
         return render(request, 'blog/blog_post.html', context)
     except BlogPage.DoesNotExist:
         return render(request, '404.html', status=404)
+
+
+@require_GET
+def blog_feed(request, kind, scope=None, slug=None):
+    """
+    Feed RSS/Atom dos posts: /blog/feed/rss/, /blog/categorias/<slug>/feed/atom/...
+    Servido do cache com ETag/Last-Modified (ver blog.feeds).
+    """
+    return feed_response(request, kind, scope, slug)
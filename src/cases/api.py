@@ -0,0 +1,170 @@
+"""
+Utilitários da API JSON de cases.
+
+- Queryset com imagens (select_related) e renditions (prefetch) em lote
+- Paginação por cursor (keyset) na ordem de exibição (order, -created_at, -id)
+- Payload JSON em cache, versionado e invalidado ao salvar um Case
+"""
+import base64
+import datetime
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+from wagtail.images import get_image_model
+
+from common.renditions import specs_for
+
+CARD_IMAGE_SPECS = tuple(specs_for('case_cards'))
+DETAIL_IMAGE_SPECS = tuple(specs_for('case_heroes'))
+LOGO_SPEC = 'max-80x80'
+
+PAGE_SIZE = 12
+MAX_PAGE_SIZE = 48
+
+API_VERSION_KEY = 'cases:api:version'
+API_CACHE_TIMEOUT = 60 * 60  # 1 hora
+
+
+def api_queryset(image_specs=CARD_IMAGE_SPECS):
+    """Cases publicados com imagens e renditions carregadas em lote"""
+    from .models import Case
+
+    renditions = get_image_model().get_rendition_model().objects.filter(
+        filter_spec__in=(*image_specs, LOGO_SPEC)
+    )
+    return (
+        Case.objects.filter(is_published=True)
+        .select_related('hero_image', 'client_logo')
+        .prefetch_related(
+            Prefetch('hero_image__renditions', queryset=renditions),
+            Prefetch('client_logo__renditions', queryset=renditions),
+        )
+    )
+
+
+def responsive_image(image, specs):
+    """
+    URLs de renditions de uma imagem agrupadas por formato, no mesmo
+    formato do {% picture %}: srcset por formato e um fallback em src.
+    """
+    if not image:
+        return None
+
+    renditions = image.get_renditions(*specs)
+    by_format = {}
+    for spec in specs:
+        first = spec.split('|')[0]
+        fmt = first[len('format-'):] if first.startswith('format-') else 'original'
+        by_format.setdefault(fmt, []).append(renditions[spec])
+
+    # Fallback: menor rendition do último formato (jpeg nos filtros registrados)
+    fallback = min(list(by_format.values())[-1], key=lambda rendition: rendition.width)
+    return {
+        'src': fallback.url,
+        'width': fallback.width,
+        'height': fallback.height,
+        'srcset': {
+            fmt: ', '.join(f"{r.url} {r.width}w" for r in items)
+            for fmt, items in by_format.items()
+        },
+    }
+
+
+def logo_image(image):
+    if not image:
+        return None
+    rendition = image.get_rendition(LOGO_SPEC)
+    return {'src': rendition.url, 'width': rendition.width, 'height': rendition.height}
+
+
+def case_card_data(case):
+    return {
+        'id': case.id,
+        'title': case.title,
+        'client_name': case.client_name,
+        'slug': case.slug,
+        'category': case.get_category_display(),
+        'short_description': case.short_description,
+        'main_metric_value': case.main_metric_value,
+        'main_metric_description': case.main_metric_description,
+        'hero_image': responsive_image(case.hero_image, CARD_IMAGE_SPECS),
+        'client_logo': logo_image(case.client_logo),
+        'is_featured': case.is_featured,
+        'created_at': case.created_at.strftime('%d/%m/%Y'),
+    }
+
+
+def case_detail_data(case):
+    data = case_card_data(case)
+    data.update({
+        'challenge': case.challenge,
+        'solution': case.solution,
+        'results': case.results,
+        'hero_image': responsive_image(case.hero_image, DETAIL_IMAGE_SPECS),
+        'updated_at': case.updated_at.strftime('%d/%m/%Y'),
+    })
+    return data
+
+
+def encode_cursor(case):
+    """Gera um cursor opaco a partir da posição (order, created_at, id)"""
+    raw = f"{case.order}:{case.created_at.isoformat()}:{case.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Converte o cursor de volta para (order, created_at, id).
+    Levanta ValueError se o cursor for inválido.
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        order, rest = raw.split(':', 1)
+        created_at, pk = rest.rsplit(':', 1)
+        return int(order), datetime.datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE):
+    """
+    Retorna (cases, next_cursor) na ordem de exibição (order, -created_at, -id),
+    buscando page_size + 1 linhas em vez de COUNT/OFFSET.
+    """
+    queryset = queryset.order_by('order', '-created_at', '-id')
+    if cursor:
+        order, created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(order__gt=order)
+            | Q(order=order, created_at__lt=created_at)
+            | Q(order=order, created_at=created_at, id__lt=pk)
+        )
+
+    cases = list(queryset[:page_size + 1])
+    has_next = len(cases) > page_size
+    cases = cases[:page_size]
+    next_cursor = encode_cursor(cases[-1]) if has_next else None
+    return cases, next_cursor
+
+
+def cache_key(*parts):
+    version = cache.get(API_VERSION_KEY) or 0
+    return ':'.join(['cases:api', str(version), *(str(part) for part in parts)])
+
+
+def cached_payload(key, build):
+    """Retorna o JSON já serializado do cache ou o monta com build()"""
+    payload = cache.get(key)
+    if payload is None:
+        payload = json.dumps(build(), cls=DjangoJSONEncoder)
+        cache.set(key, payload, API_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_api_cache():
+    """Troca a versão do cache, descartando todas as páginas e detalhes"""
+    cache.set(API_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'cases_api'
+
+urlpatterns = [
+    path('', views.case_list_api, name='case_list'),
+    path('<slug:slug>/', views.case_detail_api, name='case_detail'),
+]
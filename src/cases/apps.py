@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class CasesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cases'
-    verbose_name = "Cases de Sucesso"
\ No newline at end of file
+    verbose_name = "Cases de Sucesso"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0001_initial'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='casedetailpage',
+            name='case',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='cases.case', verbose_name='Case'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['is_published', 'order', '-created_at', '-id'], name='cases_case_pub_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['is_published', 'category', 'order', '-created_at', '-id'], name='cases_case_pub_cat_order_idx'),
+        ),
+    ]
@@ -11,6 +11,7 @@ from wagtail.blocks import (
 from wagtail.images.blocks import ImageChooserBlock
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
+from common.profiling import QueryBudget
 
 
 class CaseMetrics(StructBlock):
@@ -190,6 +191,17 @@ class Case(ClusterableModel):
         verbose_name = "Case de Sucesso"
         verbose_name_plural = "Cases de Sucesso"
         ordering = ['order', '-created_at']
+        indexes = [
+            # Listagem da API por cursor, com e sem filtro de categoria
+            models.Index(
+                fields=['is_published', 'order', '-created_at', '-id'],
+                name='cases_case_pub_order_idx',
+            ),
+            models.Index(
+                fields=['is_published', 'category', 'order', '-created_at', '-id'],
+                name='cases_case_pub_cat_order_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.client_name}"
@@ -202,6 +214,8 @@ class CaseIndexPage(Page):
     """
     Página índice de cases (Cases)
     """
+    query_budget = QueryBudget(queries=30, duplicates=8)
+
     # Hero Section
     hero_title = models.CharField(
         max_length=200,
@@ -288,6 +302,8 @@ class CaseDetailPage(Page):
     """
     Página de detalhes de um case específico
     """
+    query_budget = QueryBudget(queries=30, duplicates=8)
+
     case = models.ForeignKey(
         Case,
         on_delete=models.PROTECT,
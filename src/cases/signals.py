@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+
+from .api import invalidate_api_cache
+from .models import Case
+
+
+def invalidate_case_api(sender, **kwargs):
+    """Qualquer alteração em um case descarta o cache da API"""
+    invalidate_api_cache()
+
+
+post_save.connect(invalidate_case_api, sender=Case)
+post_delete.connect(invalidate_case_api, sender=Case)
@@ -1,3 +1,103 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+
+from .api import CARD_IMAGE_SPECS, LOGO_SPEC
+from .models import Case
+
+
+class CaseApiTests(TestCase):
+    """API de cases: consultas constantes, paginação por cursor e cache versionado"""
+
+    def setUp(self):
+        cache.clear()
+        self.image = Image.objects.create(title="Hero", file=get_test_image_file())
+        self.image.get_renditions(*CARD_IMAGE_SPECS, LOGO_SPEC)
+        self.case_count = 0
+
+    def add_cases(self, total, **kwargs):
+        for _ in range(total):
+            self.case_count += 1
+            Case.objects.create(
+                title=f"Case {self.case_count}",
+                slug=f"case-{self.case_count}",
+                client_name="Cliente",
+                category=kwargs.get('category', 'ecommerce'),
+                short_description="Resumo",
+                challenge="<p>Desafio</p>",
+                solution="<p>Solução</p>",
+                results="<p>Resultados</p>",
+                main_metric_value="+300%",
+                main_metric_description="Vendas",
+                hero_image=self.image,
+                client_logo=self.image,
+                order=kwargs.get('order', 0),
+            )
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_json(url)
+        return len(queries)
+
+    def test_list_constant_queries(self):
+        self.add_cases(2)
+        small = self.count_queries('/api/cases/')
+        self.add_cases(8)
+        self.assertEqual(small, self.count_queries('/api/cases/'))
+
+    def test_list_returns_rendition_urls(self):
+        self.add_cases(1)
+        case = self.get_json('/api/cases/')['cases'][0]
+        self.assertEqual(set(case['hero_image']['srcset']), {'avif', 'webp', 'jpeg'})
+        self.assertIn('.fill-400x250', case['hero_image']['src'])
+        self.assertIn('.max-80x80', case['client_logo']['src'])
+        self.assertNotIn('original_images', json.dumps(case))
+
+    def test_cursor_pagination_walks_all_cases(self):
+        self.add_cases(3, order=1)
+        self.add_cases(4, order=0)
+        self.add_cases(2, category='saude')
+
+        seen = []
+        cursor = ''
+        while True:
+            data = self.get_json(f'/api/cases/?limit=4&cursor={cursor}')
+            seen.extend(case['slug'] for case in data['cases'])
+            if not data['has_next']:
+                break
+            cursor = data['next_cursor']
+
+        expected = list(
+            Case.objects.order_by('order', '-created_at', '-id').values_list('slug', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+        saude = self.get_json('/api/cases/?category=saude')['cases']
+        self.assertEqual(len(saude), 2)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/cases/?cursor=xxx').status_code, 400)
+        self.assertEqual(self.client.get('/api/cases/?category=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/cases/inexistente/').status_code, 404)
+
+    def test_cache_invalidated_on_case_save(self):
+        self.add_cases(1)
+        self.get_json('/api/cases/case-1/')
+        with self.assertNumQueries(0):
+            self.get_json('/api/cases/case-1/')
 
-# Create your tests here.
+        case = Case.objects.get(slug='case-1')
+        case.title = "Novo título"
+        case.save()
+        self.assertEqual(self.get_json('/api/cases/case-1/')['case']['title'], "Novo título")
@@ -1,70 +1,73 @@
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from .models import Case, CaseIndexPage, CaseDetailPage
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from .api import (
+    DETAIL_IMAGE_SPECS, MAX_PAGE_SIZE, PAGE_SIZE, api_queryset, cache_key,
+    cached_payload, case_card_data, case_detail_data, keyset_page,
+)
+from .models import Case
 
 
+def json_payload(payload):
+    return HttpResponse(payload, content_type='application/json')
+
+
+@require_GET
 def case_list_api(request):
-    """API para listar cases (para AJAX/filtros)"""
-    category = request.GET.get('category')
-    cases = Case.objects.filter(is_published=True)
-    
-    if category:
-        cases = cases.filter(category=category)
-    
-    cases_data = []
-    for case in cases:
-        cases_data.append({
-            'id': case.id,
-            'title': case.title,
-            'client_name': case.client_name,
-            'slug': case.slug,
-            'category': case.get_category_display(),
-            'short_description': case.short_description,
-            'main_metric_value': case.main_metric_value,
-            'main_metric_description': case.main_metric_description,
-            'hero_image_url': case.hero_image.file.url if case.hero_image else None,
-            'client_logo_url': case.client_logo.file.url if case.client_logo else None,
-            'is_featured': case.is_featured,
-            'created_at': case.created_at.strftime('%d/%m/%Y'),
-        })
-    
-    return JsonResponse({
-        'cases': cases_data,
-        'total': len(cases_data)
-    })
+    """API para listar cases (para AJAX/filtros), paginada por cursor"""
+    category = request.GET.get('category', '')
+    cursor = request.GET.get('cursor', '')
 
+    if category and category not in dict(Case.CATEGORY_CHOICES):
+        return JsonResponse({
+            'success': False,
+            'error': 'Categoria inválida'
+        }, status=400)
 
-def case_detail_api(request, slug):
-    """API para detalhes de um case específico"""
     try:
-        case = get_object_or_404(Case, slug=slug, is_published=True)
-        
-        case_data = {
-            'id': case.id,
-            'title': case.title,
-            'client_name': case.client_name,
-            'slug': case.slug,
-            'category': case.get_category_display(),
-            'short_description': case.short_description,
-            'challenge': case.challenge,
-            'solution': case.solution,
-            'results': case.results,
-            'main_metric_value': case.main_metric_value,
-            'main_metric_description': case.main_metric_description,
-            'hero_image_url': case.hero_image.file.url if case.hero_image else None,
-            'client_logo_url': case.client_logo.file.url if case.client_logo else None,
-            'is_featured': case.is_featured,
-            'created_at': case.created_at.strftime('%d/%m/%Y'),
-            'updated_at': case.updated_at.strftime('%d/%m/%Y'),
+        limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = PAGE_SIZE
+
+    def build():
+        cases = api_queryset()
+        if category:
+            cases = cases.filter(category=category)
+        page_cases, next_cursor = keyset_page(cases, cursor, page_size=limit)
+        return {
+            'success': True,
+            'cases': [case_card_data(case) for case in page_cases],
+            'total': len(page_cases),
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor,
         }
-        
+
+    try:
+        payload = cached_payload(cache_key('list', category, limit, cursor), build)
+    except ValueError as e:
         return JsonResponse({
-            'case': case_data,
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    return json_payload(payload)
+
+
+@require_GET
+def case_detail_api(request, slug):
+    """API para detalhes de um case específico"""
+    def build():
+        case = api_queryset(DETAIL_IMAGE_SPECS).get(slug=slug)
+        return {
+            'case': case_detail_data(case),
             'success': True
-        })
-        
-    except Exception as e:
+        }
+
+    try:
+        payload = cached_payload(cache_key('detail', slug), build)
+    except Case.DoesNotExist:
         return JsonResponse({
-            'error': str(e),
+            'error': 'Case não encontrado',
             'success': False
-        }, status=404)
\ No newline at end of file
+        }, status=404)
+
+    return json_payload(payload)
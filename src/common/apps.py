@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'common'
+    verbose_name = 'Utilitários Comuns'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .profiling import install
+
+        install()
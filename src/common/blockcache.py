@@ -0,0 +1,223 @@
+"""
+Cache de renderização por bloco de StreamField.
+
+A tag {% blockcache block %}...{% endblockcache %} (common.templatetags.
+block_cache) guarda o HTML de um bloco com chave formada por:
+
+- página (pk) e revisão publicada (live_revision_id): publicar a página
+  troca a chave de todos os blocos dela;
+- id do bloco e posição da tag no template (o mesmo bloco pode ser
+  renderizado em mais de um lugar);
+- versão de cada modelo referenciado pelo bloco: imagens, documentos,
+  snippets e páginas dos ChooserBlocks e do rich text (descobertos na
+  definição do bloco) e os modelos declarados em `Meta.cache_depends_on`,
+  para blocos que leem do contexto (ex.: as seções de soluções da home).
+  Salvar ou apagar um objeto desses modelos troca a versão (time.time_ns,
+  como nos snapshots; ver common.signals); a das páginas só muda quando
+  uma página entra ou sai do ar, troca o título publicado, o slug ou a
+  posição na árvore, não a cada publicação;
+- valores extras passados à tag ({% blockcache block request.LANGUAGE_CODE %}).
+
+Contexto específico da requisição nunca vem do cache: pré-visualização
+(request.is_preview ou `block_cache` falso no contexto), página sem revisão
+publicada e blocos com `Meta.render_cache = False` são renderizados na hora.
+
+Métricas: acertos, faltas e bypass por tipo de bloco são contados no
+processo e somados no cache a cada FLUSH_EVERY eventos, para que o
+`manage.py block_cache` mostre a taxa de acerto de todos os workers.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+from wagtail import blocks
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.fields import StreamField
+from wagtail.models import Page
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 60 * 60 * 24,  # 24 horas; a chave já muda com revisão e versões
+    'FLUSH_EVERY': 100,       # eventos de métrica acumulados antes de somar no cache
+}
+
+KEY_PREFIX = 'blockcache'
+GLOBAL_VERSION_KEY = f'{KEY_PREFIX}:version'
+STATS_TYPES_KEY = f'{KEY_PREFIX}:stats:types'
+OUTCOMES = ('hit', 'miss', 'bypass')
+PAGE_LABEL = 'wagtailcore.page'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def block_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'BLOCK_CACHE', {})}
+
+
+def version_key(label):
+    return f'{KEY_PREFIX}:version:{label}'
+
+
+def bump_version(label=None):
+    """Troca a versão de um modelo (ou a global, que invalida todos os blocos)"""
+    cache.set(version_key(label) if label else GLOBAL_VERSION_KEY, time.time_ns(), None)
+
+
+def block_dependencies(block_def):
+    """Modelos (label em minúsculas) cujas alterações mudam o HTML do bloco"""
+    cached = getattr(block_def, '_cache_dependencies', None)
+    if cached is not None:
+        return cached
+
+    labels = set()
+    pending = [block_def]
+    while pending:
+        current = pending.pop()
+        labels.update(label.lower() for label in getattr(current.meta, 'cache_depends_on', ()))
+        if isinstance(current, blocks.ChooserBlock):
+            model = current.target_model
+            labels.add(PAGE_LABEL if issubclass(model, Page) else model._meta.label_lower)
+        elif isinstance(current, blocks.RichTextBlock):
+            # Links internos e imagens embutidas são expandidos na renderização
+            labels.update((PAGE_LABEL, get_image_model()._meta.label_lower, get_document_model()._meta.label_lower))
+        elif isinstance(current, blocks.ListBlock):
+            pending.append(current.child_block)
+        elif hasattr(current, 'child_blocks'):
+            pending.extend(current.child_blocks.values())
+
+    block_def._cache_dependencies = tuple(sorted(labels))
+    return block_def._cache_dependencies
+
+
+@lru_cache(maxsize=None)
+def tracked_labels():
+    """Modelos (além das páginas) referenciados por algum StreamField do projeto"""
+    labels = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, StreamField):
+                labels.update(block_dependencies(field.stream_block))
+    labels.discard(PAGE_LABEL)
+    return frozenset(labels)
+
+
+def bypass_reason(context, block):
+    """Motivo para não usar o cache neste contexto, ou None"""
+    if not block_cache_settings()['ENABLED']:
+        return 'disabled'
+    if context.get('block_cache') is False:
+        return 'preview'
+    request = context.get('request')
+    if getattr(request, 'is_preview', False):
+        return 'preview'
+    page = context.get('page')
+    if page is None or not page.pk or not page.live_revision_id:
+        return 'no-revision'
+    if not getattr(block.block.meta, 'render_cache', True):
+        return 'block'
+    return None
+
+
+def fragment_key(context, block, fragment, vary_on):
+    """Chave do HTML do bloco, com as versões atuais das dependências"""
+    page = context['page']
+    dependencies = block_dependencies(block.block)
+    version_keys = [GLOBAL_VERSION_KEY] + [version_key(label) for label in dependencies]
+    versions = cache.get_many(version_keys)
+    stamp = ':'.join(str(versions.get(key, 0)) for key in version_keys)
+    extra = ':'.join(str(value) for value in vary_on)
+    digest = hashlib.md5(f'{fragment}|{stamp}|{extra}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{page.pk}:{page.live_revision_id}:{block.id}:{digest}'
+
+
+def block_type_name(block):
+    return type(block.block).__name__
+
+
+def render_block(context, block, fragment, vary_on, render):
+    """HTML do bloco a partir do cache; `render()` monta o HTML em caso de falta"""
+    reason = bypass_reason(context, block) if block.id else 'no-id'
+    if reason is not None:
+        record(block_type_name(block), 'bypass')
+        return render()
+
+    key = fragment_key(context, block, fragment, vary_on)
+    html = cache.get(key)
+    if html is not None:
+        record(block_type_name(block), 'hit')
+        return mark_safe(html)
+
+    record(block_type_name(block), 'miss')
+    html = render()
+    cache.set(key, str(html), block_cache_settings()['TIMEOUT'])
+    return html
+
+
+def stats_key(block_type, outcome):
+    return f'{KEY_PREFIX}:stats:{block_type}:{outcome}'
+
+
+def record(block_type, outcome):
+    with _stats_lock:
+        _stats[(block_type, outcome)] += 1
+        pending = sum(_stats.values())
+    if pending >= block_cache_settings()['FLUSH_EVERY']:
+        flush_stats()
+
+
+def flush_stats():
+    """Soma os contadores do processo no cache (compartilhado entre workers)"""
+    with _stats_lock:
+        pending = dict(_stats)
+        _stats.clear()
+    if not pending:
+        return
+
+    types = set(cache.get(STATS_TYPES_KEY) or ())
+    for (block_type, outcome), count in pending.items():
+        key = stats_key(block_type, outcome)
+        # add + incr não perde contagens de outro worker entre o get e o set
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            # Backend sem persistência (DummyCache) ou chave expulsa do cache
+            logger.debug(f"Métrica do cache de blocos descartada: {key}")
+        types.add(block_type)
+    cache.set(STATS_TYPES_KEY, sorted(types), None)
+
+
+def get_stats():
+    """{tipo de bloco: {'hit', 'miss', 'bypass', 'ratio'}} somando todos os workers"""
+    flush_stats()
+    types = cache.get(STATS_TYPES_KEY) or []
+    keys = {stats_key(block_type, outcome): (block_type, outcome) for block_type in types for outcome in OUTCOMES}
+    values = cache.get_many(list(keys))
+
+    stats = {}
+    for key, (block_type, outcome) in keys.items():
+        stats.setdefault(block_type, dict.fromkeys(OUTCOMES, 0))[outcome] = values.get(key, 0)
+    for counts in stats.values():
+        lookups = counts['hit'] + counts['miss']
+        counts['ratio'] = counts['hit'] / lookups if lookups else None
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+    types = cache.get(STATS_TYPES_KEY) or []
+    cache.delete_many([stats_key(block_type, outcome) for block_type in types for outcome in OUTCOMES])
+    cache.delete(STATS_TYPES_KEY)
+
@@ -0,0 +1,146 @@
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Corpo padrão: o formulário de contato AJAX (grava no banco e responde JSON)
+DEFAULT_PAYLOAD = {
+    'name': "Benchmark", 'email': "benchmark@example.com", 'phone': "51999999999",
+    'message': "Mensagem de benchmark", 'faturamento': "ate-50k", 'area': "servicos",
+}
+
+
+def process_tree_rss(pid):
+    """RSS (KiB) do processo e de todos os descendentes, lido de /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara requisições concorrentes contra um servidor em execução (gunicorn sync "
+        "ou workers uvicorn) e mede requisições/segundo, latência e memória dos workers. "
+        "Ver docs/ASGI.md."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='URL alvo, ex.: http://127.0.0.1:8005/contato/ajax/')
+        parser.add_argument('--concurrency', type=int, default=50, help='Conexões simultâneas')
+        parser.add_argument('--requests', type=int, default=2000, help='Total de requisições')
+        parser.add_argument('--method', default='POST')
+        parser.add_argument('--data', help='Corpo JSON (padrão: formulário de contato)')
+        parser.add_argument('--pid', type=int, help='PID do master do servidor, para medir a memória')
+        parser.add_argument('--label', default='', help='Nome do cenário na saída')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError("URL inválida")
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        method = options['method'].upper()
+        body = None
+        headers = {}
+        if method in ('POST', 'PUT', 'PATCH'):
+            body = (options['data'] or json.dumps(DEFAULT_PAYLOAD)).encode()
+            headers['Content-Type'] = 'application/json'
+
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        remaining = [options['requests']]
+        lock = threading.Lock()
+        latencies = []
+        errors = [0]
+        peak_rss = [0]
+        done = threading.Event()
+
+        def take():
+            with lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def worker():
+            connection = connection_class(url.hostname, url.port, timeout=60)
+            while take():
+                start = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 500
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = connection_class(url.hostname, url.port, timeout=60)
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors[0] += 1
+            connection.close()
+
+        def sample_memory():
+            while not done.wait(0.2):
+                peak_rss[0] = max(peak_rss[0], process_tree_rss(options['pid']))
+
+        sampler = None
+        if options['pid']:
+            peak_rss[0] = process_tree_rss(options['pid'])
+            sampler = threading.Thread(target=sample_memory, daemon=True)
+            sampler.start()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        done.set()
+        if sampler is not None:
+            sampler.join()
+
+        label = options['label'] or f"{method} {path}"
+        if not latencies:
+            raise CommandError(f"{label}: nenhuma requisição bem-sucedida ({errors[0]} erros)")
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        line = (
+            f"{label}: {len(latencies) / duration:8.1f} req/s | "
+            f"p50 {quantiles[49] * 1000:6.1f} ms | p95 {quantiles[94] * 1000:6.1f} ms | "
+            f"p99 {quantiles[98] * 1000:6.1f} ms | erros {errors[0]}"
+        )
+        if options['pid']:
+            line += f" | RSS pico {peak_rss[0] / 1024:.0f} MiB"
+        self.stdout.write(self.style.SUCCESS(line))
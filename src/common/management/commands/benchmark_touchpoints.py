@@ -0,0 +1,78 @@
+import datetime
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from common.touchpoints import FUNNELS, TouchpointBuffer, make_row
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede eventos/segundo da ingestão de touchpoints por worker: INSERT por evento "
+        "versus buffer com bulk_create (com e sem spool). Tudo é desfeito ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000, help='Total de eventos por cenário')
+        parser.add_argument('--batch', type=int, default=20, help='Eventos por requisição simulada')
+        parser.add_argument('--flush-size', type=int, default=200, help='Tamanho do flush do buffer')
+
+    def handle(self, *args, **options):
+        from franchise.models import FranchiseApplication, FranchiseTouchpoint
+
+        total = options['events']
+        batch = options['batch']
+
+        with transaction.atomic():
+            application = FranchiseApplication.objects.create(
+                full_name="Benchmark",
+                email="benchmark@example.com",
+                birth_date=datetime.date(1990, 1, 1),
+                experience_years=0,
+                expected_start_date=datetime.date.today(),
+            )
+
+            def single_inserts():
+                for i in range(total):
+                    FranchiseTouchpoint.objects.create(
+                        application=application, event_type='page_view', event_data={'i': i},
+                    )
+
+            def buffered(spool_dir):
+                model_label, parent_field = FUNNELS['franchise']
+                buffer = TouchpointBuffer(
+                    'benchmark', model_label, parent_field,
+                    max_events=max(total, options['flush_size']) * 2,
+                    flush_size=options['flush_size'],
+                    flush_interval=0,
+                    spool_dir=spool_dir,
+                )
+                for start in range(0, total, batch):
+                    buffer.add([
+                        make_row('franchise', application.pk, 'page_view', {'i': i})
+                        for i in range(start, min(start + batch, total))
+                    ])
+                buffer.close()
+
+            scenarios = [('INSERT por evento', single_inserts)]
+            scenarios.append(('Buffer em memória', lambda: buffered(None)))
+            with tempfile.TemporaryDirectory() as spool_dir:
+                scenarios.append(('Buffer com spool (fsync)', lambda: buffered(spool_dir)))
+
+                self.stdout.write(f"{total} eventos por cenário, {batch} por requisição")
+                for label, run in scenarios:
+                    FranchiseTouchpoint.objects.filter(application=application).delete()
+                    started = time.perf_counter()
+                    run()
+                    elapsed = time.perf_counter() - started
+                    stored = FranchiseTouchpoint.objects.filter(application=application).count()
+                    self.stdout.write(
+                        f"  {label:<26} {total / elapsed:>10,.0f} eventos/s "
+                        f"({elapsed:.2f}s, {stored} gravados)"
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark concluído (dados desfeitos)"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from common.blockcache import bump_version, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Mostra a taxa de acerto do cache de blocos de StreamField por tipo de bloco "
+        "(somando todos os workers). --invalidate descarta o HTML guardado, ex.: após "
+        "um deploy que altere templates de blocos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true', help='Invalida todos os blocos em cache')
+        parser.add_argument('--reset', action='store_true', help='Zera as métricas depois de mostrá-las')
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            bump_version()
+            self.stdout.write(self.style.SUCCESS("Cache de blocos invalidado"))
+
+        stats = get_stats()
+        if not stats:
+            self.stdout.write("Nenhuma métrica registrada")
+        for block_type, counts in sorted(stats.items(), key=lambda item: -(item[1]['hit'] + item[1]['miss'])):
+            ratio = f"{counts['ratio'] * 100:5.1f}%" if counts['ratio'] is not None else "    -"
+            self.stdout.write(
+                f"{block_type:<28} acerto {ratio} | hit {counts['hit']:>8} | "
+                f"miss {counts['miss']:>8} | bypass {counts['bypass']:>8}"
+            )
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Métricas zeradas"))
@@ -0,0 +1,94 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.encoding import uri_to_iri
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Page, Site
+
+from common.redirects import build_index
+
+# Caracteres que o nginx interpretaria dentro de chaves/valores entre aspas
+UNSAFE_RE = re.compile(r'[\s"\\$;{}]')
+
+
+def live_page_paths(site):
+    """Caminhos normalizados das páginas publicadas do site (não podem ser redirecionados no nginx)"""
+    root_path = site.root_page.url_path
+    paths = set()
+    for url_path in Page.objects.live().filter(url_path__startswith=root_path).values_list('url_path', flat=True):
+        paths.add(Redirect.normalise_path(url_path[len(root_path) - 1:]))
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta os redirects do Wagtail como `map` do nginx ($uri -> \"301 /destino\"), "
+        "para que URLs legadas sejam redirecionadas sem chegar ao Django. Redirects com "
+        "query string e caminhos de páginas publicadas ficam só no Django (common.redirects)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Arquivo .map a gravar ("-" para a saída padrão)')
+        parser.add_argument('--site', help='Hostname do site (padrão: site padrão do Wagtail)')
+        parser.add_argument('--variable', default='legacy_redirect', help='Nome da variável do nginx')
+
+    def handle(self, *args, **options):
+        try:
+            site = Site.objects.get(hostname=options['site']) if options['site'] else Site.objects.get(is_default_site=True)
+        except Site.DoesNotExist:
+            raise CommandError("Site não encontrado")
+
+        index = build_index()
+        pages = live_page_paths(site)
+        lines = []
+        exact = prefixes = skipped = 0
+
+        for old_path, target in sorted(index.entries(site.pk).items()):
+            key = uri_to_iri(old_path)
+            if '?' in key or ';' in key or key in pages or UNSAFE_RE.search(key + target.link):
+                skipped += 1
+                continue
+            value = f"{301 if target.permanent else 302} {target.link}"
+            lines.append(f'    "{key}" "{value}";')
+            if key != '/':
+                lines.append(f'    "{key}/" "{value}";')
+            exact += 1
+
+        for prefix, target in index.prefix_entries(site.pk):
+            base = prefix.rstrip('/')
+            # No nginx a regra valeria também para páginas existentes; essas ficam no Django
+            covers_page = any(path == prefix or path.startswith(f'{base}/') for path in pages)
+            if covers_page or UNSAFE_RE.search(prefix + target.link):
+                skipped += 1
+                continue
+            # Regex na ordem do prefixo mais longo; o restante do caminho vai em $1
+            link = target.link[:-1] + '$1' if target.link.endswith('*') else target.link
+            pattern = '^' + re.escape(base) + '(?:/(.*))?$'
+            lines.append(f'    "~{pattern}" "{301 if target.permanent else 302} {link}";')
+            prefixes += 1
+
+        content = '\n'.join([
+            f"# Gerado por `manage.py export_redirects_map` em {timezone.now():%Y-%m-%d %H:%M} "
+            f"para {site.hostname}; não editar à mão.",
+            f"map $uri ${options['variable']} {{",
+            '    default "";',
+            *lines,
+            '}',
+            '',
+        ])
+
+        if options['output'] == '-':
+            self.stdout.write(content, ending='')
+        else:
+            # Grava ao lado e troca de uma vez: o nginx nunca lê um arquivo pela metade
+            temp_path = f"{options['output']}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, options['output'])
+
+        self.stderr.write(self.style.SUCCESS(
+            f"{exact} caminhos exatos e {prefixes} prefixos exportados; "
+            f"{skipped} redirects ficam só no Django"
+        ))
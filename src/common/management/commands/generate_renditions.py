@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from common.renditions import RENDITION_SPECS, collect_image_specs, generate_renditions, process_queue
+
+
+class Command(BaseCommand):
+    help = "Pré-gera as renditions de imagens usadas nos templates (inclui variantes AVIF/WebP e srcset)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Número de processos para gerar as renditions (1 = sem paralelismo)',
+        )
+        parser.add_argument(
+            '--only', nargs='*', choices=[name for name, _, _, _ in RENDITION_SPECS],
+            help='Limita a geração a algumas entradas do registro',
+        )
+        parser.add_argument(
+            '--queue', action='store_true',
+            help='Worker: gera as renditions dos objetos publicados/salvos (fila PendingRenditions)',
+        )
+        parser.add_argument('--once', action='store_true', help='Com --queue: processa um lote e sai (ex.: cron)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Com --queue: objetos da fila por lote')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Com --queue: espera (s) quando a fila está vazia')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            return self.run_queue(options)
+
+        wanted = collect_image_specs(options['only'])
+        total_specs = sum(len(specs) for specs in wanted.values())
+        self.stdout.write(f"{len(wanted)} imagens, {total_specs} renditions esperadas")
+
+        stats = generate_renditions(wanted, workers=options['workers'])
+
+        for image_id, error in stats['errors']:
+            self.stdout.write(self.style.ERROR(f"  Imagem {image_id}: {error}"))
+
+        elapsed = stats['elapsed']
+        rate = stats['generated'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Geradas {stats['generated']} renditions, {stats['skipped']} já existiam, "
+            f"{len(stats['errors'])} imagens com erro em {elapsed:.1f}s ({rate:.1f} renditions/s)"
+        ))
+
+    def run_queue(self, options):
+        while True:
+            close_old_connections()
+            processed, stats = process_queue(options['batch_size'], workers=options['workers'])
+            if processed or options['once']:
+                generated = stats['generated'] if stats else 0
+                self.stdout.write(self.style.SUCCESS(
+                    f"{processed} objeto(s) da fila, {generated} renditions geradas"
+                ))
+            if options['once']:
+                return
+            if not processed:
+                try:
+                    time.sleep(options['sleep'])
+                except KeyboardInterrupt:
+                    return
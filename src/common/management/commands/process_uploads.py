@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.uploads import expire_incomplete, process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de pós-processamento de uploads: detecção de tipo, extração de "
+        "texto (PDF/DOCX) e miniaturas. Também descarta uploads incompletos expirados "
+        "e os concluídos que nunca foram vinculados a um formulário."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa a fila uma vez e sai (ex.: cron)')
+        parser.add_argument('--batch-size', type=int, default=20, help='Uploads por lote')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Espera (s) quando a fila está vazia')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending(options['batch_size'])
+            expired = expire_incomplete()
+            if processed or expired or options['once']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{processed} upload(s) processados, {expired} upload(s) expirados removidos"
+                ))
+            if options['once']:
+                return
+            if not processed:
+                try:
+                    time.sleep(options['sleep'])
+                except KeyboardInterrupt:
+                    return
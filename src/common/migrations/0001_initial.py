@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:51
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('purpose', models.CharField(choices=[('resume', 'Currículo'), ('franchise_document', 'Documento de Franqueado')], max_length=30, verbose_name='Finalidade')),
+                ('original_filename', models.CharField(max_length=255, verbose_name='Nome Original')),
+                ('declared_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo informado')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='Tamanho total')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Bytes recebidos')),
+                ('status', models.CharField(choices=[('uploading', 'Enviando'), ('stored', 'Armazenado'), ('processed', 'Processado'), ('rejected', 'Rejeitado')], default='uploading', max_length=10, verbose_name='Status')),
+                ('file', models.FileField(blank=True, upload_to='uploads/%Y/%m/', verbose_name='Arquivo')),
+                ('detected_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo detectado')),
+                ('extracted_text', models.TextField(blank=True, verbose_name='Texto extraído')),
+                ('thumbnail', models.FileField(blank=True, upload_to='uploads/thumbnails/', verbose_name='Miniatura')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('stored_at', models.DateTimeField(blank=True, null=True, verbose_name='Armazenado em')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('attached_at', models.DateTimeField(blank=True, null=True, verbose_name='Vinculado em')),
+            ],
+            options={
+                'verbose_name': 'Upload',
+                'verbose_name_plural': 'Uploads',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'stored_at'], name='common_upload_status_idx')],
+            },
+        ),
+    ]
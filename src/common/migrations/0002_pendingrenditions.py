@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRenditions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('object_id', models.CharField(max_length=64, verbose_name='ID do objeto')),
+                ('queued_at', models.DateTimeField(verbose_name='Enfileirado em')),
+            ],
+            options={
+                'verbose_name': 'Renditions Pendentes',
+                'verbose_name_plural': 'Renditions Pendentes',
+                'constraints': [models.UniqueConstraint(fields=('model_label', 'object_id'), name='common_pendingrenditions_object_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_pendingrenditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas de processamento'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='client_ip',
+            field=models.GenericIPAddressField(blank=True, null=True, verbose_name='IP de origem'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='lease_until',
+            field=models.DateTimeField(blank=True, help_text="Enquanto 'processing': outro worker só retoma o upload depois deste horário", null=True, verbose_name='Reservado até'),
+        ),
+        migrations.AlterField(
+            model_name='upload',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Enviando'), ('stored', 'Armazenado'), ('processing', 'Processando'), ('processed', 'Processado'), ('rejected', 'Rejeitado')], default='uploading', max_length=10, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['client_ip', 'attached_at'], name='common_upload_client_idx'),
+        ),
+    ]
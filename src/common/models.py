@@ -0,0 +1,77 @@
+import uuid
+
+from django.db import models
+from django.utils import timezone
+
+
+class Upload(models.Model):
+    """
+    Upload em partes (retomável) de um arquivo de formulário. Os bytes vão
+    para um arquivo de staging e, ao completar, para o storage padrão; o
+    pós-processamento roda no worker `manage.py process_uploads`.
+    """
+    PURPOSE_CHOICES = [
+        ('resume', 'Currículo'),
+        ('franchise_document', 'Documento de Franqueado'),
+    ]
+    STATUS_CHOICES = [
+        ('uploading', 'Enviando'),
+        ('stored', 'Armazenado'),
+        ('processing', 'Processando'),
+        ('processed', 'Processado'),
+        ('rejected', 'Rejeitado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    purpose = models.CharField(max_length=30, choices=PURPOSE_CHOICES, verbose_name="Finalidade")
+    original_filename = models.CharField(max_length=255, verbose_name="Nome Original")
+    declared_type = models.CharField(max_length=100, blank=True, verbose_name="Tipo informado")
+    total_size = models.PositiveBigIntegerField(verbose_name="Tamanho total")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Bytes recebidos")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading', verbose_name="Status")
+
+    file = models.FileField(upload_to='uploads/%Y/%m/', blank=True, verbose_name="Arquivo")
+    detected_type = models.CharField(max_length=100, blank=True, verbose_name="Tipo detectado")
+    extracted_text = models.TextField(blank=True, verbose_name="Texto extraído")
+    thumbnail = models.FileField(upload_to='uploads/thumbnails/', blank=True, verbose_name="Miniatura")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas de processamento")
+    lease_until = models.DateTimeField(
+        null=True, blank=True, verbose_name="Reservado até",
+        help_text="Enquanto 'processing': outro worker só retoma o upload depois deste horário"
+    )
+    client_ip = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP de origem")
+
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Criado em")
+    stored_at = models.DateTimeField(null=True, blank=True, verbose_name="Armazenado em")
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Processado em")
+    attached_at = models.DateTimeField(null=True, blank=True, verbose_name="Vinculado em")
+
+    class Meta:
+        verbose_name = "Upload"
+        verbose_name_plural = "Uploads"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'stored_at'], name='common_upload_status_idx'),
+            models.Index(fields=['client_ip', 'attached_at'], name='common_upload_client_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.get_status_display()})"
+
+
+class PendingRenditions(models.Model):
+    """Objeto publicado/salvo cujas imagens aguardam o worker de renditions (common.renditions)"""
+    model_label = models.CharField(max_length=100, verbose_name="Modelo")
+    object_id = models.CharField(max_length=64, verbose_name="ID do objeto")
+    queued_at = models.DateTimeField(verbose_name="Enfileirado em")
+
+    class Meta:
+        verbose_name = "Renditions Pendentes"
+        verbose_name_plural = "Renditions Pendentes"
+        constraints = [
+            models.UniqueConstraint(fields=['model_label', 'object_id'], name='common_pendingrenditions_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} {self.object_id}"
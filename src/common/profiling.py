@@ -0,0 +1,282 @@
+"""
+Perfil de SQL por requisição (opt-in, SQL_PROFILER['ENABLED']).
+
+QueryProfilerMiddleware mede, para cada requisição: número de consultas,
+tempo total no banco, consultas repetidas (mesmo SQL com parâmetros
+diferentes — o sintoma típico de N+1) e o tempo de renderização do
+template das TemplateResponse (páginas do Wagtail).
+
+- Cabeçalho Server-Timing (db, tpl, total), visível no DevTools.
+- Amostra (SAMPLE_RATE), requisições lentas e estouros de orçamento vão
+  como uma linha JSON para um log rotativo (LOG_FILE).
+- Orçamentos declarados no código: @query_budget(...) em views e o
+  atributo `query_budget` em classes de página. Com RAISE_ON_BUDGET
+  (usado nos testes, ver `enforce_query_budgets`) um estouro levanta
+  QueryBudgetExceeded e o teste falha.
+
+As consultas são capturadas por um execute_wrapper instalado em toda
+conexão nova (common.apps); sem perfil ativo ele só consulta o ContextVar.
+O perfil ativo fica nesse ContextVar, que o sync_to_async propaga para o
+thread das views assíncronas.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SERVER_TIMING': True,
+    'SAMPLE_RATE': 0.01,        # fração das requisições registradas no log
+    'SLOW_REQUEST_MS': 500,     # requisições mais lentas são sempre registradas (None: desligado)
+    'LOG_FILE': None,           # None: BASE_DIR/../logs/sql_profile.log
+    'LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'LOG_BACKUPS': 5,
+    'TOP_DUPLICATES': 5,        # consultas repetidas listadas no log
+    'RAISE_ON_BUDGET': False,
+}
+
+_current = ContextVar('sql_profile', default=None)
+_sample_handlers = {}
+
+
+def profiler_settings():
+    options = {**DEFAULTS, **getattr(settings, 'SQL_PROFILER', {})}
+    if not options['LOG_FILE']:
+        options['LOG_FILE'] = os.path.join(os.path.dirname(settings.BASE_DIR), 'logs', 'sql_profile.log')
+    return options
+
+
+def enforce_query_budgets(**options):
+    """Ativa o profiler com orçamentos obrigatórios (decorator/contexto para testes)"""
+    from django.test.utils import override_settings
+
+    return override_settings(SQL_PROFILER={
+        **getattr(settings, 'SQL_PROFILER', {}),
+        'ENABLED': True, 'RAISE_ON_BUDGET': True, 'SAMPLE_RATE': 0, 'SLOW_REQUEST_MS': None,
+        **options,
+    })
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    """Limites de uma view: consultas, consultas repetidas e tempo no banco (ms)"""
+
+    def __init__(self, queries=None, duplicates=None, db_ms=None):
+        self.queries = queries
+        self.duplicates = duplicates
+        self.db_ms = db_ms
+
+    def violations(self, profile):
+        found = []
+        if self.queries is not None and profile.queries > self.queries:
+            found.append(f"{profile.queries} consultas (limite {self.queries})")
+        if self.duplicates is not None and profile.duplicates > self.duplicates:
+            found.append(f"{profile.duplicates} consultas repetidas (limite {self.duplicates})")
+        if self.db_ms is not None and profile.db_time * 1000 > self.db_ms:
+            found.append(f"{profile.db_time * 1000:.1f} ms no banco (limite {self.db_ms} ms)")
+        return found
+
+
+def query_budget(queries=None, duplicates=None, db_ms=None):
+    """Declara o orçamento de SQL de uma view (função ou classe)"""
+    def decorator(view):
+        view.query_budget = QueryBudget(queries, duplicates, db_ms)
+        return view
+    return decorator
+
+
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(sql):
+    """Formato da consulta, sem literais e com listas IN de qualquer tamanho iguais"""
+    return LITERAL_RE.sub('?', IN_LIST_RE.sub('IN (...)', sql))
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.render_started = None
+        self.render_time = None
+        self.view = None
+        self.budget = None
+
+    def record(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def top_duplicates(self, limit):
+        return [
+            {'sql': sql[:300], 'count': count}
+            for sql, count in self.fingerprints.most_common(limit) if count > 1
+        ]
+
+
+def capture_queries(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - start)
+
+
+def wrap_connection(connection, **kwargs):
+    if capture_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture_queries)
+
+
+def install():
+    """Instala o wrapper nas conexões já abertas e nas próximas (idempotente)"""
+    connection_created.connect(wrap_connection, dispatch_uid='common.profiling')
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            wrap_connection(connection)
+
+
+def write_sample(options, data):
+    """Uma linha JSON no log rotativo de amostras"""
+    path = options['LOG_FILE']
+    handler = _sample_handlers.get(path)
+    if handler is None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(
+                path, maxBytes=options['LOG_MAX_BYTES'], backupCount=options['LOG_BACKUPS'], delay=True,
+            )
+        except OSError as e:
+            logger.error(f"Log do profiler de SQL indisponível: {e}")
+            return
+        _sample_handlers[path] = handler
+    handler.handle(logging.makeLogRecord({
+        'name': 'common.profiling.samples', 'levelno': logging.INFO, 'levelname': 'INFO',
+        'msg': json.dumps(data, ensure_ascii=False),
+    }))
+
+
+class QueryProfilerMiddleware:
+    """
+    Mede SQL e renderização por requisição. Deve ser o primeiro da lista
+    MIDDLEWARE, para que o tempo de template não inclua outros middlewares.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = profiler_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is None:
+            return None
+        view_class = getattr(view_func, 'view_class', None)
+        profile.view = f"{view_func.__module__}.{getattr(view_class or view_func, '__qualname__', '')}"
+        profile.budget = getattr(view_func, 'query_budget', None) or getattr(view_class, 'query_budget', None)
+        return None
+
+    def process_template_response(self, request, response):
+        profile = _current.get()
+        if profile is None:
+            return response
+        # Páginas do Wagtail: o orçamento vem da classe da página
+        page = (response.context_data or {}).get('page')
+        if getattr(page, 'query_budget', None) is not None:
+            profile.budget = page.query_budget
+            profile.view = f"{type(page).__module__}.{type(page).__qualname__}"
+        profile.render_started = time.perf_counter()
+
+        def rendered(response):
+            profile.render_time = time.perf_counter() - profile.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        options = self.options
+        if options['SERVER_TIMING']:
+            timings = [f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries, {profile.duplicates} dup"']
+            if profile.render_time is not None:
+                timings.append(f'tpl;dur={profile.render_time * 1000:.1f}')
+            timings.append(f'total;dur={total * 1000:.1f}')
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = ', '.join(([existing] if existing else []) + timings)
+
+        violations = profile.budget.violations(profile) if profile.budget is not None else []
+        slow = options['SLOW_REQUEST_MS'] is not None and total * 1000 >= options['SLOW_REQUEST_MS']
+        if violations or slow or random.random() < options['SAMPLE_RATE']:
+            write_sample(options, {
+                'ts': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'view': profile.view,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'db_ms': round(profile.db_time * 1000, 1),
+                'render_ms': round(profile.render_time * 1000, 1) if profile.render_time is not None else None,
+                'queries': profile.queries,
+                'duplicates': profile.duplicates,
+                'top_duplicates': profile.top_duplicates(options['TOP_DUPLICATES']),
+                'budget_violations': violations,
+            })
+
+        if violations:
+            message = f"Orçamento de SQL excedido em {profile.view or request.path}: {'; '.join(violations)}"
+            if options['RAISE_ON_BUDGET']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
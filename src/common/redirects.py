@@ -0,0 +1,289 @@
+"""
+Índice de redirects em memória (substitui o RedirectMiddleware do Wagtail).
+
+O middleware do Wagtail consulta o banco a cada 404 (até quatro consultas:
+caminho com/sem query string, codificado ou não). Com milhares de URLs
+legadas do WordPress e bots batendo nelas, isso vira carga constante.
+
+RedirectIndexMiddleware compila todos os Redirect uma vez por worker:
+- dicionário de caminhos normalizados (Redirect.normalise_path) por site;
+- trie de segmentos para regras de prefixo: old_path terminado em `/*`
+  (ex.: /category/* -> /aprenda-marketing-digital/). Vence o prefixo mais
+  longo; se o destino também termina em `*`, o restante do caminho é
+  anexado (/blog/* -> /aprenda-marketing-digital/*).
+
+Salvar ou apagar um Redirect (ou trocar o slug/mover uma página, que muda a URL
+de destino) troca a versão no cache; cada worker recompila o índice no
+próximo 404 ao ver a versão nova. Isso exige um cache compartilhado entre
+os workers (Redis ou DatabaseCache, ver settings/production.py). Com o
+DummyCache a versão não é gravada: o worker que salvou recompila na hora e
+os demais recompilam quando o índice passa de REFRESH_INTERVAL segundos.
+Redirects para a própria URL são ignorados.
+
+`manage.py export_redirects_map` grava o índice como `map` do nginx, para
+que a maioria dos acessos legados seja respondida sem chegar ao Django.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django import http
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.db import DatabaseError, connections
+from django.http.request import split_domain_port
+from django.utils.encoding import uri_to_iri
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'redirects:index:version'
+PREFIX_SUFFIX = '/*'
+# Idade máxima do índice quando não há cache compartilhado para a versão
+REFRESH_INTERVAL = 60
+
+Target = namedtuple('Target', 'link permanent')
+
+_index = None
+_lock = threading.Lock()
+
+
+def bump_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+    reset_index()
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+def split_segments(path):
+    return [segment for segment in path.split('/') if segment]
+
+
+class RedirectIndex:
+    """Redirects compilados: caminhos exatos e trie de prefixos, por site (None = todos)"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.exact = {}
+        self.prefixes = {}
+        self.sites = {}
+        self.hostnames = {}
+        self.default_site_id = None
+
+    def __len__(self):
+        return sum(map(len, self.exact.values())) + sum(self.count_rules(trie) for trie in self.prefixes.values())
+
+    @staticmethod
+    def count_rules(node):
+        return (None in node) + sum(RedirectIndex.count_rules(child) for key, child in node.items() if key is not None)
+
+    def add(self, site_id, old_path, link, permanent):
+        if old_path.endswith(PREFIX_SUFFIX):
+            node = self.prefixes.setdefault(site_id, {})
+            for segment in split_segments(old_path[:-len(PREFIX_SUFFIX)]):
+                node = node.setdefault(segment, {})
+            # A trie usa a chave None para o destino da regra
+            node.setdefault(None, Target(link, permanent))
+        else:
+            self.exact.setdefault(site_id, {}).setdefault(old_path, Target(link, permanent))
+
+    def add_site(self, site_id, hostname, port, is_default):
+        self.sites[(hostname, port)] = site_id
+        # Hostname com mais de um site só vale com a porta certa
+        self.hostnames[hostname] = site_id if hostname not in self.hostnames else None
+        if is_default:
+            self.default_site_id = site_id
+
+    def site_for_request(self, request):
+        # Mesma ordem do Site.find_for_request, sem consultar o banco
+        try:
+            hostname = split_domain_port(request.get_host())[0]
+        except DisallowedHost:
+            # Host fora do ALLOWED_HOSTS: só valem os redirects globais
+            return None
+        site_id = self.sites.get((hostname, int(request.get_port())))
+        if site_id is None:
+            site_id = self.hostnames.get(hostname)
+        return site_id if site_id is not None else self.default_site_id
+
+    def scopes(self, request):
+        """Sites a consultar, o específico antes do global (como no Wagtail)"""
+        if self.exact.keys() | self.prefixes.keys() <= {None}:
+            # Só redirects globais: nem é preciso descobrir o site
+            return (None,)
+        return (self.site_for_request(request), None)
+
+    def match_prefix(self, site_id, path):
+        node = self.prefixes.get(site_id)
+        if node is None:
+            return None
+        segments = split_segments(path)
+        found = None
+        for depth, segment in enumerate([None] + segments):
+            if segment is not None:
+                node = node.get(segment)
+                if node is None:
+                    break
+            if None in node:
+                found = (node[None], segments[depth:])
+        if found is None:
+            return None
+        target, rest = found
+        if target.link.endswith('*'):
+            return Target(target.link[:-1] + '/'.join(rest), target.permanent)
+        return target
+
+    def find(self, request, path):
+        """Destino para o caminho já normalizado, ou None"""
+        if '\0' in path:
+            return None
+        path_without_query = urlparse(path).path
+        candidates = [path, uri_to_iri(path)]
+        if path_without_query != path:
+            candidates += [path_without_query, uri_to_iri(path_without_query)]
+
+        scopes = self.scopes(request)
+        for candidate in candidates:
+            for site_id in scopes:
+                target = self.exact.get(site_id, {}).get(candidate)
+                if target is not None:
+                    return target
+        for site_id in scopes:
+            target = self.match_prefix(site_id, uri_to_iri(path_without_query))
+            if target is not None:
+                return target
+        return None
+
+    def entries(self, site_id=None):
+        """(old_path, Target) válidos para um site: os específicos vencem os globais"""
+        merged = dict(self.exact.get(None, {}))
+        if site_id is not None:
+            merged.update(self.exact.get(site_id, {}))
+        return merged
+
+    def prefix_entries(self, site_id=None):
+        """(prefixo, Target) do mais longo para o mais curto"""
+        found = {}
+        for scope in ([None, site_id] if site_id is not None else [None]):
+            pending = [(self.prefixes.get(scope, {}), [])]
+            while pending:
+                node, segments = pending.pop()
+                if None in node:
+                    found['/' + '/'.join(segments)] = node[None]
+                pending.extend((child, segments + [key]) for key, child in node.items() if key is not None)
+        return sorted(found.items(), key=lambda item: (-len(item[0]), item[0]))
+
+
+def redirect_link(redirect, root_paths):
+    """Redirect.link sem consultas extras por página"""
+    page = redirect.redirect_page
+    if page is None:
+        return redirect.redirect_link or None
+    if redirect.redirect_page_route_path:
+        # Rota dentro da página precisa do modelo específico para ser validada
+        return redirect.link
+    # Mesmo cache que o Wagtail usa por instância, compartilhado entre as páginas
+    page._wagtail_cached_site_root_paths = root_paths
+    return page.url
+
+
+def build_index(version=None):
+    """Compila todos os Redirect do banco (uma consulta para redirects, uma para sites)"""
+    from wagtail.contrib.redirects.models import Redirect
+    from wagtail.models import Site
+
+    index = RedirectIndex(version)
+    for site in Site.objects.all():
+        index.add_site(site.pk, site.hostname, site.port, site.is_default_site)
+
+    root_paths = Site.get_site_root_paths()
+    redirects = Redirect.objects.select_related('redirect_page').order_by('pk')
+    for redirect in redirects.iterator(chunk_size=2000):
+        old_path = Redirect.normalise_path(redirect.old_path)
+        link = redirect_link(redirect, root_paths)
+        if not link or Redirect.normalise_path(link) == old_path:
+            continue
+        index.add(redirect.site_id, old_path, link, redirect.is_permanent)
+    return index
+
+
+def is_current(index, version):
+    if index is None:
+        return False
+    if version is None:
+        # DummyCache: a versão não chega aos outros workers, então o índice expira
+        return time.monotonic() - index.built_at < REFRESH_INTERVAL
+    return index.version == version
+
+
+def get_index():
+    """Índice do processo, recompilado quando a versão no cache muda"""
+    global _index
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Cache limpo ou chave expulsa: uma versão nova faz todos os workers recompilarem
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    if is_current(_index, version):
+        return _index
+    with _lock:
+        if not is_current(_index, version):
+            started = time.perf_counter()
+            _index = build_index(version)
+            logger.info(f"Índice de redirects compilado: {len(_index)} regras em {(time.perf_counter() - started) * 1000:.0f} ms")
+        return _index
+
+
+def warm_up():
+    """Compila o índice na subida do worker (wsgi.py/asgi.py); se falhar, compila no primeiro 404"""
+    try:
+        get_index()
+    except DatabaseError as e:
+        logger.warning(f"Índice de redirects não compilado na inicialização: {e}")
+    finally:
+        # Com --preload a conexão seria herdada pelos workers após o fork
+        connections.close_all()
+
+
+class RedirectIndexMiddleware:
+    """Responde 404s com os redirects do índice em memória"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if response.status_code != 404:
+            return response
+        return self.redirect(get_index(), request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.status_code != 404:
+            return response
+        # Consulta o cache e, se preciso, recompila o índice (banco) fora do event loop
+        return self.redirect(await sync_to_async(get_index)(), request, response)
+
+    @staticmethod
+    def redirect(index, request, response):
+        from wagtail.contrib.redirects.models import Redirect
+
+        target = index.find(request, Redirect.normalise_path(request.get_full_path()))
+        if target is None:
+            return response
+        if target.permanent:
+            return http.HttpResponsePermanentRedirect(target.link)
+        return http.HttpResponseRedirect(target.link)
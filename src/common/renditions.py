@@ -0,0 +1,223 @@
+"""
+Pré-geração de renditions de imagens do Wagtail.
+
+O Wagtail gera renditions sob demanda, na primeira requisição que as usa.
+Este módulo registra os filtros usados pelos templates e gera as renditions
+antecipadamente (comando ``generate_renditions``), para que nenhum
+visitante pague o redimensionamento dentro da requisição.
+
+Publicar uma página ou salvar um modelo registrado só coloca o objeto em
+PendingRenditions; ``generate_renditions --queue`` é o worker que gera as
+renditions desses objetos, fora da requisição do admin.
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.db import connections
+from django.utils import timezone
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+logger = logging.getLogger(__name__)
+
+# Metadados que o Wagtail grava sozinho ao gerar renditions; salvar só estes
+# campos não muda a imagem (os sinais de invalidação os ignoram)
+IMAGE_METADATA_FIELDS = {'file_size', 'file_hash'}
+
+# Filtros usados nos templates, por origem da imagem: (nome, modelo, campo, filtros).
+# Padrões com chaves seguem a sintaxe do {% picture %}/{% srcset_image %}
+# e são expandidos com Filter.expand_spec (ex.: "format-{avif,webp} width-400").
+RENDITION_SPECS = [
+    ('blog_cards', 'blog.BlogPage', 'social_image', [
+        'fill-400x250',
+        'format-{avif,webp,jpeg} fill-{640x360,1280x720}',
+    ]),
+    ('case_cards', 'cases.Case', 'hero_image', [
+        'format-{avif,webp,jpeg} fill-{400x250,800x500}',
+    ]),
+    ('case_heroes', 'cases.Case', 'hero_image', [
+        'format-{avif,webp,jpeg} fill-{600x400,1200x800}',
+    ]),
+    ('case_logos', 'cases.Case', 'client_logo', ['max-80x80', 'max-50x50']),
+    ('case_index_heroes', 'cases.CaseIndexPage', 'hero_image', ['fill-800x400']),
+    ('company_logos', 'companies.Company', 'logo', ['max-120x60', 'max-150x150', 'height-48']),
+    ('partner_logos', 'site_settings.PartnerLogo', 'logo', ['height-40']),
+    ('solution_sections', 'solutions.SolutionSection', 'image', [
+        'format-{avif,webp,jpeg} fill-{640x360,1280x720}',
+    ]),
+    ('home_about', 'home.HomePage', 'about_image', ['fill-600x400']),
+]
+
+
+def expand_specs(patterns):
+    """Expande os padrões com chaves em uma lista de filtros sem duplicatas"""
+    specs = []
+    for pattern in patterns:
+        for spec in Filter.expand_spec(pattern):
+            if spec not in specs:
+                specs.append(spec)
+    return specs
+
+
+def specs_for(name):
+    """Filtros expandidos de uma entrada do registro (ex.: 'blog_cards')"""
+    for entry_name, _, _, patterns in RENDITION_SPECS:
+        if entry_name == name:
+            return expand_specs(patterns)
+    raise KeyError(name)
+
+
+def collect_image_specs(entries=None):
+    """
+    Percorre o registro e retorna {image_id: [filtros]} para todas as imagens
+    referenciadas pelos modelos registrados (uma consulta por entrada).
+    """
+    wanted = {}
+    for name, model_label, field, patterns in RENDITION_SPECS:
+        if entries and name not in entries:
+            continue
+        model = apps.get_model(model_label)
+        specs = expand_specs(patterns)
+        image_ids = (
+            model._default_manager.filter(**{f'{field}__isnull': False})
+            .values_list(f'{field}_id', flat=True)
+            .distinct()
+        )
+        for image_id in image_ids:
+            image_specs = wanted.setdefault(image_id, [])
+            image_specs.extend(spec for spec in specs if spec not in image_specs)
+    return wanted
+
+
+def missing_specs(wanted):
+    """
+    Remove as renditions que já existem, com uma única consulta ao banco.
+    A comparação usa o focal_point_key atual de cada imagem.
+    """
+    Image = get_image_model()
+    Rendition = Image.get_rendition_model()
+
+    existing = set(
+        Rendition.objects.filter(image_id__in=wanted.keys())
+        .values_list('image_id', 'filter_spec', 'focal_point_key')
+    )
+
+    missing = {}
+    for image in Image.objects.filter(pk__in=wanted.keys()):
+        specs = [
+            spec for spec in wanted[image.pk]
+            if (image.pk, spec, Filter(spec=spec).get_cache_key(image)) not in existing
+        ]
+        if specs:
+            missing[image.pk] = specs
+    return missing
+
+
+def generate_for_image(image_id, specs):
+    """Gera as renditions de uma imagem. Retorna (image_id, geradas, erro)."""
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        image.get_renditions(*specs)
+        return image_id, len(specs), None
+    except Exception as e:
+        return image_id, 0, str(e)
+
+
+def generate_renditions(wanted, workers=None):
+    """
+    Gera as renditions ausentes de {image_id: [filtros]}.
+
+    Com workers > 1 as imagens são distribuídas em processos separados
+    (o redimensionamento é CPU-bound). Retorna um dicionário de estatísticas.
+    """
+    started = time.monotonic()
+    missing = missing_specs(wanted)
+    stats = {
+        'images': len(wanted),
+        'skipped': sum(len(specs) for specs in wanted.values()) - sum(len(specs) for specs in missing.values()),
+        'generated': 0,
+        'errors': [],
+    }
+
+    if workers and workers > 1 and len(missing) > 1:
+        # Conexões não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(generate_for_image, image_id, specs)
+                for image_id, specs in missing.items()
+            ]
+            results = [future.result() for future in as_completed(futures)]
+    else:
+        results = [generate_for_image(image_id, specs) for image_id, specs in missing.items()]
+
+    for image_id, generated, error in results:
+        stats['generated'] += generated
+        if error:
+            stats['errors'].append((image_id, error))
+
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+def instance_specs(instance, wanted=None):
+    """Acrescenta a {image_id: [filtros]} as imagens de um objeto registrado"""
+    wanted = {} if wanted is None else wanted
+    label = instance._meta.label
+    for _, model_label, field, patterns in RENDITION_SPECS:
+        if model_label != label:
+            continue
+        image_id = getattr(instance, f'{field}_id', None)
+        if image_id:
+            image_specs = wanted.setdefault(image_id, [])
+            image_specs.extend(spec for spec in expand_specs(patterns) if spec not in image_specs)
+    return wanted
+
+
+def registered_models():
+    return {apps.get_model(model_label) for _, model_label, _, _ in RENDITION_SPECS}
+
+
+def enqueue(instance):
+    """Coloca o objeto na fila do worker (na transação de quem chamou); sem imagens, nada a fazer"""
+    from .models import PendingRenditions
+
+    if not instance_specs(instance):
+        return
+
+    # Já na fila: só atualiza o horário, para o worker não descartar a nova entrada
+    PendingRenditions.objects.bulk_create(
+        [PendingRenditions(model_label=instance._meta.label, object_id=str(instance.pk), queued_at=timezone.now())],
+        update_conflicts=True, unique_fields=['model_label', 'object_id'], update_fields=['queued_at'],
+    )
+
+
+def process_queue(batch_size=50, workers=None):
+    """
+    Gera as renditions de um lote da fila (uma consulta por modelo).
+    Retorna (objetos processados, estatísticas de generate_renditions).
+    """
+    from .models import PendingRenditions
+
+    pending = list(PendingRenditions.objects.order_by('queued_at')[:batch_size])
+    if not pending:
+        return 0, None
+
+    by_label = {}
+    for entry in pending:
+        by_label.setdefault(entry.model_label, []).append(entry.object_id)
+    wanted = {}
+    for label, object_ids in by_label.items():
+        for instance in apps.get_model(label)._default_manager.filter(pk__in=object_ids):
+            instance_specs(instance, wanted)
+
+    stats = generate_renditions(wanted, workers=workers)
+    for image_id, error in stats['errors']:
+        logger.error(f"Erro ao gerar renditions da imagem {image_id}: {error}")
+
+    # Reenfileirado durante a geração: fica para o próximo lote
+    for entry in pending:
+        PendingRenditions.objects.filter(pk=entry.pk, queued_at=entry.queued_at).delete()
+    return len(pending), stats
@@ -0,0 +1,109 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Page, Site, get_page_models
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from . import redirects, renditions, sitemap
+from .blockcache import PAGE_LABEL, bump_version, tracked_labels
+from .renditions import IMAGE_METADATA_FIELDS
+
+# Enviado pelo worker de uploads quando um arquivo termina o pós-processamento
+# (tipo detectado e texto extraído). Argumento: upload.
+upload_processed = Signal()
+
+
+def on_page_published(sender, instance, **kwargs):
+    # Só enfileira, na transação da publicação; o worker generate_renditions --queue gera
+    renditions.enqueue(instance)
+
+
+def on_model_saved(sender, instance, raw=False, **kwargs):
+    # Páginas são tratadas na publicação, não a cada rascunho salvo
+    if raw or isinstance(instance, Page):
+        return
+    renditions.enqueue(instance)
+
+
+for model in renditions.registered_models():
+    page_published.connect(on_page_published, sender=model)
+    post_save.connect(on_model_saved, sender=model)
+
+
+def on_block_dependency_changed(sender, update_fields=None, **kwargs):
+    # Imagens, documentos e snippets referenciados por blocos (common.blockcache)
+    if update_fields and set(update_fields) <= IMAGE_METADATA_FIELDS:
+        return
+    bump_version(sender._meta.label_lower)
+
+
+def on_page_saved_for_blocks(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Links de rich text e PageChooserBlock mostram título e URL da versão publicada:
+    # só interessa o save que troca o título no ar ou coloca a página no ar
+    # (rascunhos gravam com update_fields, sem title nem live)
+    if raw or instance.pk is None or not instance.live:
+        return
+    if update_fields is not None and not {'title', 'live'} & set(update_fields):
+        return
+    before = Page.objects.filter(pk=instance.pk).values('title', 'live').first()
+    if before is None or not before['live'] or before['title'] != instance.title:
+        transaction.on_commit(lambda: bump_version(PAGE_LABEL))
+
+
+def on_page_link_changed(sender, **kwargs):
+    # Despublicar, trocar o slug ou mover muda os links da página (e das descendentes)
+    transaction.on_commit(lambda: bump_version(PAGE_LABEL))
+
+
+for label in tracked_labels():
+    post_save.connect(on_block_dependency_changed, sender=apps.get_model(label))
+    post_delete.connect(on_block_dependency_changed, sender=apps.get_model(label))
+
+for model in get_page_models():
+    pre_save.connect(on_page_saved_for_blocks, sender=model)
+page_unpublished.connect(on_page_link_changed)
+page_slug_changed.connect(on_page_link_changed)
+post_page_move.connect(on_page_link_changed)
+
+
+def on_redirect_changed(sender, **kwargs):
+    # Depois do commit, senão outro worker pode recompilar com o estado antigo
+    transaction.on_commit(redirects.bump_version)
+
+
+def on_redirect_target_moved(sender, instance, **kwargs):
+    # Trocar o slug ou mover uma página muda a URL dela e das filhas
+    if Redirect.objects.filter(redirect_page__path__startswith=instance.path).exists():
+        transaction.on_commit(redirects.bump_version)
+
+
+post_save.connect(on_redirect_changed, sender=Redirect)
+post_delete.connect(on_redirect_changed, sender=Redirect)
+page_slug_changed.connect(on_redirect_target_moved)
+post_page_move.connect(on_redirect_target_moved)
+
+
+def on_sitemap_page_changed(sender, instance, **kwargs):
+    # Só o shard da página e o índice são remontados (common.sitemap)
+    section = sitemap.section_for_model(sender)
+    shard = sitemap.shard_for(instance.pk)
+    transaction.on_commit(lambda: sitemap.bump_shard(section, shard))
+
+
+def on_sitemap_tree_changed(sender, **kwargs):
+    # Slug, posição na árvore ou sites mudam a URL de descendentes em qualquer shard
+    transaction.on_commit(sitemap.bump_tree)
+
+
+for section in sitemap.SECTIONS:
+    model = sitemap.section_model(section)
+    if model is not None:
+        page_published.connect(on_sitemap_page_changed, sender=model)
+        page_unpublished.connect(on_sitemap_page_changed, sender=model)
+        post_delete.connect(on_sitemap_page_changed, sender=model)
+page_slug_changed.connect(on_sitemap_tree_changed)
+post_page_move.connect(on_sitemap_tree_changed)
+post_save.connect(on_sitemap_tree_changed, sender=Site)
+post_delete.connect(on_sitemap_tree_changed, sender=Site)
@@ -0,0 +1,168 @@
+"""
+sitemap.xml em shards, com cache por shard.
+
+Seções: uma por tipo de página (SECTIONS). Cada seção é dividida em shards
+por faixa de id (pk // SHARD_SIZE), então publicar uma página muda apenas
+o shard dela, e páginas novas não deslocam as outras de shard.
+
+- /sitemap.xml: índice com os shards não vazios e o <lastmod> de cada um
+  (uma consulta agregada por tipo);
+- /sitemap-<seção>-<shard>.xml: uma consulta por shard, com url_path e
+  last_published_at; a URL sai do url_path e da raiz do site, sem resolver
+  página por página.
+
+O XML de cada shard e do índice fica em cache com chave formada
+pelas versões: publicar, despublicar ou apagar uma página troca a versão
+do shard dela e a do índice; mudar slug, mover páginas ou alterar um Site
+troca a versão da árvore e invalida tudo (ver common.signals). O shard é
+remontado na próxima requisição.
+"""
+import time
+from xml.sax.saxutils import escape
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, Value
+from django.urls import reverse
+from wagtail.models import Page, Site
+
+DEFAULTS = {
+    'SHARD_SIZE': 1000,         # faixa de ids por shard (o limite do protocolo é 50.000 URLs)
+    'TIMEOUT': 60 * 60 * 24,    # a chave já muda com as versões
+}
+
+# Seção (nome na URL) -> modelo de página
+SECTIONS = {
+    'blog': 'blog.BlogPage',
+    'cases': 'cases.CaseDetailPage',
+    'empresas': 'companies.CompanyDetailPage',
+    'unidades': 'companies.LocationPage',
+    'sites': 'desenvolvimento_sites.SiteDetalhePage',
+    'portfolio': 'portfolio.PortfolioItem',
+}
+
+TREE_VERSION_KEY = 'sitemap:version:tree'
+INDEX_VERSION_KEY = 'sitemap:version:index'
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def sitemap_settings():
+    return {**DEFAULTS, **getattr(settings, 'SITEMAP', {})}
+
+
+def section_model(section):
+    """Modelo da seção, ou None se o app não estiver instalado (ex.: desenvolvimento_sites)"""
+    try:
+        return apps.get_model(SECTIONS[section])
+    except LookupError:
+        return None
+
+
+def section_for_model(model):
+    """Nome da seção de um modelo de página, ou None"""
+    label = model._meta.label
+    return next((name for name, section_label in SECTIONS.items() if section_label == label), None)
+
+
+def shard_for(pk):
+    return pk // sitemap_settings()['SHARD_SIZE']
+
+
+def shard_version_key(section, shard):
+    return f'sitemap:version:{section}:{shard}'
+
+
+def bump_shard(section, shard):
+    now = time.time_ns()
+    cache.set_many({shard_version_key(section, shard): now, INDEX_VERSION_KEY: now}, None)
+
+
+def bump_tree():
+    now = time.time_ns()
+    cache.set_many({TREE_VERSION_KEY: now, INDEX_VERSION_KEY: now}, None)
+
+
+def site_root(site):
+    """url_path da raiz do site, a partir das raízes que o Wagtail já guarda em cache"""
+    for root_paths in Site.get_site_root_paths():
+        if root_paths.site_id == site.pk:
+            return root_paths.root_path
+    return site.root_page.url_path
+
+
+def public_pages(model, root_path, private_q):
+    """Páginas publicadas, fora de seções privadas e dentro do site"""
+    return model.objects.live().filter(url_path__startswith=root_path).exclude(private_q)
+
+
+def lastmod(value):
+    return f'<lastmod>{value.isoformat(timespec="seconds")}</lastmod>' if value else ''
+
+
+def build_index(site, base_url):
+    root_path = site_root(site)
+    private_q = Page.objects.private_q()
+    entries = []
+    size = sitemap_settings()['SHARD_SIZE']
+    for section in SECTIONS:
+        model = section_model(section)
+        if model is None:
+            continue
+        shards = (
+            public_pages(model, root_path, private_q)
+            .annotate(shard=F('pk') / Value(size))
+            .values('shard')
+            .annotate(lastmod=Max('last_published_at'))
+            .order_by('shard')
+        )
+        for row in shards:
+            url = f"{base_url}{reverse('sitemap_shard', args=(section, row['shard']))}"
+            entries.append(f'<sitemap><loc>{escape(url)}</loc>{lastmod(row["lastmod"])}</sitemap>')
+    return f'{XML_HEADER}<sitemapindex xmlns="{XMLNS}">\n' + '\n'.join(entries) + '\n</sitemapindex>\n'
+
+
+def build_shard(site, base_url, section, shard):
+    root_path = site_root(site)
+    size = sitemap_settings()['SHARD_SIZE']
+    # Mesma URL que o Wagtail gera: prefixo do wagtail_serve + caminho relativo à raiz do site
+    serve_prefix = base_url + reverse('wagtail_serve', args=('',))
+    rows = (
+        public_pages(section_model(section), root_path, Page.objects.private_q())
+        .filter(pk__gte=shard * size, pk__lt=(shard + 1) * size)
+        .order_by('pk')
+        .values_list('url_path', 'last_published_at')
+    )
+    entries = [
+        f'<url><loc>{escape(serve_prefix + url_path[len(root_path):])}</loc>{lastmod(published)}</url>'
+        for url_path, published in rows
+    ]
+    return f'{XML_HEADER}<urlset xmlns="{XMLNS}">\n' + '\n'.join(entries) + '\n</urlset>\n'
+
+
+def cached(key_parts, version_keys, build):
+    versions = cache.get_many(version_keys)
+    key = ':'.join(['sitemap', *map(str, key_parts), *(str(versions.get(k, 0)) for k in version_keys)])
+    xml = cache.get(key)
+    if xml is None:
+        xml = build()
+        cache.set(key, xml, sitemap_settings()['TIMEOUT'])
+    return xml
+
+
+def get_index(site, base_url):
+    return cached(
+        ('index', site.pk, base_url),
+        [TREE_VERSION_KEY, INDEX_VERSION_KEY],
+        lambda: build_index(site, base_url),
+    )
+
+
+def get_shard(site, base_url, section, shard):
+    return cached(
+        ('shard', site.pk, base_url, section, shard),
+        [TREE_VERSION_KEY, shard_version_key(section, shard)],
+        lambda: build_shard(site, base_url, section, shard),
+    )
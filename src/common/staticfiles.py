@@ -0,0 +1,138 @@
+"""
+Pipeline de arquivos estáticos para produção.
+
+CompressedManifestStaticFilesStorage grava, no `collectstatic`, cópias com
+o hash do conteúdo no nome (css/agenciakaizen.3f2a9c1b7d4e.css) e o
+manifesto staticfiles.json, como o ManifestStaticFilesStorage do Django.
+Em seguida, opcionalmente minifica CSS/JS e escreve irmãos .gz e .br dos
+arquivos com hash, para o nginx servi-los direto (gzip_static /
+brotli_static) com Cache-Control immutable, sem comprimir a cada
+requisição.
+
+Minificação usa rcssmin/rjsmin e .br usa brotli; sem esses pacotes as
+etapas são puladas. O manifesto fica em memória no storage (carregado uma
+vez por processo) e `asset_url` memoriza a URL final de cada arquivo,
+usado pela tag {% asset %} (common.templatetags.static_assets).
+"""
+import gzip
+import logging
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin, ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.core.signals import setting_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MINIFY': False,
+    'GZIP': True,
+    'BROTLI': True,
+    'MIN_SIZE': 512,  # bytes; arquivos menores não compensam a compressão
+    'COMPRESS_EXTENSIONS': ('.css', '.js', '.mjs', '.svg', '.json', '.map', '.txt', '.xml', '.ico', '.ttf', '.eot'),
+}
+
+
+def pipeline_settings():
+    return {**DEFAULTS, **getattr(settings, 'STATIC_PIPELINE', {})}
+
+
+def minify(name, content):
+    """CSS/JS minificado; devolve o conteúdo original se o minificador não estiver instalado"""
+    try:
+        if name.endswith('.css'):
+            from rcssmin import cssmin
+            return cssmin(content.decode('utf-8')).encode('utf-8')
+        if name.endswith('.js') and not name.endswith('.min.js'):
+            from rjsmin import jsmin
+            return jsmin(content.decode('utf-8')).encode('utf-8')
+    except ImportError as e:
+        logger.info(f"Minificação de {name} desativada: {e}")
+    except UnicodeDecodeError:
+        pass
+    return content
+
+
+def brotli_compress(content):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifesto com hash + minificação opcional + irmãos .gz/.br"""
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Referência a um arquivo que não existe cai no nome sem hash em vez de erro 500
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning(f"Arquivo estático fora do manifesto: {name}")
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        options = pipeline_settings()
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            if self.exists(hashed_name):
+                self.finish_file(hashed_name, options)
+
+    def finish_file(self, name, options):
+        with self.open(name) as stored:
+            content = stored.read()
+        if options['MINIFY'] and name.endswith(('.css', '.js')):
+            minified = minify(name, content)
+            if minified != content:
+                content = minified
+                self.replace(name, content)
+
+        if not name.endswith(tuple(options['COMPRESS_EXTENSIONS'])) or len(content) < options['MIN_SIZE']:
+            return
+        if options['GZIP']:
+            self.write_sibling(f'{name}.gz', gzip.compress(content, compresslevel=9, mtime=0), content)
+        if options['BROTLI']:
+            compressed = brotli_compress(content)
+            if compressed is not None:
+                self.write_sibling(f'{name}.br', compressed, content)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def write_sibling(self, name, compressed, original):
+        # Só vale a pena se ficou menor; senão um irmão antigo é removido
+        if len(compressed) < len(original):
+            self.replace(name, compressed)
+        elif self.exists(name):
+            self.delete(name)
+
+
+_urls = {}
+
+
+def serves_hashed_names():
+    """True quando as URLs de static já levam o hash do conteúdo"""
+    return isinstance(staticfiles_storage, ManifestFilesMixin) and not settings.DEBUG
+
+
+def asset_url(path):
+    """URL final de um arquivo estático, resolvida uma vez por processo"""
+    url = _urls.get(path)
+    if url is None:
+        url = _urls[path] = staticfiles_storage.url(path)
+    return url
+
+
+def reset_asset_urls(*, setting, **kwargs):
+    if setting in ('STORAGES', 'STATIC_URL', 'STATIC_ROOT', 'DEBUG'):
+        _urls.clear()
+
+
+setting_changed.connect(reset_asset_urls)
@@ -0,0 +1,47 @@
+# Template tags do cache de blocos de StreamField (ver common.blockcache)
+
+from django import template
+
+from common.blockcache import render_block
+
+register = template.Library()
+
+
+class BlockCacheNode(template.Node):
+    def __init__(self, nodelist, block, vary_on, fragment):
+        self.nodelist = nodelist
+        self.block = block
+        self.vary_on = vary_on
+        self.fragment = fragment
+
+    def render(self, context):
+        block = self.block.resolve(context)
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        return render_block(context, block, self.fragment, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag('blockcache')
+def do_blockcache(parser, token):
+    """
+    Guarda o HTML de um bloco de StreamField:
+
+        {% load block_cache %}
+        {% for block in page.body %}
+          {% blockcache block %}{% include_block block %}{% endblockcache %}
+        {% endfor %}
+
+    Argumentos extras entram na chave ({% blockcache block valor1 valor2 %}).
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' requer o bloco como argumento")
+    nodelist = parser.parse(('endblockcache',))
+    parser.delete_first_token()
+    # Template + linha identificam o fragmento (o mesmo bloco pode aparecer em dois lugares)
+    fragment = f"{getattr(parser.origin, 'template_name', '')}:{token.lineno}"
+    return BlockCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+        fragment,
+    )
@@ -0,0 +1,13 @@
+# Template tags para arquivos estáticos
+
+from django import template
+
+from common.staticfiles import asset_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset(path):
+    """Como {% static %}, mas com a URL (com hash, em produção) memorizada por processo"""
+    return asset_url(path)
@@ -0,0 +1,746 @@
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from franchise.models import FranchiseApplication, FranchiseTouchpoint
+
+from .blockcache import block_dependencies, get_stats, reset_stats
+from .models import PendingRenditions, Upload
+from .redirects import build_index, get_index
+from .renditions import expand_specs, missing_specs, specs_for
+from .profiling import QueryBudget, QueryBudgetExceeded, enforce_query_budgets, fingerprint
+from .staticfiles import asset_url
+from .touchpoints import FUNNELS, BufferFull, TouchpointBuffer, flush_all, make_row
+from .uploads import UploadError, claim_stored, expire_incomplete, process_pending, take_upload
+
+
+class TouchpointBufferTests(TestCase):
+    """Buffer de ingestão: flush por tamanho, backpressure e recuperação do spool"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        self.application = FranchiseApplication.objects.create(
+            full_name="Maria", email="maria@example.com", birth_date=datetime.date(1990, 1, 1),
+            experience_years=5, expected_start_date=datetime.date(2030, 1, 1),
+        )
+
+    def make_buffer(self, **kwargs):
+        model_label, parent_field = FUNNELS['franchise']
+        options = {'max_events': 10, 'flush_size': 5, 'flush_interval': 0, 'spool_dir': self.spool_dir}
+        options.update(kwargs)
+        buffer = TouchpointBuffer('franchise', model_label, parent_field, **options)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def rows(self, total):
+        return [make_row('franchise', self.application.pk, 'page_view', {'i': i}) for i in range(total)]
+
+    def stored(self):
+        return FranchiseTouchpoint.objects.filter(application=self.application).count()
+
+    def test_flushes_with_bulk_create_on_size(self):
+        buffer = self.make_buffer()
+        buffer.add(self.rows(4))
+        self.assertEqual(self.stored(), 0)
+        with self.assertNumQueries(3):  # savepoint + INSERT em lote + release
+            buffer.add(self.rows(1))
+        self.assertEqual(self.stored(), 5)
+
+    def test_backpressure_rejects_when_flush_fails(self):
+        buffer = self.make_buffer(flush_size=100)
+        buffer.add(self.rows(8))
+
+        def failing_write(rows):
+            raise RuntimeError("banco indisponível")
+
+        buffer._write = failing_write
+        with self.assertRaises(BufferFull):
+            buffer.add(self.rows(5))
+        # Os eventos já aceitos continuam no buffer para a próxima tentativa
+        self.assertEqual(len(buffer.rows), 8)
+
+    def test_orphaned_spool_is_recovered(self):
+        crashed = self.make_buffer(flush_size=100)
+        crashed.add(self.rows(3))
+        # Simula a morte do processo: libera o flock sem fazer flush
+        crashed.lock_file.close()
+        crashed.closed = True
+
+        recovering = self.make_buffer(flush_size=100)
+        recovering.start()
+        self.assertEqual(len(recovering.rows), 3)
+        self.assertEqual(recovering.flush(), 3)
+        self.assertEqual(self.stored(), 3)
+        self.assertEqual(
+            [name for name in os.listdir(self.spool_dir) if crashed.token in name], []
+        )
+
+    def test_live_spool_is_not_recovered(self):
+        owner = self.make_buffer(flush_size=100)
+        owner.add(self.rows(2))
+        other = self.make_buffer(flush_size=100)
+        other.start()
+        self.assertEqual(other.rows, [])
+
+    def test_lock_is_held_before_it_becomes_visible(self):
+        import fcntl
+        import glob
+
+        real_rename = os.rename
+        visible_before = []
+
+        def checked_rename(src, dst):
+            visible_before.extend(glob.glob(os.path.join(self.spool_dir, 'franchise.*.lock')))
+            fd = os.open(src, os.O_RDWR)
+            try:
+                with self.assertRaises(BlockingIOError):
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            finally:
+                os.close(fd)
+            real_rename(src, dst)
+
+        buffer = self.make_buffer()
+        with mock.patch('common.touchpoints.os.rename', side_effect=checked_rename):
+            buffer.start()
+        self.assertEqual(visible_before, [])
+        self.assertTrue(os.path.exists(os.path.join(self.spool_dir, f'franchise.{buffer.token}.lock')))
+
+    def test_endpoint_error_is_not_exposed(self):
+        with mock.patch('common.touchpoints.get_buffer', side_effect=RuntimeError("senha do banco")):
+            response = self.client.post('/franchise/api/touchpoint/', json.dumps(
+                {'application_id': str(self.application.pk), 'event_type': 'page_view'}
+            ), content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("senha", response.content.decode())
+
+    @override_settings(TOUCHPOINT_BUFFER={'FLUSH_SIZE': 100, 'FLUSH_INTERVAL': 0, 'SPOOL_DIR': None})
+    def test_batch_endpoint(self):
+        events = [
+            {'application_id': str(self.application.pk), 'event_type': 'page_view'},
+            {'application_id': str(self.application.pk), 'event_type': 'modal_open', 'step_number': 1},
+            {'application_id': str(self.application.pk), 'event_type': 'invalido'},
+        ]
+        # sendBeacon envia text/plain
+        response = self.client.post(
+            '/franchise/api/touchpoint/', json.dumps(events), content_type='text/plain'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'success': True, 'accepted': 2, 'rejected': 1})
+
+        self.assertEqual(flush_all(), 2)
+        self.assertEqual(self.stored(), 2)
+
+        response = self.client.post(
+            '/franchise/api/touchpoint/',
+            json.dumps({'application_id': '00000000-0000-0000-0000-000000000000', 'event_type': 'page_view'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+def make_docx(text):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>'
+        ))
+        # Conteúdo pouco compressível para o arquivo ter várias partes
+        archive.writestr('word/media/noise.bin', os.urandom(3000), compress_type=zipfile.ZIP_STORED)
+    return output.getvalue()
+
+
+class ChunkedUploadTests(TestCase):
+    """Uploads em partes: retomada, limites e pós-processamento"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(
+            MEDIA_ROOT=media_root,
+            UPLOADS={'STAGING_DIR': os.path.join(media_root, 'partial'), 'MAX_CHUNK_SIZE': 1024},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def start(self, filename, size, purpose='resume'):
+        return self.client.post('/api/uploads/', json.dumps({
+            'purpose': purpose, 'filename': filename, 'size': size,
+        }), content_type='application/json')
+
+    def send(self, upload_id, offset, chunk):
+        return self.client.generic(
+            'PATCH', f'/api/uploads/{upload_id}/', chunk,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, filename, content, purpose='resume'):
+        upload_id = self.start(filename, len(content), purpose).json()['upload_id']
+        for offset in range(0, len(content), 1024):
+            response = self.send(upload_id, offset, content[offset:offset + 1024])
+        self.assertEqual(response.status_code, 201)
+        return Upload.objects.get(pk=upload_id)
+
+    def test_resumable_upload_and_processing(self):
+        content = make_docx("Experiência com tráfego pago")
+        response = self.start("curriculo.docx", len(content))
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+
+        self.assertEqual(self.send(upload_id, 0, content[:1024]).json()['offset'], 1024)
+        # Parte repetida (ex.: resposta perdida): 409 com o offset correto
+        response = self.send(upload_id, 0, content[:1024])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '1024')
+
+        offset = int(self.client.head(f'/api/uploads/{upload_id}/')['Upload-Offset'])
+        while offset < len(content):
+            response = self.send(upload_id, offset, content[offset:offset + 1024])
+            offset = response.json()['offset']
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], 'stored')
+
+        upload = Upload.objects.get(pk=upload_id)
+        with upload.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        self.assertEqual(process_pending(), 1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'processed')
+        self.assertEqual(upload.detected_type, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        self.assertIn("tráfego pago", upload.extracted_text)
+
+    def test_size_and_type_limits(self):
+        self.assertEqual(self.start("curriculo.docx", 11 * 1024 * 1024).status_code, 413)
+        self.assertEqual(self.start("curriculo.exe", 100).status_code, 400)
+
+        upload_id = self.start("curriculo.pdf", 3000).json()['upload_id']
+        self.assertEqual(self.send(upload_id, 0, b'x' * 2000).status_code, 413)
+        small = self.start("curriculo.pdf", 10).json()['upload_id']
+        self.assertEqual(self.send(small, 0, b'x' * 20).status_code, 413)
+
+    def test_content_sniffing_rejects_disguised_file(self):
+        content = b'\x89PNG\r\n\x1a\n' + b'0' * 100
+        upload_id = self.start("curriculo.pdf", len(content)).json()['upload_id']
+        # Conferido ao concluir, antes de o upload poder ser vinculado
+        self.assertEqual(self.send(upload_id, 0, content).status_code, 415)
+        upload = Upload.objects.get(pk=upload_id)
+        self.assertEqual((upload.status, upload.detected_type), ('rejected', 'image/png'))
+        self.assertFalse(upload.file)
+        self.assertEqual(process_pending(), 0)
+        with self.assertRaises(UploadError):
+            take_upload(upload.pk, 'resume')
+
+    def test_claimed_upload_is_not_claimed_again(self):
+        upload = self.upload("curriculo.pdf", b'%PDF-1.4 ' + b'0' * 100)
+        self.assertEqual([claimed.pk for claimed in claim_stored(10)], [upload.pk])
+        # Outro worker, depois do commit da reserva
+        self.assertEqual(claim_stored(10), [])
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ('processing', 1))
+        # Reserva vencida (worker morreu): volta a ser reservável
+        Upload.objects.filter(pk=upload.pk).update(lease_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(process_pending(), 1)
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ('processed', 2))
+
+    def test_transient_failure_is_retried(self):
+        upload = self.upload("curriculo.pdf", b'%PDF-1.4 ' + b'0' * 100)
+        with mock.patch('common.uploads.process_upload', side_effect=OSError("storage indisponível")):
+            self.assertEqual(process_pending(), 1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'processing')
+        self.assertIn("storage indisponível", upload.error)
+        # Aguarda o RETRY_DELAY antes de tentar de novo
+        self.assertEqual(process_pending(), 0)
+
+        Upload.objects.filter(pk=upload.pk).update(lease_until=timezone.now())
+        self.assertEqual(process_pending(), 1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'processed')
+
+    def test_transient_failure_gives_up_after_max_attempts(self):
+        upload = self.upload("curriculo.pdf", b'%PDF-1.4 ' + b'0' * 100)
+        Upload.objects.filter(pk=upload.pk).update(attempts=4)
+        with mock.patch('common.uploads.process_upload', side_effect=OSError("storage indisponível")):
+            process_pending()
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ('rejected', 5))
+
+    def test_unattached_uploads_expire_with_their_files(self):
+        upload = self.upload("curriculo.pdf", b'%PDF-1.4 ' + b'0' * 100)
+        attached = self.upload("outro.pdf", b'%PDF-1.4 ' + b'1' * 100)
+        take_upload(attached.pk, 'resume')
+        path = upload.file.path
+        self.assertEqual(expire_incomplete(), 0)
+
+        Upload.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(expire_incomplete(), 1)
+        self.assertFalse(Upload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(Upload.objects.filter(pk=attached.pk).exists())
+
+    def test_pending_uploads_per_ip_are_limited(self):
+        with override_settings(UPLOADS={**settings.UPLOADS, 'MAX_PENDING_PER_IP': 2}):
+            for _ in range(2):
+                self.assertEqual(self.start("curriculo.pdf", 100).status_code, 201)
+            self.assertEqual(self.start("curriculo.pdf", 100).status_code, 429)
+            # Outro IP não é afetado
+            response = self.client.post('/api/uploads/', json.dumps({
+                'purpose': 'resume', 'filename': "curriculo.pdf", 'size': 100,
+            }), content_type='application/json', REMOTE_ADDR='10.0.0.2')
+            self.assertEqual(response.status_code, 201)
+
+    def test_upload_is_attached_once(self):
+        upload = self.upload("curriculo.pdf", b'%PDF-1.4 ' + b'0' * 100)
+        self.assertEqual(take_upload(upload.pk, 'resume').pk, upload.pk)
+        with self.assertRaises(UploadError):
+            take_upload(upload.pk, 'resume')
+        with self.assertRaises(UploadError):
+            take_upload('nao-e-uuid', 'resume')
+
+
+class StaticPipelineTests(TestCase):
+    """collectstatic com nomes com hash, irmãos .gz e URLs resolvidas pelo manifesto"""
+
+    def setUp(self):
+        source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(source, 'css'))
+        os.makedirs(os.path.join(source, 'images'))
+        with open(os.path.join(source, 'css', 'site.css'), 'w') as f:
+            f.write(".hero { background: url('../images/bg.png'); }\n" * 50)
+        with open(os.path.join(source, 'images', 'bg.png'), 'wb') as f:
+            f.write(b'\x89PNG' + b'0' * 2048)
+        override = override_settings(
+            STATICFILES_DIRS=[source], STATIC_ROOT=self.root, DEBUG=False,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'common.staticfiles.CompressedManifestStaticFilesStorage'},
+            },
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_hashed_files_get_compressed_siblings(self):
+        with open(os.path.join(self.root, 'staticfiles.json')) as f:
+            hashed_css = json.load(f)['paths']['css/site.css']
+        self.assertRegex(hashed_css, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, hashed_css), 'rb') as f:
+            content = f.read()
+        # A URL da imagem dentro do CSS também aponta para o nome com hash
+        self.assertRegex(content.decode(), r"bg\.[0-9a-f]{12}\.png")
+        with gzip.open(os.path.join(self.root, hashed_css + '.gz')) as f:
+            self.assertEqual(f.read(), content)
+        # PNG não está em COMPRESS_EXTENSIONS
+        self.assertFalse(any(name.endswith('.png.gz') for name in os.listdir(os.path.join(self.root, 'images'))))
+
+    def test_asset_tag_uses_manifest(self):
+        html = Template("{% load static_assets %}{% asset 'css/site.css' %}").render(Context())
+        self.assertRegex(html, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        self.assertEqual(asset_url('css/site.css'), html)
+        # Arquivo fora do manifesto não derruba a página
+        self.assertEqual(asset_url('css/missing.css'), '/static/css/missing.css')
+
+
+class QueryProfilerTests(TestCase):
+    """Middleware de perfil de SQL: Server-Timing, amostras em log e orçamentos"""
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+        self.log_file = os.path.join(self.log_dir, 'sql_profile.log')
+
+    def test_disabled_by_default(self):
+        response = self.client.get('/api/blog/categories/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_and_sampled_log(self):
+        with enforce_query_budgets(SAMPLE_RATE=1, LOG_FILE=self.log_file):
+            response = self.client.get('/api/blog/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="1 queries, 0 dup", total;dur=[\d.]+$')
+        with open(self.log_file) as f:
+            sample = json.loads(f.read().splitlines()[-1])
+        self.assertEqual(sample['path'], '/api/blog/categories/')
+        self.assertEqual(sample['view'], 'blog.api_views.get_categories')
+        self.assertEqual((sample['queries'], sample['duplicates'], sample['budget_violations']), (1, 0, []))
+
+    @enforce_query_budgets()
+    async def test_async_views_are_measured_over_asgi(self):
+        # As consultas rodam no thread do sync_to_async; o perfil chega pelo ContextVar
+        response = await self.async_client.get('/api/blog/search/', {'q': "kaizen"})
+        self.assertIn('desc="2 queries, 0 dup"', response['Server-Timing'])
+
+    def test_budget_exceeded_fails_the_request(self):
+        from blog import api_views
+
+        with enforce_query_budgets(LOG_FILE=self.log_file), \
+                mock.patch.object(api_views.get_categories, 'query_budget', QueryBudget(queries=0)):
+            with self.assertRaisesMessage(QueryBudgetExceeded, "1 consultas (limite 0)"):
+                self.client.get('/api/blog/categories/')
+
+    def test_fingerprint_groups_repeated_queries(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "a" WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            fingerprint('SELECT * FROM "a" WHERE "id" IN (%s) LIMIT 1'),
+        )
+
+
+class BlockCacheTests(TestCase):
+    """Cache de renderização por bloco: chave por revisão/versões, bypass e métricas"""
+
+    TEMPLATE = Template(
+        "{% load wagtailimages_tags block_cache %}"
+        "{% for block in page.body %}{% blockcache block %}"
+        "{% if block.block_type == 'image' %}{% image block.value width-100 %}{% else %}{{ block.value }}{% endif %}"
+        "{% endblockcache %}{% endfor %}"
+    )
+
+    def setUp(self):
+        from wagtail.images.models import Image
+        from wagtail.images.tests.utils import get_test_image_file
+        from wagtail.models import Page
+
+        from pages.models import StandardPage
+
+        cache.clear()
+        reset_stats()
+        self.image = Image.objects.create(title="Foto", file=get_test_image_file())
+        self.page = StandardPage(title="Sobre", slug="sobre-blocos", body=[
+            ('heading', "Título"), ('image', self.image),
+        ])
+        Page.objects.get(pk=1).get_children().first().add_child(instance=self.page)
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+
+    def render(self, **context):
+        return self.TEMPLATE.render(Context({'page': self.page, **context}))
+
+    def test_second_render_comes_from_cache(self):
+        first = self.render()
+        self.assertIn("Título", first)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(), first)
+        stats = get_stats()
+        self.assertEqual((stats['ImageChooserBlock']['hit'], stats['ImageChooserBlock']['miss']), (1, 1))
+        self.assertEqual(stats['CharBlock']['ratio'], 0.5)
+
+    def test_new_revision_and_image_change_invalidate(self):
+        self.render()
+        self.page.body[0].value = "Novo título"
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+        self.assertIn("Novo título", self.render())
+
+        self.image.title = "Outra foto"
+        self.image.save()
+        self.render()
+        stats = get_stats()
+        # A imagem só invalida o bloco que a referencia
+        self.assertEqual(stats['ImageChooserBlock']['miss'], 3)
+        self.assertEqual(stats['CharBlock']['miss'], 2)
+        self.assertEqual(stats['CharBlock']['hit'], 1)
+
+    def test_page_version_follows_title_and_url_only(self):
+        from .blockcache import PAGE_LABEL, version_key
+
+        cache.set(version_key(PAGE_LABEL), 1, None)
+        self.page.body[0].value = "Só o corpo"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision().publish()
+        self.assertEqual(cache.get(version_key(PAGE_LABEL)), 1)
+
+        self.page.title = "Quem somos"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision().publish()
+        self.assertNotEqual(cache.get(version_key(PAGE_LABEL)), 1)
+
+        cache.set(version_key(PAGE_LABEL), 1, None)
+        self.page.slug = "quem-somos"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.page.save_revision().publish()
+        self.assertNotEqual(cache.get(version_key(PAGE_LABEL)), 1)
+
+    def test_preview_bypasses_cache(self):
+        self.render()
+        self.page.body[0].value = "Rascunho"
+        self.assertIn("Rascunho", self.render(request=mock.Mock(is_preview=True)))
+        self.assertIn("Rascunho", self.render(block_cache=False))
+        self.assertEqual(get_stats()['CharBlock']['bypass'], 2)
+
+    def test_dependencies_from_choosers_and_meta(self):
+        from home.models import HomePage
+
+        self.assertEqual(
+            block_dependencies(HomePage.body.field.stream_block.child_blocks['solutions_section']),
+            ('solutions.solutionsection', 'wagtailimages.image'),
+        )
+
+
+class RedirectIndexTests(TestCase):
+    """Redirects compilados em memória e exportação para o nginx"""
+
+    def setUp(self):
+        from wagtail.contrib.redirects.models import Redirect
+
+        cache.clear()
+        # Caminhos gravados como no import do WordPress (com barra final, sem normalizar)
+        Redirect.objects.create(old_path='/como-fazer-seo/', redirect_link='/aprenda-marketing-digital/como-fazer-seo/')
+        Redirect.objects.create(old_path='/category/*', redirect_link='/aprenda-marketing-digital/')
+        Redirect.objects.create(old_path='/category/seo/*', redirect_link='/blog/seo/*', is_permanent=False)
+        Redirect.objects.create(old_path='/mesma-url/', redirect_link='/mesma-url/')
+
+    def test_exact_and_prefix_rules(self):
+        index = build_index()
+        request = mock.Mock()
+        with self.assertNumQueries(0):
+            self.assertEqual(index.find(request, '/como-fazer-seo').link, '/aprenda-marketing-digital/como-fazer-seo/')
+            self.assertEqual(index.find(request, '/como-fazer-seo?utm_source=x').link, '/aprenda-marketing-digital/como-fazer-seo/')
+            self.assertEqual(index.find(request, '/category/outros/antigo'), ('/aprenda-marketing-digital/', True))
+            # Vence o prefixo mais longo, com o restante do caminho anexado
+            self.assertEqual(index.find(request, '/category/seo/on-page'), ('/blog/seo/on-page', False))
+            self.assertIsNone(index.find(request, '/mesma-url'))
+            self.assertIsNone(index.find(request, '/outra'))
+
+    def test_middleware_redirects_404s_and_refreshes_on_change(self):
+        from wagtail.contrib.redirects.models import Redirect
+
+        response = self.client.get('/category/seo/on-page/')
+        self.assertRedirects(response, '/blog/seo/on-page', status_code=302, fetch_redirect_response=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.objects.create(old_path='/nova-antiga', redirect_link='/nova/')
+        self.assertRedirects(self.client.get('/nova-antiga/'), '/nova/', status_code=301, fetch_redirect_response=False)
+        self.assertEqual(len(get_index()), 4)  # /mesma-url/ apontava para si mesma
+
+    def test_only_url_changes_of_redirect_targets_refresh(self):
+        from wagtail.contrib.redirects.models import Redirect
+        from wagtail.models import Page
+
+        from pages.models import StandardPage
+
+        from . import redirects
+
+        page = StandardPage(title="Destino", slug="destino")
+        Page.objects.get(pk=1).get_children().first().add_child(instance=page)
+        page.save_revision().publish()
+        Redirect.objects.create(old_path='/antigo-destino', redirect_page=page)
+
+        with mock.patch.object(redirects, 'bump_version') as bump_version:
+            # Publicar sem mudar a URL nem consulta os redirects
+            with mock.patch.object(Redirect.objects, 'filter', wraps=Redirect.objects.filter) as lookup:
+                page.title = "Novo título"
+                with self.captureOnCommitCallbacks(execute=True):
+                    page.save_revision().publish()
+            lookup.assert_not_called()
+            bump_version.assert_not_called()
+
+            page.slug = "novo-destino"
+            with self.captureOnCommitCallbacks(execute=True):
+                page.save_revision().publish()
+            bump_version.assert_called()
+
+    def test_async_middleware(self):
+        from asgiref.sync import async_to_sync, iscoroutinefunction
+        from django.http import HttpResponseNotFound
+        from django.test import RequestFactory
+
+        from .redirects import RedirectIndexMiddleware
+
+        async def not_found(request):
+            return HttpResponseNotFound()
+
+        middleware = RedirectIndexMiddleware(not_found)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/como-fazer-seo/'))
+        self.assertEqual((response.status_code, response['Location']), (301, '/aprenda-marketing-digital/como-fazer-seo/'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_index_expires_without_shared_cache(self):
+        from wagtail.contrib.redirects.models import Redirect
+
+        from . import redirects
+
+        index = get_index()
+        self.assertIs(get_index(), index)
+        # Gravado por outro worker: aqui nenhum sinal chega
+        Redirect.objects.bulk_create([Redirect(old_path='/de-outro-worker', redirect_link='/novo/')])
+        with mock.patch.object(redirects.time, 'monotonic', return_value=index.built_at + redirects.REFRESH_INTERVAL + 1):
+            self.assertEqual(get_index().find(mock.Mock(), '/de-outro-worker').link, '/novo/')
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_site_lookup_uses_validated_host(self):
+        from django.test import RequestFactory
+        from wagtail.models import Site
+
+        index = build_index()
+        site = Site.objects.get(is_default_site=True)
+        self.assertEqual(index.site_for_request(RequestFactory().get('/', HTTP_HOST='localhost')), site.pk)
+        self.assertIsNone(index.site_for_request(RequestFactory().get('/', HTTP_HOST='invasor.example.com')))
+
+    def test_export_nginx_map(self):
+        out = io.StringIO()
+        call_command('export_redirects_map', '-', stdout=out, stderr=io.StringIO())
+        content = out.getvalue()
+        self.assertIn('map $uri $legacy_redirect {', content)
+        self.assertIn('"/como-fazer-seo/" "301 /aprenda-marketing-digital/como-fazer-seo/";', content)
+        self.assertIn(r'"~^/category/seo(?:/(.*))?$" "302 /blog/seo/$1";', content)
+        self.assertLess(content.index('/category/seo('), content.index('/category('))
+        self.assertNotIn('mesma-url', content)
+
+
+@override_settings(SITEMAP={'SHARD_SIZE': 5})
+class SitemapTests(TestCase):
+    """Sitemap em shards: índice, URLs sem resolver página a página e invalidação por shard"""
+
+    def setUp(self):
+        from wagtail.models import Page
+
+        from blog.models import BlogIndexPage
+
+        cache.clear()
+        self.home = Page.objects.get(pk=1).get_children().first()
+        self.blog_index = BlogIndexPage(title="Aprenda Marketing", slug="aprenda-marketing")
+        self.home.add_child(instance=self.blog_index)
+        self.posts = [self.add_post(n) for n in range(1, 7)]
+
+    def add_post(self, n):
+        from blog.models import BlogPage
+
+        post = BlogPage(title=f"Post {n}", slug=f"post-{n}", date=datetime.date(2024, 1, n), intro="Introdução")
+        self.blog_index.add_child(instance=post)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        return post
+
+    def shard_url(self, page):
+        return f'/sitemap-blog-{page.pk // 5}.xml'
+
+    def test_index_and_shards(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        shards = {self.shard_url(post) for post in self.posts}
+        self.assertGreater(len(shards), 1)
+        for url in shards:
+            self.assertContains(response, f'<loc>http://testserver{url}</loc>')
+
+        content = b''.join(self.client.get(url).content for url in shards).decode()
+        for post in self.posts:
+            self.assertIn(f'<loc>http://testserver/aprenda-marketing/{post.slug}/</loc>', content)
+        self.assertEqual(content.count('<lastmod>'), len(self.posts))
+        self.assertEqual(self.client.get('/sitemap-outra-0.xml').status_code, 404)
+
+    def test_publish_rebuilds_only_its_shard(self):
+        from . import sitemap
+
+        first, last = self.posts[0], self.posts[-1]
+        self.assertNotEqual(self.shard_url(first), self.shard_url(last))
+        self.client.get(self.shard_url(first))
+        self.client.get(self.shard_url(last))
+
+        last.title = "Atualizado"
+        with self.captureOnCommitCallbacks(execute=True):
+            last.save_revision().publish()
+        with mock.patch.object(sitemap, 'build_shard', wraps=sitemap.build_shard) as build_shard:
+            self.client.get(self.shard_url(first))
+            self.client.get(self.shard_url(last))
+        self.assertEqual([call.args[3] for call in build_shard.call_args_list], [last.pk // 5])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            last.unpublish()
+        self.assertNotContains(self.client.get(self.shard_url(last)), f'/{last.slug}/')
+
+    def test_pages_outside_sections_are_ignored(self):
+        from pages.models import StandardPage
+
+        from . import sitemap
+
+        with mock.patch.object(sitemap, 'bump_shard') as bump_shard:
+            page = StandardPage(title="Sobre", slug="sobre-sitemap")
+            self.home.add_child(instance=page)
+            with self.captureOnCommitCallbacks(execute=True):
+                page.save_revision().publish()
+                page.delete()
+            bump_shard.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.posts[0].delete()
+            # Apagar uma página no ar também envia page_unpublished
+            self.assertEqual({call.args for call in bump_shard.call_args_list}, {('blog', self.posts[0].pk // 5)})
+
+
+class RenditionTests(TestCase):
+    """Registro de filtros, fila de objetos salvos e worker de renditions"""
+
+    def setUp(self):
+        from wagtail.images.models import Image
+        from wagtail.images.tests.utils import get_test_image_file
+
+        # O Wagtail guarda renditions no cache, e os ids das imagens se repetem entre testes
+        cache.clear()
+        self.image = Image.objects.create(title="Logo", file=get_test_image_file())
+
+    def add_partner(self, **kwargs):
+        from site_settings.models import PartnerLogo
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return PartnerLogo.objects.create(name="Parceiro", **kwargs)
+
+    def test_specs(self):
+        self.assertEqual(specs_for('case_logos'), ['max-80x80', 'max-50x50'])
+        self.assertEqual(
+            expand_specs(['format-{avif,webp} width-400', 'format-webp width-400']),
+            ['format-avif|width-400', 'format-webp|width-400'],
+        )
+        with self.assertRaises(KeyError):
+            specs_for('inexistente')
+
+    def test_save_only_enqueues(self):
+        partner = self.add_partner(logo=self.image)
+        self.add_partner()
+        # Modelo fora do registro não passa pelo handler
+        Upload.objects.create(purpose='resume', original_filename='cv.pdf', total_size=1)
+
+        self.assertEqual(
+            list(PendingRenditions.objects.values_list('model_label', 'object_id')),
+            [('site_settings.PartnerLogo', str(partner.pk))],
+        )
+        self.assertFalse(self.image.renditions.exists())
+
+    def test_queue_worker(self):
+        self.add_partner(logo=self.image)
+        call_command('generate_renditions', queue=True, once=True, workers=1, stdout=io.StringIO())
+
+        self.assertFalse(PendingRenditions.objects.exists())
+        self.assertEqual(list(self.image.renditions.values_list('filter_spec', flat=True)), ['height-40'])
+        self.assertEqual(missing_specs({self.image.pk: ['height-40']}), {})
+
+    def test_full_generation_command(self):
+        self.add_partner(logo=self.image)
+        out = io.StringIO()
+        call_command('generate_renditions', only=['partner_logos'], workers=1, stdout=out)
+        self.assertIn("Geradas 1 renditions, 0 já existiam", out.getvalue())
+
+        out = io.StringIO()
+        call_command('generate_renditions', only=['partner_logos'], workers=1, stdout=out)
+        self.assertIn("Geradas 0 renditions, 1 já existiam", out.getvalue())
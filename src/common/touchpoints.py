@@ -0,0 +1,451 @@
+"""
+Ingestão de touchpoints em lote para os funis de franquia e de leads.
+
+Os eventos chegam em lotes (array JSON ou payload de navigator.sendBeacon),
+são gravados em um arquivo de spool (JSON lines) e acumulados em um buffer
+limitado por processo. Uma thread persiste o buffer com bulk_create quando
+ele atinge FLUSH_SIZE ou a cada FLUSH_INTERVAL segundos.
+
+Garantias:
+- Durabilidade: um lote só é aceito depois de gravado (fsync) no spool. Se o
+  processo morrer antes do flush, o próximo processo a usar o buffer
+  reprocessa os spools órfãos (o dono de cada spool mantém um flock).
+- Backpressure: com o buffer cheio, a própria requisição faz um flush
+  síncrono; se ainda não houver espaço o lote é recusado com BufferFull.
+- Entrega pelo menos uma vez: um crash entre o bulk_create e a remoção do
+  spool pode duplicar os eventos daquele flush.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, close_old_connections, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Funis registrados: nome -> (modelo, campo do objeto pai)
+FUNNELS = {
+    'franchise': ('franchise.FranchiseTouchpoint', 'application_id'),
+    'leads': ('leads.Touchpoint', 'lead_id'),
+}
+
+DEFAULTS = {
+    'MAX_EVENTS': 5000,     # limite do buffer por processo
+    'FLUSH_SIZE': 200,      # flush ao atingir este número de eventos
+    'FLUSH_INTERVAL': 2.0,  # segundos; 0 desliga a thread (flush só por tamanho)
+    'MAX_BATCH': 100,       # eventos aceitos por requisição
+    'SPOOL_DIR': None,      # None desliga o spool (apenas memória)
+}
+
+
+class BufferFull(Exception):
+    """Buffer no limite e o flush síncrono não liberou espaço"""
+
+
+def buffer_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOUCHPOINT_BUFFER', {})}
+
+
+class TouchpointBuffer:
+    """Buffer limitado de eventos de um funil, com spool em disco"""
+
+    def __init__(self, name, model_label, parent_field, max_events, flush_size,
+                 flush_interval, spool_dir=None):
+        self.name = name
+        self.model_label = model_label
+        self.parent_field = parent_field
+        self.max_events = max_events
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.rows = []
+        # Segmentos de spool fechados cujos eventos ainda estão em self.rows
+        self.segments = []
+        self.segment = None
+        self.segment_path = None
+        self.sequence = 0
+        self.token = uuid.uuid4().hex
+        self.lock_file = None
+        self.started = False
+        self.closed = False
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    # Ciclo de vida
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                lock_path = os.path.join(self.spool_dir, f'{self.name}.{self.token}.lock')
+                # Travado com nome temporário (fora do glob de _recover_orphans) e só
+                # então renomeado: outro processo nunca vê o lock sem o flock
+                self.lock_file = open(f'{lock_path}.tmp', 'w')
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+                os.rename(f'{lock_path}.tmp', lock_path)
+                self._open_segment()
+                self._recover_orphans()
+        if self.flush_interval:
+            threading.Thread(target=self._run, name=f'touchpoints-{self.name}', daemon=True).start()
+        atexit.register(self.close)
+
+    def close(self):
+        """
+        Faz o último flush e libera o spool. Eventos que não puderam ser
+        gravados continuam no spool e são recuperados pelo próximo buffer.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Erro no flush final de touchpoints ({self.name}): {e}")
+        if self.lock_file is not None:
+            self.segment.close()
+            self.lock_file.close()  # libera o flock
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erro ao gravar touchpoints ({self.name}): {e}")
+
+    # Spool
+
+    def _open_segment(self):
+        self.sequence += 1
+        self.segment_path = os.path.join(
+            self.spool_dir, f'{self.name}.{self.token}.{self.sequence:06d}.jsonl'
+        )
+        self.segment = open(self.segment_path, 'a', encoding='utf-8')
+
+    def _rotate_segment(self):
+        """Fecha o segmento atual e abre um novo. Retorna o caminho fechado."""
+        self.segment.close()
+        closed = self.segment_path
+        self._open_segment()
+        return closed
+
+    def _spool(self, rows):
+        self.segment.write(''.join(json.dumps(row) + '\n' for row in rows))
+        self.segment.flush()
+        os.fsync(self.segment.fileno())
+
+    def _recover_orphans(self):
+        """Reprocessa spools de processos que morreram antes do flush"""
+        for lock_path in glob.glob(os.path.join(self.spool_dir, f'{self.name}.*.lock')):
+            token = os.path.basename(lock_path).split('.')[1]
+            if token == self.token:
+                continue
+            try:
+                fd = os.open(lock_path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)  # dono ainda vivo
+                continue
+            try:
+                orphans = sorted(glob.glob(os.path.join(self.spool_dir, f'{self.name}.{token}.*.jsonl')))
+                recovered = []
+                for path in orphans:
+                    with open(path, encoding='utf-8') as spool:
+                        # Uma linha truncada (crash durante a escrita) não foi confirmada
+                        for line in spool:
+                            try:
+                                recovered.append(json.loads(line))
+                            except ValueError:
+                                continue
+                if recovered:
+                    self._spool(recovered)
+                    self.rows.extend(recovered)
+                    logger.info(f"{len(recovered)} touchpoints recuperados do spool ({self.name})")
+                for path in orphans:
+                    os.remove(path)
+                os.remove(lock_path)
+            finally:
+                os.close(fd)
+
+    # Buffer
+
+    def add(self, rows):
+        """
+        Aceita eventos já normalizados (ver normalize_events).
+        Levanta BufferFull quando não há espaço mesmo após um flush.
+        """
+        if not rows:
+            return 0
+        self.start()
+
+        if len(self.rows) + len(rows) > self.max_events:
+            # Backpressure: a requisição paga o flush em vez de crescer o buffer
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erro no flush síncrono de touchpoints ({self.name}): {e}")
+
+        with self.lock:
+            if len(self.rows) + len(rows) > self.max_events:
+                raise BufferFull(f"Buffer de touchpoints cheio ({self.name})")
+            if self.spool_dir:
+                self._spool(rows)
+            self.rows.extend(rows)
+            reached = len(self.rows) >= self.flush_size
+
+        if reached:
+            if self.flush_interval:
+                self.wakeup.set()
+            else:
+                self.flush()
+        return len(rows)
+
+    def flush(self):
+        """Persiste o buffer com bulk_create. Retorna o número de eventos gravados."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.rows:
+                    return 0
+                rows, self.rows = self.rows, []
+                segments = self.segments
+                if self.segment is not None:
+                    segments = segments + [self._rotate_segment()]
+                self.segments = []
+
+            try:
+                written = self._write(rows)
+            except Exception:
+                # Devolve os eventos (e seus segmentos) para a próxima tentativa
+                with self.lock:
+                    self.rows[:0] = rows
+                    self.segments[:0] = segments
+                raise
+
+            for path in segments:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            return written
+
+    def _write(self, rows):
+        model = self.model
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(self._build(rows), batch_size=self.flush_size)
+            return len(rows)
+        except IntegrityError:
+            # Objetos pais removidos entre o aceite e o flush: descarta só esses eventos
+            existing = existing_parents(self.name, {row[self.parent_field] for row in rows})
+            valid = [row for row in rows if row[self.parent_field] in existing]
+            logger.warning(f"{len(rows) - len(valid)} touchpoints descartados sem objeto pai ({self.name})")
+            with transaction.atomic():
+                model.objects.bulk_create(self._build(valid), batch_size=self.flush_size)
+            return len(valid)
+
+    def _build(self, rows):
+        model = self.model
+        return [
+            model(**{**row, 'timestamp': parse_datetime(row['timestamp'])})
+            for row in rows
+        ]
+
+
+def parent_model(name):
+    model_label, parent_field = FUNNELS[name]
+    return apps.get_model(model_label)._meta.get_field(parent_field[:-len('_id')]).related_model
+
+
+def canonical_pk(model, value):
+    """PK normalizada como string (ex.: UUID com hífens) ou None se inválida"""
+    try:
+        return str(model._meta.pk.to_python(value))
+    except Exception:
+        return None
+
+
+def existing_parents(name, ids):
+    """PKs (como string) dos objetos pais que existem, em uma consulta"""
+    model = parent_model(name)
+    pks = {canonical_pk(model, value) for value in ids} - {None}
+    return {str(pk) for pk in model.objects.filter(pk__in=pks).values_list('pk', flat=True)}
+
+
+def parse_payload(body):
+    """
+    Lê o corpo da requisição: array de eventos, {"events": [...]} ou um único
+    evento. sendBeacon envia text/plain, então o content-type é ignorado.
+    Levanta ValueError para payloads inválidos.
+    """
+    payload = json.loads(body or b'null')
+    if isinstance(payload, dict):
+        payload = payload['events'] if 'events' in payload else [payload]
+    if not isinstance(payload, list) or not all(isinstance(event, dict) for event in payload):
+        raise ValueError('Payload deve ser um evento ou uma lista de eventos')
+    return payload
+
+
+def normalize_events(name, events, page_url=''):
+    """
+    Valida os eventos de um funil e os converte em linhas do buffer.
+    Retorna (linhas, rejeitados), onde rejeitados é [(índice, motivo)].
+    """
+    model_label, parent_field = FUNNELS[name]
+    event_types = {value for value, _ in apps.get_model(model_label).EVENT_TYPES}
+    parents = parent_model(name)
+
+    existing = existing_parents(name, {event.get(parent_field) for event in events if event.get(parent_field)})
+    now = timezone.now().isoformat()
+
+    rows, rejected = [], []
+    for index, event in enumerate(events):
+        parent_id = event.get(parent_field) and canonical_pk(parents, event.get(parent_field))
+        event_type = event.get('event_type')
+        event_data = event.get('event_data', {})
+        step_number = event.get('step_number')
+
+        if not event.get(parent_field) or not event_type:
+            rejected.append((index, f'{parent_field} e event_type são obrigatórios'))
+        elif event_type not in event_types:
+            rejected.append((index, 'event_type inválido'))
+        elif parent_id not in existing:
+            rejected.append((index, 'Objeto não encontrado'))
+        elif not isinstance(event_data, dict):
+            rejected.append((index, 'event_data deve ser um objeto'))
+        elif step_number is not None and not isinstance(step_number, int):
+            rejected.append((index, 'step_number deve ser inteiro'))
+        else:
+            rows.append(make_row(
+                name, parent_id, event_type, event_data, step_number,
+                event.get('page_url') or page_url, timestamp=now,
+            ))
+    return rows, rejected
+
+
+def make_row(name, parent_id, event_type, event_data=None, step_number=None, page_url='', timestamp=None):
+    """Linha do buffer (serializável em JSON) para um evento já validado"""
+    _, parent_field = FUNNELS[name]
+    return {
+        parent_field: str(parent_id),
+        'event_type': event_type,
+        'event_data': event_data or {},
+        'step_number': step_number,
+        'page_url': (page_url or '')[:200],
+        'timestamp': timestamp or timezone.now().isoformat(),
+    }
+
+
+def ingest(request, name):
+    """
+    Corpo comum dos endpoints de ingestão: valida o lote, enfileira os
+    eventos no buffer do funil e responde 202 com a contagem aceita.
+    """
+    try:
+        events = parse_payload(request.body)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Requisição inválida'
+        }, status=400)
+
+    if len(events) > buffer_settings()['MAX_BATCH']:
+        return JsonResponse({
+            'success': False,
+            'error': 'Lote de eventos muito grande'
+        }, status=413)
+
+    try:
+        rows, rejected = normalize_events(name, events, request.META.get('HTTP_REFERER', ''))
+        if not rows:
+            return JsonResponse({
+                'success': False,
+                'error': rejected[0][1] if rejected else 'Nenhum evento enviado',
+                'rejected': len(rejected)
+            }, status=400)
+
+        try:
+            accepted = get_buffer(name).add(rows)
+        except BufferFull:
+            response = JsonResponse({
+                'success': False,
+                'error': 'Serviço temporariamente sobrecarregado'
+            }, status=503)
+            response['Retry-After'] = '5'
+            return response
+
+        return JsonResponse({
+            'success': True,
+            'accepted': accepted,
+            'rejected': len(rejected)
+        }, status=202)
+
+    except Exception as e:
+        # Detalhes só no log; a resposta é pública
+        logger.error(f"Erro na ingestão de touchpoints ({name}): {e}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Erro interno ao registrar os eventos'
+        }, status=500)
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def get_buffer(name):
+    """Buffer do funil neste processo, criado a partir de TOUCHPOINT_BUFFER"""
+    with _buffers_lock:
+        if name not in _buffers:
+            config = buffer_settings()
+            model_label, parent_field = FUNNELS[name]
+            _buffers[name] = TouchpointBuffer(
+                name, model_label, parent_field,
+                max_events=config['MAX_EVENTS'],
+                flush_size=config['FLUSH_SIZE'],
+                flush_interval=config['FLUSH_INTERVAL'],
+                spool_dir=config['SPOOL_DIR'],
+            )
+        return _buffers[name]
+
+
+def flush_all():
+    return sum(buffer.flush() for buffer in list(_buffers.values()))
+
+
+def reset_buffers(**kwargs):
+    """Recria os buffers quando TOUCHPOINT_BUFFER muda (ex.: override_settings)"""
+    if kwargs.get('setting') != 'TOUCHPOINT_BUFFER':
+        return
+    with _buffers_lock:
+        for buffer in _buffers.values():
+            buffer.close()
+        _buffers.clear()
+
+
+setting_changed.connect(reset_buffers)
@@ -0,0 +1,520 @@
+"""
+Uploads em partes, retomáveis e com limite de tamanho.
+
+Fluxo:
+1. POST /api/uploads/ com {purpose, filename, size}: valida extensão e
+   tamanho máximo da finalidade e cria a sessão (Upload).
+2. PATCH /api/uploads/<id>/ com o cabeçalho Upload-Offset e os bytes da
+   parte no corpo. O corpo é lido em blocos direto para o arquivo de
+   staging (nunca inteiro em memória) e gravado com fsync; HEAD devolve o
+   offset atual para retomar após uma queda.
+3. Quando o último byte chega, o tipo é detectado pelo conteúdo (só o
+   início do arquivo): se não bate com os tipos aceitos, o upload é
+   rejeitado (415); senão o arquivo vai para o storage padrão e a resposta
+   volta imediatamente (status 'stored').
+4. O worker `manage.py process_uploads` faz o pós-processamento: nova
+   conferência do tipo, extração de texto (PDF/DOCX) e miniatura de
+   imagens. Cada upload é reservado ('processing' com lease_until), então
+   dois workers nunca processam o mesmo arquivo; falhas transitórias
+   (storage, banco) voltam para a fila até MAX_ATTEMPTS.
+
+Os endpoints são anônimos: cada IP pode ter no máximo MAX_PENDING_PER_IP
+uploads não vinculados, e uploads que nunca foram vinculados a um
+formulário são apagados (arquivo e registro) após UNATTACHED_TTL.
+
+O formulário referencia o upload pelo id (ex.: resume_upload_id) e o
+arquivo é vinculado sem nova cópia (take_upload).
+"""
+import fcntl
+import io
+import ipaddress
+import json
+import logging
+import os
+import re
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .signals import upload_processed
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+READ_BLOCK = 64 * 1024
+
+PDF = 'application/pdf'
+DOC = 'application/msword'
+DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+PNG = 'image/png'
+JPEG = 'image/jpeg'
+
+EXTENSIONS = {'.pdf': PDF, '.doc': DOC, '.docx': DOCX, '.png': PNG, '.jpg': JPEG, '.jpeg': JPEG}
+
+DEFAULTS = {
+    'STAGING_DIR': None,           # None: MEDIA_ROOT/uploads/partial
+    'MAX_CHUNK_SIZE': 5 * MB,
+    'EXPIRE_AFTER': 24 * 60 * 60,  # segundos até uma sessão incompleta ser descartada
+    'UNATTACHED_TTL': 24 * 60 * 60,  # segundos até um upload concluído e não vinculado ser apagado
+    'MAX_PENDING_PER_IP': 10,      # uploads não vinculados por IP
+    'LEASE': 10 * 60,              # segundos de reserva de um upload pelo worker
+    'RETRY_DELAY': 60,             # segundos (x tentativas) até retomar após falha transitória
+    'MAX_ATTEMPTS': 5,
+    'MAX_TEXT_LENGTH': 100_000,
+    'THUMBNAIL_SIZE': (320, 320),
+    'LIMITS': {
+        'resume': {'max_size': 10 * MB, 'types': [PDF, DOC, DOCX]},
+        'franchise_document': {'max_size': 20 * MB, 'types': [PDF, DOC, DOCX, PNG, JPEG]},
+    },
+}
+
+
+class UploadError(Exception):
+    """Erro de validação de upload, com o status HTTP correspondente"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def upload_settings():
+    options = {**DEFAULTS, **getattr(settings, 'UPLOADS', {})}
+    if not options['STAGING_DIR']:
+        options['STAGING_DIR'] = os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial')
+    return options
+
+
+def staging_path(upload):
+    return os.path.join(upload_settings()['STAGING_DIR'], f"{upload.pk}.part")
+
+
+def clean_filename(filename):
+    name = os.path.basename(str(filename or '')).strip()
+    return re.sub(r'[^\w.\- ]', '_', name)[:255]
+
+
+# Criação e recebimento das partes ------------------------------------------
+
+def client_ip(request):
+    """IP real do cliente (primeiro do X-Forwarded-For atrás do nginx)"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
+    for candidate in (forwarded, request.META.get('REMOTE_ADDR')):
+        try:
+            return str(ipaddress.ip_address(candidate))
+        except ValueError:
+            continue
+    return None
+
+
+def create_upload(purpose, filename, size, declared_type='', ip=None):
+    from .models import Upload
+
+    options = upload_settings()
+    limits = options['LIMITS'].get(purpose)
+    if limits is None:
+        raise UploadError("Finalidade de upload inválida")
+
+    filename = clean_filename(filename)
+    extension = os.path.splitext(filename)[1].lower()
+    if EXTENSIONS.get(extension) not in limits['types']:
+        raise UploadError("Tipo de arquivo não permitido")
+
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("Tamanho do arquivo inválido")
+    if size <= 0:
+        raise UploadError("Tamanho do arquivo inválido")
+    if size > limits['max_size']:
+        raise UploadError(f"Arquivo maior que o limite de {limits['max_size'] // MB} MB", status=413)
+
+    if ip and Upload.objects.filter(
+        client_ip=ip, attached_at__isnull=True,
+    ).exclude(status='rejected').count() >= options['MAX_PENDING_PER_IP']:
+        raise UploadError("Muitos uploads pendentes; tente novamente mais tarde", status=429)
+
+    upload = Upload.objects.create(
+        purpose=purpose, original_filename=filename, total_size=size, declared_type=declared_type[:100],
+        client_ip=ip,
+    )
+    os.makedirs(options['STAGING_DIR'], exist_ok=True)
+    open(staging_path(upload), 'wb').close()
+    return upload
+
+
+def current_offset(upload):
+    """Bytes já gravados: o arquivo de staging é a fonte da verdade"""
+    if upload.status != 'uploading':
+        return upload.total_size
+    try:
+        return os.path.getsize(staging_path(upload))
+    except FileNotFoundError:
+        return 0
+
+
+def receive_chunk(upload, offset, stream, length):
+    """
+    Grava uma parte a partir de `offset`, lendo `stream` em blocos.
+    Retorna o novo offset; finaliza o upload ao completar.
+    """
+    options = upload_settings()
+    if upload.status != 'uploading':
+        raise UploadError("Upload já concluído", status=409)
+    if length > options['MAX_CHUNK_SIZE']:
+        raise UploadError("Parte maior que o limite permitido", status=413)
+
+    with open(staging_path(upload), 'r+b') as staging:
+        try:
+            fcntl.flock(staging, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError("Outra parte deste upload está sendo enviada", status=409)
+
+        size = os.fstat(staging.fileno()).st_size
+        if offset != size:
+            raise UploadError("Offset divergente", status=409)
+        if offset + length > upload.total_size:
+            raise UploadError("Conteúdo maior que o tamanho declarado", status=413)
+
+        staging.seek(offset)
+        remaining = length
+        try:
+            while remaining:
+                block = stream.read(min(READ_BLOCK, remaining))
+                if not block:
+                    break
+                staging.write(block)
+                remaining -= len(block)
+        finally:
+            # O que chegou fica gravado; o cliente retoma do novo offset
+            staging.flush()
+            os.fsync(staging.fileno())
+        offset = staging.tell()
+
+    upload.received = offset
+    upload.save(update_fields=['received'])
+    if offset == upload.total_size:
+        store(upload)
+    return offset
+
+
+def fsync_stored(name):
+    """Garante que o arquivo salvo no storage local chegou ao disco"""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        return  # storages remotos confirmam a gravação ao responder
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def store(upload):
+    """
+    Confere o tipo pelo conteúdo e move o arquivo completo do staging para o
+    storage padrão. Um upload só chega a 'stored' com o tipo já conferido,
+    então pode ser vinculado antes do pós-processamento.
+    """
+    path = staging_path(upload)
+    with open(path, 'rb') as staging:
+        upload.detected_type = sniff_type(staging.read(16), staging)
+        if upload.detected_type not in upload_settings()['LIMITS'][upload.purpose]['types']:
+            upload.status = 'rejected'
+            upload.error = f"Conteúdo do arquivo não corresponde a um tipo permitido ({upload.detected_type})"
+            upload.save(update_fields=['detected_type', 'status', 'error'])
+            os.remove(path)
+            logger.warning(f"Upload {upload.pk} rejeitado: {upload.error}")
+            raise UploadError(upload.error, status=415)
+
+        staging.seek(0)
+        name = upload.file.field.generate_filename(upload, upload.original_filename)
+        upload.file.name = default_storage.save(name, File(staging))
+    fsync_stored(upload.file.name)
+    upload.status = 'stored'
+    upload.stored_at = timezone.now()
+    upload.save(update_fields=['file', 'detected_type', 'status', 'stored_at'])
+    os.remove(path)
+    logger.info(f"Upload {upload.pk} armazenado em {upload.file.name}")
+
+
+def take_upload(upload_id, purpose):
+    """
+    Vincula um upload concluído a um formulário (uma única vez) e devolve
+    o Upload. Deve ser chamado dentro da transação do formulário.
+    """
+    from .models import Upload
+
+    try:
+        upload = Upload.objects.select_for_update().get(
+            pk=upload_id, purpose=purpose, status__in=['stored', 'processing', 'processed'], attached_at__isnull=True,
+        )
+    except (Upload.DoesNotExist, ValidationError, ValueError, TypeError):
+        # Inclui ids malformados
+        raise UploadError("Upload não encontrado ou incompleto")
+    upload.attached_at = timezone.now()
+    upload.save(update_fields=['attached_at'])
+    return upload
+
+
+def check_file_size(uploaded_file, purpose):
+    """Limite para os formulários que ainda recebem multipart (request.FILES)"""
+    limit = upload_settings()['LIMITS'][purpose]['max_size']
+    if uploaded_file.size > limit:
+        raise UploadError(f"Arquivo maior que o limite de {limit // MB} MB", status=413)
+
+
+# Pós-processamento ----------------------------------------------------------
+
+def sniff_type(head, fileobj=None):
+    """Tipo real do arquivo a partir dos primeiros bytes"""
+    if head.startswith(b'%PDF-'):
+        return PDF
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return PNG
+    if head.startswith(b'\xff\xd8\xff'):
+        return JPEG
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return DOC
+    if head.startswith(b'PK\x03\x04') and fileobj is not None:
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                if 'word/document.xml' in archive.namelist():
+                    return DOCX
+        except zipfile.BadZipFile:
+            pass
+        return 'application/zip'
+    return 'application/octet-stream'
+
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def extract_docx_text(fileobj):
+    with zipfile.ZipFile(fileobj) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = []
+    for paragraph in root.iter(f'{WORD_NAMESPACE}p'):
+        text = ''.join(node.text or '' for node in paragraph.iter(f'{WORD_NAMESPACE}t'))
+        if text:
+            paragraphs.append(text)
+    return '\n'.join(paragraphs)
+
+
+def extract_pdf_text(fileobj):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.info("pypdf não instalado; extração de texto de PDF desativada")
+        return ''
+    reader = PdfReader(fileobj)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def make_thumbnail(fileobj, size):
+    from PIL import Image
+
+    with Image.open(fileobj) as image:
+        image.thumbnail(size)
+        output = io.BytesIO()
+        image.convert('RGB').save(output, 'JPEG', quality=80)
+    return ContentFile(output.getvalue())
+
+
+def process_upload(upload):
+    """Detecta o tipo, extrai texto e gera miniatura de um upload armazenado"""
+    options = upload_settings()
+    with upload.file.open('rb') as stored:
+        data = io.BytesIO(stored.read())
+
+    detected = sniff_type(data.getvalue()[:16], data)
+    upload.detected_type = detected
+    upload.lease_until = None
+    update_fields = ['detected_type', 'status', 'processed_at', 'error', 'lease_until']
+
+    if detected not in options['LIMITS'][upload.purpose]['types']:
+        upload.status = 'rejected'
+        upload.error = f"Conteúdo do arquivo não corresponde a um tipo permitido ({detected})"
+        logger.warning(f"Upload {upload.pk} rejeitado: {upload.error}")
+    else:
+        upload.status = 'processed'
+        upload.error = ''
+        try:
+            data.seek(0)
+            if detected == DOCX:
+                text = extract_docx_text(data)
+            elif detected == PDF:
+                text = extract_pdf_text(data)
+            else:
+                text = ''
+            upload.extracted_text = text[:options['MAX_TEXT_LENGTH']]
+            update_fields.append('extracted_text')
+
+            if detected in (PNG, JPEG):
+                data.seek(0)
+                upload.thumbnail.save(
+                    f"{upload.pk}.jpg", make_thumbnail(data, options['THUMBNAIL_SIZE']), save=False,
+                )
+                update_fields.append('thumbnail')
+        except Exception as e:
+            # Falha na extração não invalida o arquivo
+            upload.error = f"{type(e).__name__}: {e}"[:2000]
+            logger.error(f"Erro no pós-processamento do upload {upload.pk}: {upload.error}")
+
+    upload.processed_at = timezone.now()
+    upload.save(update_fields=update_fields)
+    if upload.status == 'processed':
+        upload_processed.send(sender=type(upload), upload=upload)
+    return upload
+
+
+def claim_stored(batch_size):
+    """
+    Reserva uploads armazenados ainda não processados (ou com a reserva
+    vencida): passam a 'processing' na mesma transação do lock, então outro
+    worker não os pega de novo.
+    """
+    from .models import Upload
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Upload.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='stored') | Q(status='processing', lease_until__lte=now))
+            .order_by('stored_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        Upload.objects.filter(pk__in=ids).update(
+            status='processing',
+            attempts=F('attempts') + 1,
+            lease_until=now + timedelta(seconds=upload_settings()['LEASE']),
+        )
+    return list(Upload.objects.filter(pk__in=ids).order_by('stored_at'))
+
+
+def record_failure(upload, exc, options):
+    """Conteúdo inválido rejeita; falhas transitórias voltam para a fila"""
+    upload.error = f"{type(exc).__name__}: {exc}"[:2000]
+    if isinstance(exc, UploadError) or upload.attempts >= options['MAX_ATTEMPTS']:
+        upload.status = 'rejected'
+        logger.error(f"Upload {upload.pk} rejeitado após {upload.attempts} tentativa(s): {upload.error}")
+    else:
+        # Continua 'processing'; a reserva vencida libera a nova tentativa
+        upload.lease_until = timezone.now() + timedelta(seconds=options['RETRY_DELAY'] * upload.attempts)
+        logger.warning(f"Falha transitória no upload {upload.pk} (tentativa {upload.attempts}): {upload.error}")
+    upload.save(update_fields=['status', 'error', 'lease_until'])
+
+
+def process_pending(batch_size=20):
+    """Processa todos os uploads pendentes. Retorna o total processado."""
+    options = upload_settings()
+    total = 0
+    while True:
+        close_old_connections()
+        uploads = claim_stored(batch_size)
+        if not uploads:
+            return total
+        for upload in uploads:
+            try:
+                process_upload(upload)
+            except Exception as e:
+                record_failure(upload, e, options)
+            total += 1
+
+
+def delete_files(upload):
+    for field in (upload.file, upload.thumbnail):
+        if field:
+            field.delete(save=False)
+
+
+def expire_incomplete():
+    """
+    Remove sessões incompletas mais antigas que EXPIRE_AFTER e uploads
+    concluídos que ninguém vinculou em UNATTACHED_TTL (arquivos inclusive).
+    """
+    from .models import Upload
+
+    options = upload_settings()
+    now = timezone.now()
+    expired = Upload.objects.filter(status='uploading', created_at__lt=now - timedelta(seconds=options['EXPIRE_AFTER']))
+    total = 0
+    for upload in expired:
+        try:
+            os.remove(staging_path(upload))
+        except FileNotFoundError:
+            pass
+        upload.delete()
+        total += 1
+
+    with transaction.atomic():
+        # O lock impede que take_upload vincule um upload sendo apagado
+        unattached = list(
+            Upload.objects
+            .select_for_update(skip_locked=True)
+            .filter(attached_at__isnull=True, created_at__lt=now - timedelta(seconds=options['UNATTACHED_TTL']))
+            .exclude(status='uploading')
+        )
+        Upload.objects.filter(pk__in=[upload.pk for upload in unattached]).delete()
+    for upload in unattached:
+        delete_files(upload)
+    return total + len(unattached)
+
+
+# Views ----------------------------------------------------------------------
+
+def upload_response(upload, status=200):
+    return JsonResponse({
+        'success': True,
+        'upload_id': str(upload.pk),
+        'offset': current_offset(upload),
+        'size': upload.total_size,
+        'status': upload.status,
+    }, status=status)
+
+
+def start_upload(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+    try:
+        upload = create_upload(
+            data.get('purpose'), data.get('filename'), data.get('size'), data.get('content_type') or '',
+            ip=client_ip(request),
+        )
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+    response = upload_response(upload, status=201)
+    response['Upload-Offset'] = '0'
+    return response
+
+
+def upload_chunk(request, upload):
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Cabeçalhos Upload-Offset e Content-Length são obrigatórios'}, status=400)
+    try:
+        offset = receive_chunk(upload, offset, request, length)
+    except UploadError as e:
+        response = JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+        response['Upload-Offset'] = str(current_offset(upload))
+        return response
+    response = upload_response(upload, status=201 if upload.status == 'stored' else 200)
+    response['Upload-Offset'] = str(offset)
+    return response
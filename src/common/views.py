@@ -0,0 +1,52 @@
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from wagtail.models import Site
+
+from . import sitemap
+from .models import Upload
+from .uploads import current_offset, start_upload, upload_chunk, upload_response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def uploads(request):
+    """Cria uma sessão de upload em partes"""
+    return start_upload(request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "HEAD", "PATCH"])
+def upload_detail(request, upload_id):
+    """HEAD/GET: offset atual para retomar; PATCH: envia a próxima parte"""
+    upload = get_object_or_404(Upload, pk=upload_id)
+    if request.method == 'PATCH':
+        return upload_chunk(request, upload)
+    response = upload_response(upload)
+    response['Upload-Offset'] = str(current_offset(upload))
+    return response
+
+
+def sitemap_site(request):
+    site = Site.find_for_request(request)
+    if site is None:
+        raise Http404
+    # URLs absolutas no domínio que recebeu a requisição
+    return site, f"{request.scheme}://{request.get_host()}"
+
+
+@require_GET
+def sitemap_index(request):
+    """Índice dos shards do sitemap (common.sitemap)"""
+    site, base_url = sitemap_site(request)
+    return HttpResponse(sitemap.get_index(site, base_url), content_type='application/xml')
+
+
+@require_GET
+def sitemap_shard(request, section, shard):
+    """Um shard de uma seção do sitemap"""
+    if section not in sitemap.SECTIONS or sitemap.section_model(section) is None:
+        raise Http404
+    site, base_url = sitemap_site(request)
+    return HttpResponse(sitemap.get_shard(site, base_url, section, shard), content_type='application/xml')
@@ -0,0 +1,156 @@
+"""
+Catálogo de localizações (escritórios) da Kaizen.
+
+As localizações ativas, já ordenadas, e o JSON-LD de cada uma ficam
+serializados em um único objeto em cache, junto com os índices de busca por
+proximidade (latitude/longitude) e por prefixo de CEP. Salvar ou remover uma
+Location troca a versão do catálogo (ver companies.signals).
+"""
+import json
+import math
+import re
+import time
+
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+CATALOGUE_VERSION_KEY = 'companies:locations:version'
+CATALOGUE_TIMEOUT = 60 * 60 * 24  # 24 horas
+EARTH_RADIUS_KM = 6371.0
+CEP_PREFIX_LENGTHS = (5, 4, 3, 2, 1)
+
+# Caracteres escapados para que o JSON possa ficar dentro de <script>
+SCRIPT_ESCAPES = {ord('<'): '\\u003C', ord('>'): '\\u003E', ord('&'): '\\u0026'}
+
+
+def dump_json(data):
+    """Serializa para uso seguro em <script type="application/ld+json">"""
+    return json.dumps(data, ensure_ascii=False).translate(SCRIPT_ESCAPES)
+
+
+def normalize_cep(cep):
+    return re.sub(r'\D', '', cep or '')
+
+
+def build_catalogue(version=0):
+    """Monta o catálogo com uma única consulta ao banco"""
+    from .models import Location
+
+    locations = list(Location.objects.filter(is_active=True).order_by('order', 'city'))
+    jsonld = {location.pk: location.jsonld() for location in locations}
+
+    item_list = {
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": position, "item": jsonld[location.pk]}
+            for position, location in enumerate(locations, start=1)
+        ],
+    }
+    map_points = [
+        {
+            "city": location.city,
+            "state": location.state,
+            "lat": float(location.latitude) if location.latitude is not None else None,
+            "lng": float(location.longitude) if location.longitude is not None else None,
+            "maps_url": location.maps_url,
+            "address": location.address,
+        }
+        for location in locations
+    ]
+
+    # Índices de busca: coordenadas e prefixos de CEP (a primeira na ordem vence)
+    geo = [
+        (float(location.latitude), float(location.longitude), location.pk)
+        for location in locations
+        if location.latitude is not None and location.longitude is not None
+    ]
+    cep_index = {}
+    for location in locations:
+        cep = normalize_cep(location.postal_code)
+        for length in CEP_PREFIX_LENGTHS:
+            if len(cep) >= length:
+                cep_index.setdefault(cep[:length], location.pk)
+
+    return {
+        'version': version,
+        'locations': locations,
+        'jsonld': {pk: dump_json(data) for pk, data in jsonld.items()},
+        'itemlist_jsonld': dump_json(item_list),
+        'addresses_jsonld': dump_json([jsonld[location.pk]['address'] for location in locations]),
+        'map_json': dump_json(map_points),
+        'geo': geo,
+        'cep_index': cep_index,
+    }
+
+
+def get_catalogue():
+    """Catálogo atual, do cache ou reconstruído"""
+    version = cache.get(CATALOGUE_VERSION_KEY) or 0
+    key = f'companies:locations:catalogue:{version}'
+    catalogue = cache.get(key)
+    if catalogue is None:
+        catalogue = build_catalogue(version)
+        cache.set(key, catalogue, CATALOGUE_TIMEOUT)
+    return catalogue
+
+
+def location_context():
+    """Variáveis de contexto das páginas que listam as localizações"""
+    catalogue = get_catalogue()
+    return {
+        'locations': catalogue['locations'],
+        'locations_version': catalogue['version'],
+        'locations_jsonld': mark_safe(catalogue['itemlist_jsonld']),
+        'locations_addresses_jsonld': mark_safe(catalogue['addresses_jsonld']),
+        'locations_map_json': mark_safe(catalogue['map_json']),
+    }
+
+
+def invalidate_catalogue():
+    """Troca a versão do catálogo (e dos fragmentos de template que a usam)"""
+    cache.set(CATALOGUE_VERSION_KEY, time.time_ns(), None)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _location_by_pk(catalogue, pk):
+    for location in catalogue['locations']:
+        if location.pk == pk:
+            return location
+    return None
+
+
+def nearest_location(latitude, longitude):
+    """
+    Unidade mais próxima das coordenadas informadas.
+    Retorna (location, distância em km) ou (None, None).
+    """
+    catalogue = get_catalogue()
+    if not catalogue['geo']:
+        return None, None
+    distance, pk = min(
+        (haversine_km(latitude, longitude, lat, lng), pk)
+        for lat, lng, pk in catalogue['geo']
+    )
+    return _location_by_pk(catalogue, pk), distance
+
+
+def location_for_cep(cep):
+    """
+    Unidade com o maior prefixo de CEP em comum (os primeiros dígitos do CEP
+    indicam região, sub-região e setor). Retorna None se nenhum casar.
+    """
+    cep = normalize_cep(cep)
+    catalogue = get_catalogue()
+    for length in CEP_PREFIX_LENGTHS:
+        if len(cep) >= length and cep[:length] in catalogue['cep_index']:
+            return _location_by_pk(catalogue, catalogue['cep_index'][cep[:length]])
+    return None
@@ -8,6 +8,7 @@ from wagtail.snippets.models import register_snippet
 from wagtail import blocks
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
+from common.profiling import QueryBudget
 
 
 @register_snippet
@@ -171,6 +172,8 @@ class CompaniesIndexPage(Page):
     """
     Página índice das empresas (Nossas Empresas)
     """
+    query_budget = QueryBudget(queries=30, duplicates=8)
+
     intro = RichTextField(blank=True, help_text="Texto introdutório da página")
     hero_title = models.CharField(
         max_length=200, 
@@ -220,6 +223,8 @@ class CompanyDetailPage(Page):
     """
     Página de detalhes de uma empresa específica
     """
+    query_budget = QueryBudget(queries=30, duplicates=8)
+
     company = models.ForeignKey(
         Company,
         on_delete=models.SET_NULL,
@@ -368,6 +373,8 @@ class LocationPage(Page):
     """
     Página "Onde Estamos" com localizações da Kaizen
     """
+    query_budget = QueryBudget(queries=30, duplicates=8)
+
     # Hero Section
     hero_title = models.CharField(
         max_length=200, 
@@ -510,8 +517,9 @@ class LocationPage(Page):
     ]
     
     def get_context(self, request):
+        from .locations import location_context
         context = super().get_context(request)
-        context['locations'] = Location.objects.filter(is_active=True).order_by('order', 'city')
+        context.update(location_context())
         return context
 
 
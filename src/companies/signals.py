@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+
+from .locations import invalidate_catalogue
+from .models import Location
+
+
+def invalidate_location_catalogue(sender, **kwargs):
+    invalidate_catalogue()
+
+
+post_save.connect(invalidate_location_catalogue, sender=Location)
+post_delete.connect(invalidate_location_catalogue, sender=Location)
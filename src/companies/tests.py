@@ -1,3 +1,58 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .locations import get_catalogue, location_context, location_for_cep, nearest_location
+from .models import Location
+
+
+class LocationCatalogueTests(TestCase):
+    """Catálogo de localizações em cache, JSON-LD e índices de busca"""
+
+    def setUp(self):
+        cache.clear()
+        self.poa = Location.objects.create(
+            city="Porto Alegre", state="RS", address="Av. Ipiranga, 40",
+            postal_code="90160-090", latitude=Decimal('-30.0346'), longitude=Decimal('-51.2177'),
+            order=1,
+        )
+        self.sp = Location.objects.create(
+            city="São Paulo", state="SP", address='Av. Paulista, 1000 "Torre </script>"',
+            postal_code="01310-100", latitude=Decimal('-23.5614'), longitude=Decimal('-46.6559'),
+            order=0,
+        )
+
+    def test_cached_catalogue_has_no_queries(self):
+        get_catalogue()
+        with self.assertNumQueries(0):
+            context = location_context()
+        self.assertEqual([loc.city for loc in context['locations']], ["São Paulo", "Porto Alegre"])
+
+    def test_jsonld_is_valid_and_script_safe(self):
+        context = location_context()
+        self.assertNotIn('</script>', context['locations_jsonld'])
+        data = json.loads(context['locations_jsonld'])
+        self.assertEqual(data['@type'], 'ItemList')
+        self.assertEqual(data['itemListElement'][0]['item']['address']['addressLocality'], "São Paulo")
+
+    def test_save_and_delete_invalidate_catalogue(self):
+        get_catalogue()
+        self.poa.is_active = False
+        self.poa.save()
+        self.assertEqual([loc.pk for loc in get_catalogue()['locations']], [self.sp.pk])
+        self.sp.delete()
+        self.assertEqual(get_catalogue()['locations'], [])
+
+    def test_nearest_location(self):
+        # Canoas fica ao lado de Porto Alegre; Campinas, de São Paulo
+        location, distance = nearest_location(-29.9178, -51.1839)
+        self.assertEqual(location.pk, self.poa.pk)
+        self.assertLess(distance, 20)
+        self.assertEqual(nearest_location(-22.9099, -47.0626)[0].pk, self.sp.pk)
+
+    def test_location_for_cep(self):
+        self.assertEqual(location_for_cep("90010-000").pk, self.poa.pk)
+        self.assertEqual(location_for_cep("01001000").pk, self.sp.pk)
+        self.assertIsNone(location_for_cep("5"))
@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from .models import EmailTemplate, OutboundEmail
+from .outbox import requeue_dead
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'category', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'category', 'created_at']
+    search_fields = ['subject', 'to', 'last_error']
+    readonly_fields = ['attempts', 'last_error', 'sent_at', 'created_at', 'content_type', 'object_id', 'status_field']
+    ordering = ['-created_at']
+    actions = ['requeue']
+
+    @admin.action(description="Reenviar emails em dead-letter")
+    def requeue(self, request, queryset):
+        requeued = requeue_dead(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f"{requeued} email(s) devolvidos para a fila")
+
+
+@admin.register(EmailTemplate)
+class EmailTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'is_active', 'updated_at']
+    list_filter = ['category', 'is_active']
+    search_fields = ['name', 'subject']
@@ -6,12 +6,13 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 import json
 import re
 
 from .models import ContactMessage
+from .outbox import enqueue
 
 
 def contact_page(request):
@@ -107,13 +108,14 @@ def handle_contact_form(request):
         captation_means = request.POST.get('captation_means', '[KAIZEN] Site')
         customer_domain = request.POST.get('customer_domain', '')
         
-        # Criar mensagem de contato
-        contact_message = ContactMessage.objects.create(
-            name=name,
-            email=email,
-            phone=phone,
-            company=f"{area} - {faturamento}",
-            message=f"""
+        # Criar mensagem de contato e enfileirar a notificação na mesma transação
+        with transaction.atomic():
+            contact_message = ContactMessage.objects.create(
+                name=name,
+                email=email,
+                phone=phone,
+                company=f"{area} - {faturamento}",
+                message=f"""
 Mensagem: {message}
 
 Área: {area}
@@ -123,23 +125,20 @@ Website: {website or 'Não informado'}
 Categoria: {subject_category}
 Meio de Captação: {captation_means}
 Domínio: {customer_domain}
-            """,
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            page_url=request.META.get('HTTP_REFERER', ''),
-            utm_source=utm_source,
-            utm_medium=utm_medium,
-            utm_campaign=utm_campaign,
-            utm_term=utm_term,
-            utm_content=utm_content,
-        )
-        
-        # Enviar email de notificação (se configurado)
-        if hasattr(settings, 'EMAIL_HOST') and settings.EMAIL_HOST:
-            try:
-                send_mail(
-                    subject=f'[KAIZEN] Novo contato: {name}',
-                    message=f"""
+                """,
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                page_url=request.META.get('HTTP_REFERER', ''),
+                utm_source=utm_source,
+                utm_medium=utm_medium,
+                utm_campaign=utm_campaign,
+                utm_term=utm_term,
+                utm_content=utm_content,
+            )
+            enqueue(
+                subject=f'[KAIZEN] Novo contato: {name}',
+                to=[settings.DEFAULT_FROM_EMAIL],
+                body=f"""
 Novo contato recebido:
 
 Nome: {name}
@@ -155,13 +154,11 @@ Mensagem:
 UTM Source: {utm_source}
 UTM Medium: {utm_medium}
 UTM Campaign: {utm_campaign}
-                    """,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.DEFAULT_FROM_EMAIL],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                print(f"Erro ao enviar email: {e}")
+                """,
+                category='contact_notification',
+                related=contact_message,
+                status_field='email_sent',
+            )
         
         # Sucesso
         messages.success(request, 'Mensagem enviada com sucesso! Entraremos em contato em breve.')
@@ -175,9 +172,10 @@ UTM Campaign: {utm_campaign}
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def contact_ajax(request):
+async def contact_ajax(request):
     """
-    View AJAX para formulário de contato
+    View AJAX para formulário de contato (assíncrona: sob ASGI não prende um
+    worker enquanto espera o banco)
     """
     try:
         # Aceita tanto JSON quanto form-data (FormData)
@@ -258,7 +256,7 @@ def contact_ajax(request):
         utm_content = data.get('utm_content', '')
         
         # Criar mensagem
-        contact_message = ContactMessage.objects.create(
+        await ContactMessage.objects.acreate(
             name=name,
             email=email,
             phone=phone,
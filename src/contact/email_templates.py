@@ -0,0 +1,174 @@
+"""
+Registro de templates de email compilados.
+
+Os EmailTemplate ativos são carregados em uma única consulta, compilados
+com o engine de templates do Django (HTML com autoescape; assunto e texto
+sem) e mantidos por processo, indexados por categoria. A versão do registro
+fica no cache compartilhado: salvar ou remover um template troca a versão
+(ver contact.signals) e todos os processos recompilam na próxima leitura.
+Sem cache compartilhado, a cópia local expira após LOCAL_TTL segundos.
+
+Categorias sem template no banco usam os padrões definidos em DEFAULTS.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.template import Context, engines
+
+REGISTRY_VERSION_KEY = 'contact:email_templates:version'
+LOCAL_TTL = 60  # segundos
+
+# Templates padrão: categoria -> (assunto, HTML, texto)
+DEFAULTS = {
+    'contact_notification': (
+        "Nova mensagem de contato: {{ name }}",
+        """
+<h2>Nova mensagem de contato recebida</h2>
+<p><strong>Nome:</strong> {{ name }}</p>
+<p><strong>Email:</strong> {{ email }}</p>
+<p><strong>Telefone:</strong> {{ phone }}</p>
+<p><strong>Empresa:</strong> {{ company }}</p>
+<p><strong>Assunto:</strong> {{ subject }}</p>
+<p><strong>Mensagem:</strong></p>
+<p>{{ message|linebreaksbr }}</p>
+<hr>
+<p><small>Enviado em: {{ created_at|date:"d/m/Y H:i" }}</small></p>
+<p><small>IP: {{ ip_address }}</small></p>
+<p><small>Página: {{ page_url }}</small></p>
+""",
+        "Nova mensagem de {{ name }}: {{ message }}",
+    ),
+    'contact_confirmation': (
+        "Recebemos sua mensagem - Agência Kaizen",
+        """
+<h2>Olá, {{ name }}!</h2>
+<p>Recebemos sua mensagem{% if subject %} sobre "{{ subject }}"{% endif %} e entraremos em contato em breve.</p>
+<p>Nossa equipe comercial analisará sua solicitação e retornará o mais rápido possível.</p>
+<p>Se precisar de atendimento urgente, ligue para nosso 0800-550-8000.</p>
+<br>
+<p>Atenciosamente,<br>
+<strong>Equipe Agência Kaizen</strong></p>
+""",
+        "Olá {{ name }}, recebemos sua mensagem e entraremos em contato em breve.",
+    ),
+}
+
+
+class CompiledEmailTemplate:
+    """Assunto, HTML e texto já compilados de uma categoria"""
+
+    def __init__(self, category, subject, html_content, text_content='', template_id=None):
+        engine = engines['django'].engine
+        self.category = category
+        self.template_id = template_id
+        self.subject = engine.from_string(f"{{% autoescape off %}}{subject}{{% endautoescape %}}")
+        self.html = engine.from_string(html_content)
+        self.text = (
+            engine.from_string(f"{{% autoescape off %}}{text_content}{{% endautoescape %}}")
+            if text_content else None
+        )
+
+    def render_with(self, context):
+        subject = ' '.join(self.subject.render(context).split())
+        html = self.html.render(context)
+        text = self.text.render(context) if self.text else ''
+        return subject, html, text
+
+    def render(self, context=None):
+        """Renderiza (assunto, html, texto) para um único destinatário"""
+        return self.render_with(Context(context or {}))
+
+    def render_many(self, contexts, base_context=None):
+        """
+        Renderiza uma mensagem por contexto reaproveitando o mesmo Context
+        (apenas as variáveis do destinatário são empilhadas). Gera pares
+        (contexto do destinatário, (assunto, html, texto)).
+        """
+        context = Context(base_context or {})
+        for personal in contexts:
+            with context.push(personal):
+                yield personal, self.render_with(context)
+
+
+class EmailTemplateRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.templates = None
+        self.version = None
+        self.loaded_at = 0.0
+
+    def load(self):
+        from .models import EmailTemplate
+
+        templates = {
+            category: CompiledEmailTemplate(category, subject, html, text)
+            for category, (subject, html, text) in DEFAULTS.items()
+        }
+        # Ordenação do modelo (category, name): o primeiro ativo de cada categoria vence
+        seen = set()
+        for template in EmailTemplate.objects.filter(is_active=True):
+            if template.category in seen:
+                continue
+            seen.add(template.category)
+            templates[template.category] = CompiledEmailTemplate(
+                template.category, template.subject, template.html_content,
+                template.text_content, template_id=template.pk,
+            )
+        return templates
+
+    def get_templates(self):
+        version = cache.get(REGISTRY_VERSION_KEY)
+        if version is None:
+            # Cache limpo: grava uma versão para os processos compararem
+            cache.add(REGISTRY_VERSION_KEY, time.time_ns(), None)
+            version = cache.get(REGISTRY_VERSION_KEY)
+        templates = self.templates
+        stale = (
+            templates is None
+            or version != self.version
+            # Sem cache compartilhado (DummyCache) não há versão: só o TTL local
+            or (version is None and time.monotonic() - self.loaded_at > LOCAL_TTL)
+        )
+        if stale:
+            with self.lock:
+                templates = self.load()
+                self.templates, self.version, self.loaded_at = templates, version, time.monotonic()
+        return templates
+
+    def get(self, category):
+        return self.get_templates().get(category)
+
+    def clear(self):
+        with self.lock:
+            self.templates = None
+
+
+registry = EmailTemplateRegistry()
+
+
+def get_email_template(category):
+    """Template compilado da categoria (ou None se não houver nem padrão)"""
+    return registry.get(category)
+
+
+def render_email(category, context):
+    """Renderiza (assunto, html, texto) de uma categoria; None se não houver template"""
+    template = get_email_template(category)
+    if template is None:
+        return None
+    return template.render(context)
+
+
+def render_many(category, contexts, base_context=None):
+    """Renderização em lote (ex.: newsletter) sem consultas por mensagem"""
+    template = get_email_template(category)
+    if template is None:
+        return iter(())
+    return template.render_many(contexts, base_context)
+
+
+def invalidate_email_templates():
+    """Troca a versão do registro em todos os processos"""
+    cache.set(REGISTRY_VERSION_KEY, time.time_ns(), None)
+    registry.clear()
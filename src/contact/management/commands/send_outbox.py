@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from contact.outbox import outbox_settings, process_outbox, requeue_dead, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de emails: envia os emails pendentes com uma conexão SMTP "
+        "por lote, novas tentativas com backoff e dead-letter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa a fila uma vez e sai (ex.: cron)')
+        parser.add_argument('--batch-size', type=int, help='Emails por lote')
+        parser.add_argument('--requeue-dead', action='store_true', help='Devolve os emails em dead-letter para a fila')
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            requeued = requeue_dead()
+            self.stdout.write(self.style.SUCCESS(f"{requeued} email(s) devolvidos para a fila"))
+            return
+
+        worker_options = outbox_settings()
+        if options['batch_size']:
+            worker_options['BATCH_SIZE'] = options['batch_size']
+
+        if options['once']:
+            sent, failed = process_outbox(worker_options)
+            self.stdout.write(self.style.SUCCESS(f"{sent} email(s) enviados, {failed} falha(s)"))
+            return
+
+        self.stdout.write("Worker do outbox iniciado (Ctrl+C para sair)")
+        try:
+            run_worker(worker_options)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Worker encerrado"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0006_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome do template')),
+                ('category', models.CharField(choices=[('contact_confirmation', 'Confirmação de Contato'), ('contact_notification', 'Notificação de Contato'), ('newsletter', 'Newsletter'), ('welcome', 'Boas-vindas')], max_length=30, verbose_name='Categoria')),
+                ('subject', models.CharField(max_length=200, verbose_name='Assunto do email')),
+                ('html_content', models.TextField(help_text='Variáveis com {{ nome }}; o HTML das variáveis é escapado automaticamente', verbose_name='Conteúdo HTML')),
+                ('text_content', models.TextField(blank=True, verbose_name='Conteúdo texto')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Template de Email',
+                'verbose_name_plural': 'Templates de Email',
+                'ordering': ['category', 'name'],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils import timezone
 from wagtail.models import Page
@@ -68,6 +69,11 @@ class ContactMessage(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
     
+    # Status do email de notificação (atualizado pelo outbox)
+    email_sent = models.BooleanField(default=False)
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    email_error = models.TextField(blank=True)
+    
     def __str__(self):
         return f"{self.name} - {self.email}"
     
@@ -77,6 +83,83 @@ class ContactMessage(models.Model):
         ordering = ['-created_at']
 
 
+class EmailTemplate(models.Model):
+    """
+    Template de email editável no admin. Conteúdo em sintaxe de template
+    Django ({{ name }}, {{ created_at|date:"d/m/Y H:i" }}), compilado e
+    mantido em cache por contact.email_templates.
+    """
+    CATEGORY_CHOICES = [
+        ('contact_confirmation', 'Confirmação de Contato'),
+        ('contact_notification', 'Notificação de Contato'),
+        ('newsletter', 'Newsletter'),
+        ('welcome', 'Boas-vindas'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Nome do template")
+    category = models.CharField(max_length=30, choices=CATEGORY_CHOICES, verbose_name="Categoria")
+    subject = models.CharField(max_length=200, verbose_name="Assunto do email")
+    html_content = models.TextField(
+        verbose_name="Conteúdo HTML",
+        help_text="Variáveis com {{ nome }}; o HTML das variáveis é escapado automaticamente"
+    )
+    text_content = models.TextField(blank=True, verbose_name="Conteúdo texto")
+    is_active = models.BooleanField(default=True, verbose_name="Ativo")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Template de Email"
+        verbose_name_plural = "Templates de Email"
+        ordering = ['category', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_category_display()})"
+
+
+class OutboundEmail(models.Model):
+    """
+    Email na fila de saída (outbox). Gravado na mesma transação do
+    formulário e enviado pelo worker `manage.py send_outbox`.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('sent', 'Enviado'),
+        ('dead', 'Falhou (sem novas tentativas)'),
+    ]
+
+    category = models.CharField(max_length=50, blank=True, verbose_name="Categoria")
+    subject = models.CharField(max_length=255, verbose_name="Assunto")
+    body = models.TextField(blank=True, verbose_name="Texto")
+    html_body = models.TextField(blank=True, verbose_name="HTML")
+    from_email = models.CharField(max_length=255, verbose_name="Remetente")
+    to = models.JSONField(default=list, verbose_name="Destinatários")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próxima tentativa")
+    last_error = models.TextField(blank=True, verbose_name="Último erro")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+
+    # Objeto de origem e campo booleano que reflete o envio (ex.: email_sent)
+    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
+    object_id = models.CharField(max_length=64, blank=True)
+    status_field = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        verbose_name = "Email na Fila"
+        verbose_name_plural = "Emails na Fila"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='contact_outbox_due_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='contact_outbox_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.get_status_display()})"
+
+
 class ConnectPage(Page):
     """
     Página Conecte-se com widgets de redes sociais
@@ -0,0 +1,276 @@
+"""
+Outbox transacional de emails.
+
+Os formulários não falam com o SMTP: `enqueue()` grava o email em
+OutboundEmail na mesma transação da submissão (se a transação for desfeita,
+o email também some). O worker `manage.py send_outbox` envia em lotes
+reaproveitando uma única conexão SMTP, com novas tentativas em backoff
+exponencial e dead-letter (status 'dead') após MAX_ATTEMPTS ou erro
+permanente (5xx). O resultado é refletido no objeto de origem, ex.:
+ContactMessage.email_sent, Lead.confirmation_email_sent.
+
+Cada lote é reservado com SELECT ... FOR UPDATE SKIP LOCKED e um lease
+(next_attempt_at no futuro), então vários workers podem rodar em paralelo
+e um worker que morrer no meio do envio só atrasa o lote até o lease vencer.
+"""
+import logging
+import random
+import smtplib
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,       # emails por lote (uma conexão SMTP por lote)
+    'MAX_ATTEMPTS': 6,      # depois disso vai para dead-letter
+    'BACKOFF_BASE': 30,     # segundos; dobra a cada tentativa
+    'BACKOFF_MAX': 3600,
+    'LEASE': 300,           # segundos em que um lote reservado fica invisível
+    'POLL_INTERVAL': 5.0,   # espera do worker quando a fila está vazia
+}
+
+
+def outbox_settings():
+    return {**DEFAULTS, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+def build_email(subject, to, body='', html_body='', from_email=None, category='',
+                related=None, status_field=''):
+    """Monta (sem salvar) um OutboundEmail"""
+    from .models import OutboundEmail
+
+    if isinstance(to, str):
+        to = [to]
+    email = OutboundEmail(
+        category=category,
+        subject=subject[:255],
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        status_field=status_field,
+    )
+    if related is not None:
+        email.content_type = ContentType.objects.get_for_model(related)
+        email.object_id = str(related.pk)
+    return email
+
+
+def enqueue(subject, to, body='', html_body='', from_email=None, category='',
+            related=None, status_field=''):
+    """
+    Coloca um email na fila. Deve ser chamado dentro da transação que grava
+    `related`; `status_field` é o BooleanField de `related` marcado quando
+    todos os emails daquele objeto/campo forem enviados.
+    """
+    email = build_email(subject, to, body, html_body, from_email, category, related, status_field)
+    email.save()
+    return email
+
+
+def enqueue_many(emails, batch_size=500):
+    """Grava emails montados com build_email em lotes. Retorna o total."""
+    from .models import OutboundEmail
+
+    total = 0
+    batch = []
+    for email in emails:
+        batch.append(email)
+        if len(batch) >= batch_size:
+            OutboundEmail.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        OutboundEmail.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def backoff(attempts, options):
+    """Espera antes da próxima tentativa (exponencial, com jitter)"""
+    delay = min(options['BACKOFF_MAX'], options['BACKOFF_BASE'] * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def is_permanent(exc):
+    """Erros 5xx do servidor SMTP não adiantam repetir"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 500 <= exc.smtp_code < 600
+    return False
+
+
+def claim_batch(options):
+    """Reserva o próximo lote de emails vencidos e incrementa as tentativas"""
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:options['BATCH_SIZE']]
+        )
+        if not ids:
+            return []
+        OutboundEmail.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=options['LEASE']),
+        )
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def record_failure(email, exc, options):
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if is_permanent(exc) or email.attempts >= options['MAX_ATTEMPTS']:
+        email.status = 'dead'
+        logger.error(f"Email {email.pk} movido para dead-letter após {email.attempts} tentativa(s): {email.last_error}")
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts, options)
+        logger.warning(f"Falha ao enviar email {email.pk} (tentativa {email.attempts}): {email.last_error}")
+    email.save(update_fields=['status', 'last_error', 'next_attempt_at'])
+
+
+def send_batch(emails, options):
+    """Envia um lote reaproveitando a conexão. Retorna (enviados, falhas)."""
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Relay indisponível: o lote inteiro volta para a fila
+        for email in emails:
+            record_failure(email, exc, options)
+        return 0, len(emails)
+
+    sent, failed = [], []
+    try:
+        for email in emails:
+            try:
+                build_message(email, connection).send()
+            except Exception as exc:
+                record_failure(email, exc, options)
+                failed.append(email)
+                # Conexão pode ter ficado em estado inválido
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+            else:
+                sent.append(email)
+    finally:
+        connection.close()
+
+    if sent:
+        from .models import OutboundEmail
+        now = timezone.now()
+        OutboundEmail.objects.filter(id__in=[email.id for email in sent]).update(
+            status='sent', sent_at=now, last_error='',
+        )
+        for email in sent:
+            email.status, email.sent_at = 'sent', now
+    reflect_status(sent + [email for email in failed if email.status == 'dead'])
+    return len(sent), len(failed)
+
+
+def reflect_status(emails):
+    """Atualiza o objeto de origem (status_field, <status_field>_at, email_error)"""
+    from .models import OutboundEmail
+
+    targets = defaultdict(list)
+    for email in emails:
+        if email.content_type_id and email.status_field:
+            targets[(email.content_type_id, email.object_id, email.status_field)].append(email)
+
+    for (content_type_id, object_id, status_field), group in targets.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        updates = {}
+        dead = [email for email in group if email.status == 'dead']
+        if dead and has_field(model, 'email_error'):
+            updates['email_error'] = dead[-1].last_error
+        elif not dead and not OutboundEmail.objects.filter(
+            content_type_id=content_type_id, object_id=object_id, status_field=status_field,
+        ).exclude(status='sent').exists():
+            updates[status_field] = True
+            if has_field(model, f'{status_field}_at'):
+                updates[f'{status_field}_at'] = max(email.sent_at for email in group)
+            if has_field(model, 'email_error'):
+                # Reenviado após dead-letter (requeue_dead): o erro antigo não vale mais
+                updates['email_error'] = ''
+        if updates:
+            model._default_manager.filter(pk=object_id).update(**updates)
+
+
+def has_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def process_outbox(options=None):
+    """Envia todos os emails vencidos. Retorna (enviados, falhas)."""
+    options = options or outbox_settings()
+    total_sent = total_failed = 0
+    while True:
+        emails = claim_batch(options)
+        if not emails:
+            return total_sent, total_failed
+        sent, failed = send_batch(emails, options)
+        total_sent += sent
+        total_failed += failed
+
+
+def run_worker(options=None, stop=None):
+    """Loop do worker: processa a fila e dorme POLL_INTERVAL quando vazia"""
+    options = options or outbox_settings()
+    while not (stop and stop()):
+        close_old_connections()
+        try:
+            sent, failed = process_outbox(options)
+        except Exception as exc:
+            logger.error(f"Erro no worker do outbox: {exc}")
+            sent = failed = 0
+        if sent or failed:
+            logger.info(f"Outbox: {sent} enviado(s), {failed} falha(s)")
+        else:
+            time.sleep(options['POLL_INTERVAL'])
+
+
+def requeue_dead(ids=None):
+    """Devolve emails em dead-letter para a fila"""
+    from .models import OutboundEmail
+
+    queryset = OutboundEmail.objects.filter(status='dead')
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    return queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now())
@@ -5,136 +5,94 @@ Agência Kaizen - Sistema de Email
 
 import logging
 from django.conf import settings
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils import timezone
-from .models import ContactMessage, EmailTemplate
+from django.db import transaction
+from django.urls import reverse
+from .email_templates import render_email, render_many
+from .models import ContactMessage, Newsletter
+from .outbox import build_email, enqueue, enqueue_many
 
 logger = logging.getLogger(__name__)
 
 
 class EmailService:
     """
-    Serviço para envio de emails com SendGrid
+    Serviço de emails de contato. O conteúdo vem do registro de templates
+    compilados (contact.email_templates) e os emails são enfileirados no
+    outbox (contact.outbox), enviados pelo worker `send_outbox`.
     """
     
     @staticmethod
-    def send_contact_notification(contact_message: ContactMessage):
+    def contact_context(contact_message: ContactMessage, subject=''):
+        """Variáveis disponíveis nos templates de contato"""
+        return {
+            'contact_message': contact_message,
+            'name': contact_message.name,
+            'email': contact_message.email,
+            'phone': contact_message.phone,
+            'company': contact_message.company,
+            'subject': subject,
+            'message': contact_message.message,
+            'created_at': contact_message.created_at,
+            'ip_address': contact_message.ip_address,
+            'page_url': contact_message.page_url,
+        }
+    
+    @staticmethod
+    def send_contact_notification(contact_message: ContactMessage, subject=''):
         """
         Envia notificação para o comercial sobre nova mensagem
         """
         try:
-            # Template de notificação
-            template = EmailTemplate.objects.filter(
-                category='contact_notification',
-                is_active=True
-            ).first()
-            
-            if template:
-                subject = template.subject.format(
-                    name=contact_message.name,
-                    subject=contact_message.subject
-                )
-                html_content = template.html_content.format(
-                    name=contact_message.name,
-                    email=contact_message.email,
-                    phone=contact_message.phone,
-                    company=contact_message.company,
-                    subject=contact_message.subject,
-                    message=contact_message.message,
-                    created_at=contact_message.created_at.strftime('%d/%m/%Y %H:%M'),
-                    ip_address=contact_message.ip_address,
-                    page_url=contact_message.page_url
-                )
-            else:
-                # Template padrão se não houver template customizado
-                subject = f"Nova mensagem de contato: {contact_message.subject}"
-                html_content = f"""
-                <h2>Nova mensagem de contato recebida</h2>
-                <p><strong>Nome:</strong> {contact_message.name}</p>
-                <p><strong>Email:</strong> {contact_message.email}</p>
-                <p><strong>Telefone:</strong> {contact_message.phone}</p>
-                <p><strong>Empresa:</strong> {contact_message.company}</p>
-                <p><strong>Assunto:</strong> {contact_message.subject}</p>
-                <p><strong>Mensagem:</strong></p>
-                <p>{contact_message.message}</p>
-                <hr>
-                <p><small>Enviado em: {contact_message.created_at.strftime('%d/%m/%Y %H:%M')}</small></p>
-                <p><small>IP: {contact_message.ip_address}</small></p>
-                <p><small>Página: {contact_message.page_url}</small></p>
-                """
-            
-            # Enviar email
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=f"Nova mensagem de {contact_message.name}: {contact_message.message}",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[settings.COMMERCIAL_EMAIL]
+            subject, html_content, text_content = render_email(
+                'contact_notification', EmailService.contact_context(contact_message, subject)
             )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
             
-            # Atualizar status
-            contact_message.email_sent = True
-            contact_message.email_sent_at = timezone.now()
-            contact_message.save()
+            # Enfileirar email; o worker atualiza email_sent/email_sent_at/email_error.
+            # Savepoint próprio: se falhar, a transação de quem chamou continua válida
+            with transaction.atomic():
+                enqueue(
+                    subject=subject,
+                    to=[settings.COMMERCIAL_EMAIL],
+                    body=text_content,
+                    html_body=html_content,
+                    category='contact_notification',
+                    related=contact_message,
+                    status_field='email_sent',
+                )
             
-            logger.info(f"Email de notificação enviado para {settings.COMMERCIAL_EMAIL}")
+            logger.info(f"Email de notificação enfileirado para {settings.COMMERCIAL_EMAIL}")
             return True
             
         except Exception as e:
-            # Salvar erro
-            contact_message.email_error = str(e)
-            contact_message.save()
-            logger.error(f"Erro ao enviar email de notificação: {e}")
+            logger.error(f"Erro ao enfileirar email de notificação: {e}")
             return False
     
     @staticmethod
-    def send_contact_confirmation(contact_message: ContactMessage):
+    def send_contact_confirmation(contact_message: ContactMessage, subject=''):
         """
         Envia email de confirmação para quem enviou a mensagem
         """
         try:
-            # Template de confirmação
-            template = EmailTemplate.objects.filter(
-                category='contact_confirmation',
-                is_active=True
-            ).first()
+            subject, html_content, text_content = render_email(
+                'contact_confirmation', EmailService.contact_context(contact_message, subject)
+            )
             
-            if template:
-                subject = template.subject.format(name=contact_message.name)
-                html_content = template.html_content.format(
-                    name=contact_message.name,
-                    subject=contact_message.subject
+            # Enfileirar email (em savepoint próprio, como a notificação)
+            with transaction.atomic():
+                enqueue(
+                    subject=subject,
+                    to=[contact_message.email],
+                    body=text_content,
+                    html_body=html_content,
+                    category='contact_confirmation',
+                    related=contact_message,
                 )
-            else:
-                # Template padrão
-                subject = "Recebemos sua mensagem - Agência Kaizen"
-                html_content = f"""
-                <h2>Olá, {contact_message.name}!</h2>
-                <p>Recebemos sua mensagem sobre "{contact_message.subject}" e entraremos em contato em breve.</p>
-                <p>Nossa equipe comercial analisará sua solicitação e retornará o mais rápido possível.</p>
-                <p>Se precisar de atendimento urgente, ligue para nosso 0800-550-8000.</p>
-                <br>
-                <p>Atenciosamente,<br>
-                <strong>Equipe Agência Kaizen</strong></p>
-                """
             
-            # Enviar email
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=f"Olá {contact_message.name}, recebemos sua mensagem e entraremos em contato em breve.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[contact_message.email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            
-            logger.info(f"Email de confirmação enviado para {contact_message.email}")
+            logger.info(f"Email de confirmação enfileirado para {contact_message.email}")
             return True
             
         except Exception as e:
-            logger.error(f"Erro ao enviar email de confirmação: {e}")
+            logger.error(f"Erro ao enfileirar email de confirmação: {e}")
             return False
     
     @staticmethod
@@ -148,23 +106,21 @@ class EmailService:
             user_agent = request.META.get('HTTP_USER_AGENT', '')
             page_url = request.build_absolute_uri()
             
-            # Criar mensagem
-            contact_message = ContactMessage.objects.create(
-                name=form_data['name'],
-                email=form_data['email'],
-                phone=form_data.get('phone', ''),
-                company=form_data.get('company', ''),
-                subject=form_data['subject'],
-                message=form_data['message'],
-                subject_category=form_data.get('subject_category', 'outro'),
-                ip_address=ip_address,
-                user_agent=user_agent,
-                page_url=page_url
-            )
-            
-            # Enviar emails
-            EmailService.send_contact_notification(contact_message)
-            EmailService.send_contact_confirmation(contact_message)
+            # Criar mensagem e enfileirar os emails na mesma transação
+            with transaction.atomic():
+                contact_message = ContactMessage.objects.create(
+                    name=form_data['name'],
+                    email=form_data['email'],
+                    phone=form_data.get('phone', ''),
+                    company=form_data.get('company', ''),
+                    message=form_data['message'],
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    page_url=page_url
+                )
+                subject = form_data.get('subject', '')
+                EmailService.send_contact_notification(contact_message, subject)
+                EmailService.send_contact_confirmation(contact_message, subject)
             
             logger.info(f"Mensagem de contato processada: {contact_message.id}")
             return contact_message
@@ -200,32 +156,25 @@ class NewsletterService:
             # Aqui você pode integrar com ferramentas como Mailchimp, RD Station, etc.
             # Por enquanto, vamos salvar como uma mensagem de contato
             
-            contact_message = ContactMessage.objects.create(
-                name=name or 'Newsletter',
-                email=email,
-                subject='Inscrição na Newsletter',
-                message=f'Inscrição na newsletter via {source}',
-                subject_category='outro'
-            )
-            
-            # Enviar email de boas-vindas
-            template = EmailTemplate.objects.filter(
-                category='welcome',
-                is_active=True
-            ).first()
-            
-            if template:
-                subject = template.subject.format(name=name or 'Visitante')
-                html_content = template.html_content.format(name=name or 'Visitante')
-                
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=f"Bem-vindo à newsletter da Agência Kaizen!",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[email]
+            with transaction.atomic():
+                contact_message = ContactMessage.objects.create(
+                    name=name or 'Newsletter',
+                    email=email,
+                    message=f'Inscrição na newsletter via {source}',
                 )
-                msg.attach_alternative(html_content, "text/html")
-                msg.send()
+                
+                # Email de boas-vindas (apenas se houver template cadastrado)
+                rendered = render_email('welcome', {'name': name or 'Visitante', 'email': email})
+                if rendered:
+                    subject, html_content, text_content = rendered
+                    enqueue(
+                        subject=subject,
+                        to=[email],
+                        body=text_content or "Bem-vindo à newsletter da Agência Kaizen!",
+                        html_body=html_content,
+                        category='welcome',
+                        related=contact_message,
+                    )
             
             logger.info(f"Nova inscrição na newsletter: {email}")
             return True
@@ -233,3 +182,41 @@ class NewsletterService:
         except Exception as e:
             logger.error(f"Erro ao processar inscrição na newsletter: {e}")
             return False
+    
+    @staticmethod
+    def send_newsletter(category='newsletter', extra_context=None, subscribers=None):
+        """
+        Enfileira uma newsletter para os inscritos ativos. O template é
+        compilado uma vez e os emails são gravados em lotes (bulk_create),
+        sem consultas por destinatário. Retorna o número de emails.
+        """
+        if subscribers is None:
+            subscribers = Newsletter.objects.filter(is_active=True).only('id', 'email', 'name').iterator(chunk_size=1000)
+        
+        # Os links vão no email, fora do site: precisam ser absolutos
+        base_url = settings.BASE_URL.rstrip('/')
+        
+        def personal_contexts(recipients):
+            for subscriber in recipients:
+                yield {
+                    'subscriber': subscriber,
+                    'name': subscriber.name or 'Visitante',
+                    'email': subscriber.email,
+                    'unsubscribe_url': base_url + reverse('newsletter_unsubscribe', args=[subscriber.email]),
+                }
+        
+        def emails():
+            rendered = render_many(category, personal_contexts(subscribers), extra_context)
+            for personal, (subject, html_content, text_content) in rendered:
+                yield build_email(
+                    subject=subject,
+                    to=[personal['email']],
+                    body=text_content,
+                    html_body=html_content,
+                    category=category,
+                    related=personal['subscriber'],
+                )
+        
+        total = enqueue_many(emails())
+        logger.info(f"Newsletter '{category}' enfileirada para {total} inscrito(s)")
+        return total
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+
+from .email_templates import invalidate_email_templates
+from .models import EmailTemplate
+
+
+def invalidate_templates(sender, **kwargs):
+    invalidate_email_templates()
+
+
+post_save.connect(invalidate_templates, sender=EmailTemplate)
+post_delete.connect(invalidate_templates, sender=EmailTemplate)
@@ -0,0 +1,246 @@
+import json
+import socketserver
+import threading
+import time
+from datetime import timedelta
+
+from unittest import mock
+
+from django.db import DatabaseError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from leads.models import Lead
+
+from .email_templates import registry, render_email
+from .models import ContactMessage, EmailTemplate, Newsletter, OutboundEmail
+from .outbox import enqueue, outbox_settings, process_outbox, requeue_dead
+from .services import EmailService, NewsletterService
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo para os testes (sem TLS/autenticação)"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPStubHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()   # destinatários recusados com 550
+        self.deferred = set()   # destinatários recusados com 451
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        recipients = []
+        self.reply("220 stub")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply("250 stub")
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address in server.rejected:
+                    self.reply("550 mailbox unavailable")
+                elif address in server.deferred:
+                    self.reply("451 try again later")
+                else:
+                    recipients.append(address)
+                    self.reply("250 ok")
+            elif verb == 'DATA':
+                self.reply("354 go ahead")
+                data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                server.messages.append((recipients, data.decode()))
+                recipients = []
+                self.reply("250 queued")
+            elif verb == 'QUIT':
+                self.reply("221 bye")
+                return
+            else:  # MAIL, RSET, NOOP
+                recipients = [] if verb in ('MAIL', 'RSET') else recipients
+                self.reply("250 ok")
+
+
+class EmailOutboxTests(TestCase):
+    """Outbox transacional: enfileiramento, envio em lote, retry e dead-letter"""
+
+    def setUp(self):
+        self.smtp = SMTPStub()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.smtp.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', EMAIL_TIMEOUT=5,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.options = {**outbox_settings(), 'BACKOFF_BASE': 60, 'MAX_ATTEMPTS': 2}
+
+    def make_message(self):
+        return ContactMessage.objects.create(name="Ana", email="ana@example.com", message="Olá")
+
+    def test_form_enqueues_and_worker_sends_with_one_connection(self):
+        response = self.client.post('/leads/api/leads/', json.dumps({
+            'type': 'franchise_lead', 'name': "Ana", 'email': "ana@example.com", 'phone': "51999999999",
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        lead = Lead.objects.get(email="ana@example.com")
+        # Nenhum envio durante a requisição
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertFalse(lead.confirmation_email_sent)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+
+        self.assertEqual(process_outbox(self.options), (2, 0))
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 2)
+        lead.refresh_from_db()
+        self.assertTrue(lead.confirmation_email_sent)
+
+    def test_status_reflected_on_contact_message(self):
+        contact_message = self.make_message()
+        enqueue("Novo contato", ["comercial@example.com"], body="Olá",
+                related=contact_message, status_field='email_sent')
+        process_outbox(self.options)
+        contact_message.refresh_from_db()
+        self.assertTrue(contact_message.email_sent)
+        self.assertIsNotNone(contact_message.email_sent_at)
+
+    def test_transient_failure_retries_then_dead_letters(self):
+        contact_message = self.make_message()
+        self.smtp.deferred.add("lento@example.com")
+        email = enqueue("Novo contato", ["lento@example.com"], body="Olá",
+                        related=contact_message, status_field='email_sent')
+        enqueue("Outro", ["ok@example.com"], body="Olá")
+
+        self.assertEqual(process_outbox(self.options), (1, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=30))
+
+        # Ainda não venceu: nada a fazer
+        self.assertEqual(process_outbox(self.options), (0, 0))
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        process_outbox(self.options)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', 2))
+        contact_message.refresh_from_db()
+        self.assertFalse(contact_message.email_sent)
+        self.assertIn("451", contact_message.email_error)
+
+        # Reenviado com sucesso: o erro anterior é limpo
+        self.smtp.deferred.clear()
+        self.assertEqual(requeue_dead([email.pk]), 1)
+        self.assertEqual(process_outbox(self.options), (1, 0))
+        contact_message.refresh_from_db()
+        self.assertTrue(contact_message.email_sent)
+        self.assertEqual(contact_message.email_error, '')
+
+    def test_permanent_failure_dead_letters_immediately(self):
+        self.smtp.rejected.add("invalido@example.com")
+        email = enqueue("Oi", ["invalido@example.com"], body="Olá")
+        process_outbox(self.options)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', 1))
+
+    def test_rolled_back_submission_leaves_no_email(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue("Oi", ["ana@example.com"], body="Olá", related=self.make_message())
+                raise RuntimeError
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_failed_enqueue_keeps_the_submission_transaction_usable(self):
+        def broken_notification(**kwargs):
+            if kwargs['category'] == 'contact_notification':
+                with transaction.mark_for_rollback_on_error():
+                    raise DatabaseError("outbox indisponível")
+            return enqueue(**kwargs)
+
+        request = RequestFactory().post('/contato/')
+        with mock.patch('contact.services.enqueue', side_effect=broken_notification):
+            contact_message = EmailService.process_contact_form(
+                {'name': "Ana", 'email': "ana@example.com", 'message': "Olá"}, request
+            )
+        self.assertTrue(ContactMessage.objects.filter(pk=contact_message.pk).exists())
+        self.assertEqual(
+            list(OutboundEmail.objects.values_list('category', flat=True)), ['contact_confirmation']
+        )
+
+
+class EmailTemplateRegistryTests(TestCase):
+    """Templates compilados em cache, autoescape e renderização em lote"""
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def test_default_template_escapes_html(self):
+        subject, html, text = render_email('contact_notification', {'name': "Ana <b>", 'message': "a\nb"})
+        self.assertEqual(subject, "Nova mensagem de contato: Ana <b>")
+        self.assertIn("Ana &lt;b&gt;", html)
+        self.assertIn("a<br>b", html)
+        self.assertIn("Ana <b>", text)
+
+    def test_compiled_templates_are_cached_and_invalidated_on_save(self):
+        render_email('contact_confirmation', {'name': "Ana"})
+        with self.assertNumQueries(0):
+            render_email('contact_confirmation', {'name': "Ana"})
+
+        template = EmailTemplate.objects.create(
+            name="Confirmação", category='contact_confirmation',
+            subject="Oi {{ name }}", html_content="<p>Olá {{ name }}</p>",
+        )
+        self.assertEqual(render_email('contact_confirmation', {'name': "Ana"})[0], "Oi Ana")
+
+        template.is_active = False
+        template.save()
+        self.assertEqual(render_email('contact_confirmation', {'name': "Ana"})[0], "Recebemos sua mensagem - Agência Kaizen")
+        self.assertIsNone(render_email('welcome', {}))
+
+    def test_local_ttl_only_without_shared_cache(self):
+        from . import email_templates
+
+        render_email('contact_confirmation', {'name': "Ana"})
+        later = time.monotonic() + email_templates.LOCAL_TTL + 1
+        with mock.patch.object(email_templates.time, 'monotonic', return_value=later):
+            with self.assertNumQueries(0):
+                render_email('contact_confirmation', {'name': "Ana"})
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            render_email('contact_confirmation', {'name': "Ana"})
+            with mock.patch.object(email_templates.time, 'monotonic', return_value=later + 1000):
+                with self.assertNumQueries(1):
+                    render_email('contact_confirmation', {'name': "Ana"})
+
+    @override_settings(BASE_URL='https://www.example.com/')
+    def test_bulk_newsletter_has_constant_queries(self):
+        EmailTemplate.objects.create(
+            name="Newsletter", category='newsletter', subject="{{ edition }} - {{ name }}",
+            html_content='<p>{{ name }}</p><a href="{{ unsubscribe_url }}">sair</a>',
+        )
+        for i in range(30):
+            Newsletter.objects.create(email=f"leitor{i}@example.com", name=f"Leitor {i}")
+        Newsletter.objects.create(email="inativo@example.com", is_active=False)
+        render_email('newsletter', {})
+
+        # inscritos + ContentType + um único INSERT em lote
+        with self.assertNumQueries(3):
+            total = NewsletterService.send_newsletter(extra_context={'edition': "Edição 1"})
+        self.assertEqual(total, 30)
+        email = OutboundEmail.objects.get(to=["leitor7@example.com"])
+        self.assertEqual(email.subject, "Edição 1 - Leitor 7")
+        self.assertIn('href="https://www.example.com/newsletter/unsubscribe/leitor7@example.com/"', email.html_body)
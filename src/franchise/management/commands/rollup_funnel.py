@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from franchise.rollups import BATCH_SIZE, rebuild_rollups, run_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Agrega os touchpoints novos do funil de franquias (por hora e por dia). "
+        "Incremental: processa apenas o que está após a marca d'água."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Touchpoints por transação')
+        parser.add_argument('--rebuild', action='store_true', help='Descarta os agregados e reprocessa tudo')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        run = rebuild_rollups if options['rebuild'] else run_rollups
+        processed = run(options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} touchpoint(s) agregados em {elapsed:.2f}s"
+        ))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchise', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Último ID processado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': "Marca d'água de Rollup",
+                'verbose_name_plural': "Marcas d'água de Rollup",
+            },
+        ),
+        migrations.CreateModel(
+            name='FunnelRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hora'), ('day', 'Dia')], max_length=4, verbose_name='Granularidade')),
+                ('bucket', models.DateTimeField(verbose_name='Início do período')),
+                ('step_number', models.PositiveSmallIntegerField(default=0, help_text='0 = sem step', verbose_name='Número do Step')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Tipo de Evento')),
+                ('utm_source', models.CharField(blank=True, max_length=100, verbose_name='UTM Source')),
+                ('utm_medium', models.CharField(blank=True, max_length=100, verbose_name='UTM Medium')),
+                ('utm_campaign', models.CharField(blank=True, max_length=100, verbose_name='UTM Campaign')),
+                ('events', models.PositiveIntegerField(default=0, verbose_name='Eventos')),
+                ('applications', models.PositiveIntegerField(default=0, help_text='Aplicações que registraram este evento pela primeira vez no período', verbose_name='Aplicações')),
+                ('step_seconds_total', models.FloatField(default=0, verbose_name='Segundos desde o step anterior (soma)')),
+                ('step_seconds_count', models.PositiveIntegerField(default=0, verbose_name='Transições medidas')),
+            ],
+            options={
+                'verbose_name': 'Agregado do Funil',
+                'verbose_name_plural': 'Agregados do Funil',
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['granularity', 'bucket'], name='franchise_rollup_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'step_number', 'event_type', 'utm_source', 'utm_medium', 'utm_campaign'), name='franchise_funnelrollup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchise', '0002_funnel_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupwatermark',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list, help_text='Intervalos de IDs abaixo do último processado que ainda não apareceram', verbose_name='Buracos pendentes'),
+        ),
+        migrations.AlterField(
+            model_name='funnelrollup',
+            name='applications',
+            field=models.PositiveIntegerField(default=0, help_text='Aplicações cuja primeira ocorrência deste evento caiu no período', verbose_name='Aplicações'),
+        ),
+    ]
@@ -271,3 +271,73 @@ class FranchiseDocument(models.Model):
     def __str__(self):
         return f"{self.application.full_name} - {self.get_document_type_display()}"
 
+
+
+class FunnelRollup(models.Model):
+    """
+    Agregado de touchpoints por período (hora/dia), step, evento e UTM.
+    Mantido incrementalmente por franchise.rollups; os relatórios leem
+    apenas esta tabela.
+    """
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hora'),
+        ('day', 'Dia'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES, verbose_name="Granularidade")
+    bucket = models.DateTimeField(verbose_name="Início do período")
+    step_number = models.PositiveSmallIntegerField(default=0, verbose_name="Número do Step", help_text="0 = sem step")
+    event_type = models.CharField(max_length=50, verbose_name="Tipo de Evento")
+    utm_source = models.CharField(max_length=100, blank=True, verbose_name="UTM Source")
+    utm_medium = models.CharField(max_length=100, blank=True, verbose_name="UTM Medium")
+    utm_campaign = models.CharField(max_length=100, blank=True, verbose_name="UTM Campaign")
+
+    events = models.PositiveIntegerField(default=0, verbose_name="Eventos")
+    applications = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Aplicações",
+        help_text="Aplicações cuja primeira ocorrência deste evento caiu no período"
+    )
+    step_seconds_total = models.FloatField(
+        default=0,
+        verbose_name="Segundos desde o step anterior (soma)"
+    )
+    step_seconds_count = models.PositiveIntegerField(default=0, verbose_name="Transições medidas")
+
+    class Meta:
+        verbose_name = "Agregado do Funil"
+        verbose_name_plural = "Agregados do Funil"
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket', 'step_number', 'event_type',
+                        'utm_source', 'utm_medium', 'utm_campaign'],
+                name='franchise_funnelrollup_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket'], name='franchise_rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} {self.bucket:%d/%m/%Y %H:%M} - {self.event_type}"
+
+
+class RollupWatermark(models.Model):
+    """Último touchpoint já agregado por cada processo de rollup"""
+    name = models.CharField(max_length=50, unique=True, verbose_name="Nome")
+    last_id = models.BigIntegerField(default=0, verbose_name="Último ID processado")
+    gaps = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Buracos pendentes",
+        help_text="Intervalos de IDs abaixo do último processado que ainda não apareceram"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Marca d'água de Rollup"
+        verbose_name_plural = "Marcas d'água de Rollup"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
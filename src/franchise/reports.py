@@ -0,0 +1,113 @@
+"""
+Relatório do funil de franquias no Wagtail Admin.
+
+Lê apenas FunnelRollup (agregados mantidos por franchise.rollups), nunca
+a tabela de touchpoints, então o custo não cresce com o volume de eventos.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.decorators import permission_required
+from django.db.models import Sum
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import FunnelRollup, RollupWatermark
+from .rollups import FUNNEL_STEPS, WATERMARK_NAME
+
+PERIOD_CHOICES = (7, 30, 90)
+STEP_LABELS = {
+    'step1_complete': 'Step 1 - Dados pessoais',
+    'step2_complete': 'Step 2 - Perfil',
+    'step3_complete': 'Step 3 - Experiência',
+    'step4_complete': 'Step 4 - Investimento',
+    'meeting_scheduled': 'Reunião agendada',
+    'application_submitted': 'Aplicação enviada',
+}
+
+
+def percent(part, whole):
+    return round(part * 100 / whole, 1) if whole else None
+
+
+@permission_required('franchise.view_franchiseapplication', raise_exception=True)
+def funnel_report(request):
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = 30
+    if days not in PERIOD_CHOICES:
+        days = 30
+    granularity = request.GET.get('granularity')
+    if granularity not in dict(FunnelRollup.GRANULARITY_CHOICES):
+        granularity = 'day'
+
+    since = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    # Os totais usam sempre os agregados diários (menos linhas)
+    daily = FunnelRollup.objects.filter(granularity='day', bucket__gte=since, event_type__in=FUNNEL_STEPS)
+
+    totals = {
+        row['event_type']: row
+        for row in daily.values('event_type').annotate(
+            applications_sum=Sum('applications'),
+            seconds_total=Sum('step_seconds_total'),
+            seconds_count=Sum('step_seconds_count'),
+        )
+    }
+    steps = []
+    first = previous = None
+    for event_type in FUNNEL_STEPS:
+        row = totals.get(event_type, {})
+        reached = row.get('applications_sum') or 0
+        first = reached if first is None else first
+        seconds_count = row.get('seconds_count') or 0
+        steps.append({
+            'label': STEP_LABELS[event_type],
+            'applications': reached,
+            'from_previous': percent(reached, previous) if previous is not None else None,
+            'from_start': percent(reached, first),
+            'avg_minutes': round(row['seconds_total'] / seconds_count / 60, 1) if seconds_count else None,
+        })
+        previous = reached
+
+    sources = {}
+    for row in (
+        daily.filter(event_type__in=[FUNNEL_STEPS[0], FUNNEL_STEPS[-1]])
+        .values('utm_source', 'event_type')
+        .annotate(applications_sum=Sum('applications'))
+    ):
+        source = sources.setdefault(row['utm_source'] or '(direto)', {'started': 0, 'submitted': 0})
+        key = 'started' if row['event_type'] == FUNNEL_STEPS[0] else 'submitted'
+        source[key] += row['applications_sum'] or 0
+    utm_sources = sorted(
+        (
+            {'source': name, **counts, 'conversion': percent(counts['submitted'], counts['started'])}
+            for name, counts in sources.items()
+        ),
+        key=lambda item: item['started'],
+        reverse=True,
+    )
+
+    timeline = {}
+    for row in (
+        FunnelRollup.objects
+        .filter(granularity=granularity, bucket__gte=since, event_type__in=[FUNNEL_STEPS[0], FUNNEL_STEPS[-1]])
+        .values('bucket', 'event_type')
+        .annotate(applications_sum=Sum('applications'))
+        .order_by('-bucket')
+    ):
+        bucket = timeline.setdefault(row['bucket'], {'bucket': row['bucket'], 'started': 0, 'submitted': 0})
+        key = 'started' if row['event_type'] == FUNNEL_STEPS[0] else 'submitted'
+        bucket[key] += row['applications_sum'] or 0
+
+    watermark = RollupWatermark.objects.filter(name=WATERMARK_NAME).first()
+
+    return render(request, 'franchise/admin/funnel_report.html', {
+        'days': days,
+        'period_choices': PERIOD_CHOICES,
+        'granularity': granularity,
+        'granularity_choices': FunnelRollup.GRANULARITY_CHOICES,
+        'steps': steps,
+        'utm_sources': utm_sources,
+        'timeline': list(timeline.values()),
+        'watermark': watermark,
+    })
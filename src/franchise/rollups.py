@@ -0,0 +1,231 @@
+"""
+Rollups incrementais do funil de franquias.
+
+Os touchpoints novos (id acima da marca d'água) são lidos em lotes e
+somados em FunnelRollup por hora e por dia, chaveados por step, evento e
+UTM da aplicação. Cada lote roda em uma transação com a marca d'água
+travada (select_for_update), então execuções concorrentes não contam o
+mesmo touchpoint duas vezes.
+
+Os ids são reservados no INSERT, mas as transações podem confirmar fora de
+ordem: um touchpoint com id menor pode aparecer depois que a marca d'água
+já passou dele. Por isso os buracos na sequência de ids ficam registrados
+em RollupWatermark.gaps e são reconsultados a cada lote, até aparecerem ou
+até GAP_TIMEOUT (ids de transações desfeitas nunca aparecem).
+"""
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+WATERMARK_NAME = 'franchise_funnel'
+BATCH_SIZE = 5000
+# Segundos que um buraco na sequência de ids continua sendo reconsultado
+GAP_TIMEOUT = 600
+
+# Ordem dos eventos de conclusão emitidos pelos steps (ver franchise.views)
+FUNNEL_STEPS = [
+    'step1_complete',
+    'step2_complete',
+    'step3_complete',
+    'step4_complete',
+    'meeting_scheduled',
+    'application_submitted',
+]
+PREVIOUS_STEP = dict(zip(FUNNEL_STEPS[1:], FUNNEL_STEPS))
+
+
+def buckets(timestamp):
+    """Início da hora e do dia (horário local) de um timestamp"""
+    local = timezone.localtime(timestamp)
+    hour = local.replace(minute=0, second=0, microsecond=0)
+    return (('hour', hour), ('day', hour.replace(hour=0)))
+
+
+def first_occurrences(touchpoints, exclude_ids=()):
+    """
+    Para cada (aplicação, evento) do lote: id e timestamp do primeiro
+    touchpoint já registrado, em uma única consulta.
+    """
+    from .models import FranchiseTouchpoint
+
+    application_ids = {tp['application_id'] for tp in touchpoints}
+    event_types = {tp['event_type'] for tp in touchpoints} | set(FUNNEL_STEPS)
+    rows = (
+        FranchiseTouchpoint.objects
+        .filter(application_id__in=application_ids, event_type__in=event_types)
+        .exclude(id__in=exclude_ids)
+        .values('application_id', 'event_type')
+        .annotate(first_id=Min('id'), first_at=Min('timestamp'))
+    )
+    return {(row['application_id'], row['event_type']): row for row in rows}
+
+
+def aggregate(touchpoints, late=False):
+    """
+    Soma um lote de touchpoints em deltas por chave de rollup.
+
+    `late` indica touchpoints que apareceram em buracos abaixo da marca
+    d'água: se a aplicação já tinha o evento contado, o atrasado não vira
+    uma nova primeira ocorrência, mesmo tendo o id menor.
+    """
+    if late:
+        firsts = first_occurrences(touchpoints, exclude_ids=[tp['id'] for tp in touchpoints])
+        for tp in touchpoints:
+            firsts.setdefault((tp['application_id'], tp['event_type']), {
+                'first_id': tp['id'], 'first_at': tp['timestamp'],
+            })
+    else:
+        firsts = first_occurrences(touchpoints)
+    deltas = defaultdict(lambda: {'events': 0, 'applications': 0, 'step_seconds_total': 0.0, 'step_seconds_count': 0})
+
+    for tp in touchpoints:
+        first = firsts.get((tp['application_id'], tp['event_type']))
+        is_first = first is not None and first['first_id'] == tp['id']
+
+        seconds = None
+        previous = PREVIOUS_STEP.get(tp['event_type'])
+        if is_first and previous:
+            previous_first = firsts.get((tp['application_id'], previous))
+            if previous_first and previous_first['first_at'] <= tp['timestamp']:
+                seconds = (tp['timestamp'] - previous_first['first_at']).total_seconds()
+
+        for granularity, bucket in buckets(tp['timestamp']):
+            key = (
+                granularity, bucket, tp['step_number'] or 0, tp['event_type'],
+                tp['application__utm_source'], tp['application__utm_medium'],
+                tp['application__utm_campaign'],
+            )
+            delta = deltas[key]
+            delta['events'] += 1
+            if is_first:
+                delta['applications'] += 1
+            if seconds is not None:
+                delta['step_seconds_total'] += seconds
+                delta['step_seconds_count'] += 1
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Soma os deltas nos agregados existentes e cria os que faltam"""
+    from .models import FunnelRollup
+
+    key_fields = ('granularity', 'bucket', 'step_number', 'event_type',
+                  'utm_source', 'utm_medium', 'utm_campaign')
+    counters = ('events', 'applications', 'step_seconds_total', 'step_seconds_count')
+
+    existing = {
+        tuple(getattr(rollup, field) for field in key_fields): rollup
+        for rollup in FunnelRollup.objects.filter(
+            granularity__in={key[0] for key in deltas},
+            bucket__in={key[1] for key in deltas},
+        )
+    }
+
+    to_update, to_create = [], []
+    for key, delta in deltas.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            to_create.append(FunnelRollup(**dict(zip(key_fields, key)), **delta))
+        else:
+            for field in counters:
+                setattr(rollup, field, getattr(rollup, field) + delta[field])
+            to_update.append(rollup)
+
+    FunnelRollup.objects.bulk_create(to_create)
+    FunnelRollup.objects.bulk_update(to_update, counters)
+    return len(to_create) + len(to_update)
+
+
+TOUCHPOINT_FIELDS = (
+    'id', 'application_id', 'event_type', 'step_number', 'timestamp',
+    'application__utm_source', 'application__utm_medium', 'application__utm_campaign',
+)
+
+
+def find_gaps(start, ids, now):
+    """Intervalos [primeiro, último, detectado_em] ausentes em uma sequência de ids"""
+    gaps = []
+    expected = start + 1
+    for pk in ids:
+        if pk > expected:
+            gaps.append([expected, pk - 1, now])
+        expected = pk + 1
+    return gaps
+
+
+def remaining_gaps(gaps, found_ids, now, timeout=GAP_TIMEOUT):
+    """Tira dos buracos os ids que apareceram e descarta os expirados"""
+    remaining = []
+    for first, last, detected_at in gaps:
+        if now - detected_at > timeout:
+            continue
+        for pk in sorted(pk for pk in found_ids if first <= pk <= last):
+            if pk > first:
+                remaining.append([first, pk - 1, detected_at])
+            first = pk + 1
+        if first <= last:
+            remaining.append([first, last, detected_at])
+    return remaining
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """
+    Agrega os touchpoints que apareceram nos buracos conhecidos e o próximo
+    lote após a marca d'água.
+    Retorna o número de touchpoints novos processados (0 quando não há novos).
+    """
+    from .models import FranchiseTouchpoint, RollupWatermark
+
+    with transaction.atomic():
+        RollupWatermark.objects.get_or_create(name=WATERMARK_NAME)
+        watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK_NAME)
+        now = time.time()
+
+        late = []
+        if watermark.gaps:
+            in_gaps = Q()
+            for first, last, _detected_at in watermark.gaps:
+                in_gaps |= Q(id__range=(first, last))
+            late = list(FranchiseTouchpoint.objects.filter(in_gaps).order_by('id').values(*TOUCHPOINT_FIELDS))
+            if late:
+                apply_deltas(aggregate(late, late=True))
+        gaps = remaining_gaps(watermark.gaps, {tp['id'] for tp in late}, now)
+
+        touchpoints = list(
+            FranchiseTouchpoint.objects
+            .filter(id__gt=watermark.last_id)
+            .order_by('id')
+            .values(*TOUCHPOINT_FIELDS)[:batch_size]
+        )
+        if touchpoints:
+            apply_deltas(aggregate(touchpoints))
+            gaps += find_gaps(watermark.last_id, [tp['id'] for tp in touchpoints], now)
+            watermark.last_id = touchpoints[-1]['id']
+
+        if touchpoints or gaps != watermark.gaps:
+            watermark.gaps = gaps
+            watermark.save(update_fields=['last_id', 'gaps', 'updated_at'])
+        return len(touchpoints)
+
+
+def run_rollups(batch_size=BATCH_SIZE):
+    """Processa lotes até alcançar o último touchpoint. Retorna o total."""
+    total = 0
+    while True:
+        processed = process_batch(batch_size)
+        total += processed
+        if processed < batch_size:
+            return total
+
+
+def rebuild_rollups(batch_size=BATCH_SIZE):
+    """Descarta os agregados e reprocessa todos os touchpoints"""
+    from .models import FunnelRollup, RollupWatermark
+
+    with transaction.atomic():
+        FunnelRollup.objects.all().delete()
+        RollupWatermark.objects.filter(name=WATERMARK_NAME).delete()
+    return run_rollups(batch_size)
@@ -0,0 +1,126 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import FranchiseApplication, FranchiseTouchpoint, FunnelRollup, RollupWatermark
+from .rollups import run_rollups
+
+
+class FunnelRollupTests(TestCase):
+    """Rollups incrementais do funil e relatório no admin"""
+
+    def setUp(self):
+        self.now = timezone.now().replace(minute=10, second=0, microsecond=0)
+
+    def make_application(self, email, utm_source=''):
+        return FranchiseApplication.objects.create(
+            full_name="Maria", email=email, birth_date=datetime.date(1990, 1, 1),
+            experience_years=5, expected_start_date=datetime.date(2030, 1, 1),
+            utm_source=utm_source,
+        )
+
+    def touch(self, application, event_type, minutes=0, step_number=None, pk=None):
+        return FranchiseTouchpoint.objects.create(
+            id=pk, application=application, event_type=event_type, step_number=step_number,
+            timestamp=self.now + datetime.timedelta(minutes=minutes),
+        )
+
+    def total(self, event_type, field='applications', granularity='day'):
+        return FunnelRollup.objects.filter(granularity=granularity, event_type=event_type).aggregate(
+            total=Sum(field)
+        )['total'] or 0
+
+    def test_incremental_rollup(self):
+        google = self.make_application("a@example.com", utm_source="google")
+        direct = self.make_application("b@example.com")
+        self.touch(google, 'step1_complete', 0, step_number=1)
+        self.touch(google, 'step2_complete', 4, step_number=2)
+        self.touch(direct, 'step1_complete', 0, step_number=1)
+
+        self.assertEqual(run_rollups(batch_size=2), 3)
+        self.assertEqual(self.total('step1_complete'), 2)
+        self.assertEqual(self.total('step2_complete', 'step_seconds_total'), 240)
+        self.assertEqual(run_rollups(), 0)
+
+        # Repetições contam como eventos, mas não como novas aplicações
+        self.touch(google, 'step2_complete', 6, step_number=2)
+        self.touch(direct, 'step2_complete', 2, step_number=2)
+        self.assertEqual(run_rollups(), 2)
+        self.assertEqual(self.total('step2_complete'), 2)
+        self.assertEqual(self.total('step2_complete', 'events'), 3)
+        self.assertEqual(self.total('step2_complete', 'step_seconds_count'), 2)
+        self.assertEqual(self.total('step2_complete', 'events', granularity='hour'), 3)
+        self.assertEqual(
+            FunnelRollup.objects.get(granularity='day', event_type='step1_complete', utm_source='google').applications,
+            1,
+        )
+
+    def test_late_commit_below_watermark(self):
+        first = self.make_application("d@example.com")
+        second = self.make_application("e@example.com")
+        start = self.touch(first, 'step1_complete', 0, step_number=1)
+        # O id start+1 foi reservado por uma transação que ainda não confirmou
+        self.touch(first, 'step2_complete', 3, step_number=2, pk=start.pk + 2)
+        self.assertEqual(run_rollups(), 2)
+        self.assertEqual(RollupWatermark.objects.get().gaps[0][:2], [start.pk + 1, start.pk + 1])
+
+        # Confirmou depois: entra no rollup, e a repetição não vira nova aplicação
+        self.touch(second, 'step1_complete', 1, step_number=1, pk=start.pk + 1)
+        run_rollups()
+        self.assertEqual(self.total('step1_complete'), 2)
+        self.assertEqual(self.total('step2_complete'), 1)
+        self.assertEqual(RollupWatermark.objects.get().gaps, [])
+
+        self.touch(first, 'step1_complete', 5, step_number=1)
+        run_rollups()
+        self.assertEqual(self.total('step1_complete', 'events'), 3)
+        self.assertEqual(self.total('step1_complete'), 2)
+
+    def test_expired_gaps_are_dropped(self):
+        application = self.make_application("f@example.com")
+        start = self.touch(application, 'step1_complete', 0, step_number=1)
+        self.touch(application, 'step2_complete', 3, step_number=2, pk=start.pk + 5)
+        run_rollups()
+        watermark = RollupWatermark.objects.get()
+        watermark.gaps = [[first, last, detected_at - 3600] for first, last, detected_at in watermark.gaps]
+        watermark.save()
+        run_rollups()
+        self.assertEqual(RollupWatermark.objects.get().gaps, [])
+
+    def test_report_requires_permission(self):
+        user = get_user_model().objects.create_user('editor', 'editor@example.com', 'senha', is_staff=True)
+        user.user_permissions.add(Permission.objects.get(codename='access_admin'))
+        self.client.force_login(user)
+        # O Wagtail converte o PermissionDenied em redirecionamento para o dashboard
+        response = self.client.get('/admin/reports/franchise-funnel/')
+        self.assertRedirects(response, '/admin/', fetch_redirect_response=False)
+
+        from django.test import RequestFactory
+
+        from .wagtail_hooks import register_funnel_report_menu_item
+
+        request = RequestFactory().get('/admin/')
+        request.user = user
+        self.assertFalse(register_funnel_report_menu_item().is_shown(request))
+        user.user_permissions.add(Permission.objects.get(codename='view_franchiseapplication'))
+        request.user = get_user_model().objects.get(pk=user.pk)
+        self.assertTrue(register_funnel_report_menu_item().is_shown(request))
+        self.assertEqual(self.client.get('/admin/reports/franchise-funnel/').status_code, 200)
+
+    def test_report_reads_rollups(self):
+        application = self.make_application("c@example.com", utm_source="google")
+        self.touch(application, 'step1_complete', 0, step_number=1)
+        self.touch(application, 'application_submitted', 30)
+        run_rollups()
+
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'senha')
+        self.client.force_login(user)
+        response = self.client.get('/admin/reports/franchise-funnel/?days=7&granularity=hour')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['utm_sources'][0], {
+            'source': 'google', 'started': 1, 'submitted': 1, 'conversion': 100.0,
+        })
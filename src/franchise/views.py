@@ -1,6 +1,7 @@
 """
 Views para o sistema de franquias
 """
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
@@ -9,11 +10,20 @@ from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.db import transaction
 import json
 import uuid
 import re
+from common.touchpoints import BufferFull, get_buffer, ingest, make_row
+from common.uploads import UploadError, take_upload
 from .models import FranchiseApplication, FranchiseTouchpoint, FranchiseDocument
 
+# Tipos de documento que também têm um FileField em FranchiseApplication
+APPLICATION_DOCUMENT_FIELDS = {
+    'curriculum', 'business_plan', 'financial_statement',
+    'identity_document', 'address_proof', 'income_proof',
+}
+
 
 def validate_cpf(cpf):
     """Valida CPF"""
@@ -55,9 +65,73 @@ def validate_cep(cep):
     return bool(re.match(pattern, cep))
 
 
+def record_touchpoint(request, application, event_type, step_number, event_data):
+    """
+    Enfileira o touchpoint de um step no buffer de ingestão. Com o buffer
+    cheio, grava direto para não perder o evento nem falhar o step.
+    """
+    row = make_row(
+        'franchise', application.pk, event_type, event_data, step_number,
+        request.META.get('HTTP_REFERER', ''),
+    )
+    try:
+        get_buffer('franchise').add([row])
+    except BufferFull:
+        FranchiseTouchpoint.objects.create(
+            application=application,
+            event_type=event_type,
+            step_number=step_number,
+            event_data=event_data,
+            page_url=row['page_url'],
+            timestamp=timezone.now()
+        )
+
+
+def save_documents(application, documents):
+    """Grava os documentos do step 4 em uma transação; retorna quantos foram salvos"""
+    documents_uploaded = 0
+    with transaction.atomic():
+        document_fields = []
+        for doc_data in documents:
+            file_type = doc_data.get('file_type', 'other')
+            if doc_data.get('upload_id'):
+                upload = take_upload(doc_data['upload_id'], 'franchise_document')
+                FranchiseDocument.objects.create(
+                    application=application,
+                    document_type=file_type,
+                    file=upload.file.name,
+                    original_filename=upload.original_filename,
+                    file_size=upload.total_size,
+                    mime_type=upload.detected_type or upload.declared_type or 'application/octet-stream'
+                )
+                # Também preenche o campo correspondente da aplicação
+                if file_type in APPLICATION_DOCUMENT_FIELDS:
+                    setattr(application, file_type, upload.file.name)
+                    document_fields.append(file_type)
+                documents_uploaded += 1
+            elif doc_data.get('file_content') and doc_data.get('filename'):
+                # Simular upload de arquivo (em produção, usar request.FILES)
+                file_content = doc_data['file_content']
+                filename = doc_data['filename']
+
+                # Criar documento
+                FranchiseDocument.objects.create(
+                    application=application,
+                    document_type=file_type,
+                    file=ContentFile(file_content.encode(), name=filename),
+                    original_filename=filename,
+                    file_size=len(file_content),
+                    mime_type=doc_data.get('mime_type', 'application/octet-stream')
+                )
+                documents_uploaded += 1
+        if document_fields:
+            application.save(update_fields=document_fields + ['updated_at'])
+    return documents_uploaded
+
+
 @csrf_exempt
 @require_POST
-def franchise_step1(request):
+async def franchise_step1(request):
     """
     Step 1: Dados pessoais
     """
@@ -112,7 +186,7 @@ def franchise_step1(request):
         application_id = data.get('application_id')
         if application_id:
             try:
-                application = FranchiseApplication.objects.get(id=application_id)
+                application = await FranchiseApplication.objects.aget(id=application_id)
             except FranchiseApplication.DoesNotExist:
                 return JsonResponse({
                     'success': False,
@@ -147,17 +221,10 @@ def franchise_step1(request):
         application.ip_address = request.META.get('REMOTE_ADDR')
         application.session_id = data.get('session_id', '')
         
-        application.save()
+        await application.asave()
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='step1_complete',
-            step_number=1,
-            event_data=data,
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'step1_complete', 1, data)
         
         return JsonResponse({
             'success': True,
@@ -179,7 +246,7 @@ def franchise_step1(request):
 
 @csrf_exempt
 @require_POST
-def franchise_step2(request):
+async def franchise_step2(request):
     """
     Step 2: Perfil profissional
     """
@@ -194,7 +261,7 @@ def franchise_step2(request):
             }, status=400)
         
         try:
-            application = FranchiseApplication.objects.get(id=application_id)
+            application = await FranchiseApplication.objects.aget(id=application_id)
         except FranchiseApplication.DoesNotExist:
             return JsonResponse({
                 'success': False,
@@ -221,17 +288,10 @@ def franchise_step2(request):
         application.sales_experience = data['sales_experience']
         application.marketing_experience = data['marketing_experience']
         
-        application.save()
+        await application.asave()
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='step2_complete',
-            step_number=2,
-            event_data=data,
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'step2_complete', 2, data)
         
         return JsonResponse({
             'success': True,
@@ -252,7 +312,7 @@ def franchise_step2(request):
 
 @csrf_exempt
 @require_POST
-def franchise_step3(request):
+async def franchise_step3(request):
     """
     Step 3: Investimento e localização
     """
@@ -267,7 +327,7 @@ def franchise_step3(request):
             }, status=400)
         
         try:
-            application = FranchiseApplication.objects.get(id=application_id)
+            application = await FranchiseApplication.objects.aget(id=application_id)
         except FranchiseApplication.DoesNotExist:
             return JsonResponse({
                 'success': False,
@@ -299,17 +359,10 @@ def franchise_step3(request):
         application.risk_tolerance = data['risk_tolerance']
         application.references = data.get('references', '')
         
-        application.save()
+        await application.asave()
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='step3_complete',
-            step_number=3,
-            event_data=data,
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'step3_complete', 3, data)
         
         return JsonResponse({
             'success': True,
@@ -330,7 +383,7 @@ def franchise_step3(request):
 
 @csrf_exempt
 @require_POST
-def franchise_step4(request):
+async def franchise_step4(request):
     """
     Step 4: Documentação
     """
@@ -345,46 +398,28 @@ def franchise_step4(request):
             }, status=400)
         
         try:
-            application = FranchiseApplication.objects.get(id=application_id)
+            application = await FranchiseApplication.objects.aget(id=application_id)
         except FranchiseApplication.DoesNotExist:
             return JsonResponse({
                 'success': False,
                 'error': 'Aplicação não encontrada'
             }, status=404)
         
-        # Processar uploads de documentos se houver
-        documents_uploaded = 0
-        if 'documents' in data:
-            for doc_data in data['documents']:
-                if doc_data.get('file_content') and doc_data.get('filename'):
-                    # Simular upload de arquivo (em produção, usar request.FILES)
-                    file_content = doc_data['file_content']
-                    filename = doc_data['filename']
-                    file_type = doc_data.get('file_type', 'other')
-                    
-                    # Criar documento
-                    FranchiseDocument.objects.create(
-                        application=application,
-                        document_type=file_type,
-                        file=ContentFile(file_content.encode(), name=filename),
-                        original_filename=filename,
-                        file_size=len(file_content),
-                        mime_type=doc_data.get('mime_type', 'application/octet-stream')
-                    )
-                    documents_uploaded += 1
+        # Processar documentos: ids de uploads em partes (/api/uploads/) ou,
+        # no formato antigo, conteúdo inline no JSON
+        try:
+            documents_uploaded = await sync_to_async(save_documents)(application, data.get('documents', []))
+        except UploadError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=e.status)
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='step4_complete',
-            step_number=4,
-            event_data={
-                'documents_uploaded': documents_uploaded,
-                'total_documents': len(data.get('documents', []))
-            },
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'step4_complete', 4, {
+            'documents_uploaded': documents_uploaded,
+            'total_documents': len(data.get('documents', []))
+        })
         
         return JsonResponse({
             'success': True,
@@ -406,7 +441,7 @@ def franchise_step4(request):
 
 @csrf_exempt
 @require_POST
-def franchise_step5(request):
+async def franchise_step5(request):
     """
     Step 5: Agendamento
     """
@@ -421,7 +456,7 @@ def franchise_step5(request):
             }, status=400)
         
         try:
-            application = FranchiseApplication.objects.get(id=application_id)
+            application = await FranchiseApplication.objects.aget(id=application_id)
         except FranchiseApplication.DoesNotExist:
             return JsonResponse({
                 'success': False,
@@ -433,17 +468,10 @@ def franchise_step5(request):
         application.meeting_date = data.get('meeting_date')
         application.meeting_notes = data.get('meeting_notes', '')
         application.status = 'scheduled'
-        application.save()
+        await application.asave()
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='meeting_scheduled',
-            step_number=5,
-            event_data=data,
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'meeting_scheduled', 5, data)
         
         return JsonResponse({
             'success': True,
@@ -464,7 +492,7 @@ def franchise_step5(request):
 
 @csrf_exempt
 @require_POST
-def franchise_submit(request):
+async def franchise_submit(request):
     """
     Finalizar e enviar aplicação
     """
@@ -479,7 +507,7 @@ def franchise_submit(request):
             }, status=400)
         
         try:
-            application = FranchiseApplication.objects.get(id=application_id)
+            application = await FranchiseApplication.objects.aget(id=application_id)
         except FranchiseApplication.DoesNotExist:
             return JsonResponse({
                 'success': False,
@@ -489,17 +517,10 @@ def franchise_submit(request):
         # Marcar como enviada
         application.status = 'submitted'
         application.submitted_at = timezone.now()
-        application.save()
+        await application.asave()
         
         # Criar touchpoint
-        FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type='application_submitted',
-            step_number=6,
-            event_data=data,
-            page_url=request.META.get('HTTP_REFERER', ''),
-            timestamp=timezone.now()
-        )
+        await sync_to_async(record_touchpoint)(request, application, 'application_submitted', 6, data)
         
         return JsonResponse({
             'success': True,
@@ -523,50 +544,9 @@ def franchise_submit(request):
 @require_POST
 def franchise_touchpoint(request):
     """
-    Registrar touchpoint
+    Registrar touchpoints: um evento, uma lista de eventos ou {"events": [...]}
+    (também via navigator.sendBeacon). Os eventos vão para o buffer de
+    ingestão e são gravados em lote (ver common.touchpoints).
     """
-    try:
-        data = json.loads(request.body)
-        application_id = data.get('application_id')
-        event_type = data.get('event_type')
-        
-        if not application_id or not event_type:
-            return JsonResponse({
-                'success': False,
-                'error': 'application_id e event_type são obrigatórios'
-            }, status=400)
-        
-        try:
-            application = FranchiseApplication.objects.get(id=application_id)
-        except FranchiseApplication.DoesNotExist:
-            return JsonResponse({
-                'success': False,
-                'error': 'Aplicação não encontrada'
-            }, status=404)
-        
-        # Criar touchpoint
-        touchpoint = FranchiseTouchpoint.objects.create(
-            application=application,
-            event_type=event_type,
-            event_data=data.get('event_data', {}),
-            step_number=data.get('step_number'),
-            page_url=data.get('page_url', request.META.get('HTTP_REFERER', '')),
-            timestamp=timezone.now()
-        )
-        
-        return JsonResponse({
-            'success': True,
-            'touchpoint_id': touchpoint.id
-        })
-        
-    except json.JSONDecodeError:
-        return JsonResponse({
-            'success': False,
-            'error': 'Requisição inválida'
-        }, status=400)
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'error': str(e)
-        }, status=500)
+    return ingest(request, 'franchise')
 
@@ -0,0 +1,26 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .reports import funnel_report
+
+
+@hooks.register("register_admin_urls")
+def register_funnel_report_url():
+    return [
+        path('reports/franchise-funnel/', funnel_report, name='franchise_funnel_report'),
+    ]
+
+
+class FunnelReportMenuItem(MenuItem):
+    """Visível para quem pode abrir o relatório, não só para superusuários"""
+
+    def is_shown(self, request):
+        return request.user.has_perm('franchise.view_franchiseapplication')
+
+
+@hooks.register("register_reports_menu_item")
+def register_funnel_report_menu_item():
+    return FunnelReportMenuItem(
+        "Funil de Franquias", reverse('franchise_funnel_report'), icon_name="list-ul", order=900
+    )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.snapshot import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o snapshot de contexto das HomePages publicadas (ex.: após deploy)"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebuilt = rebuild_snapshots()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot reconstruído para {rebuilt} página(s) em {elapsed:.2f}s"
+        ))
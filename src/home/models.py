@@ -7,7 +7,8 @@ from wagtail.blocks import CharBlock, RichTextBlock, StructBlock, ListBlock, Tex
 from wagtail.images.blocks import ImageChooserBlock
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
-from companies.models import Location
+from companies.locations import location_context
+from common.profiling import QueryBudget
 
 
 # Blocos para StreamField
@@ -54,6 +55,8 @@ class SolutionsBlock(StructBlock):
     solutions = ListBlock(SolutionCardBlock, label="Cards de Soluções", required=False)
     class Meta:
         template = "home/blocks/solutions_block.html"
+        # Renderiza as seções vindas do contexto (home.snapshot), não só o valor do bloco
+        cache_depends_on = ('solutions.SolutionSection', 'wagtailimages.Image')
 
 
 class ClientsCarouselBlock(StructBlock):
@@ -61,6 +64,7 @@ class ClientsCarouselBlock(StructBlock):
     title = CharBlock(max_length=255, default="Marcas que confiam", label="Título")
     class Meta:
         template = "home/blocks/clients_carousel_block.html"
+        cache_depends_on = ('companies.Company', 'wagtailimages.Image')
 
 class CompetenceCardBlock(StructBlock):
     """Bloco para card de competência"""
@@ -137,6 +141,8 @@ class HomePage(Page):
     """
     Página inicial da agência com seções dinâmicas
     """
+    query_budget = QueryBudget(queries=40, duplicates=10)
+
     # Seção Hero
     hero_title = models.CharField(max_length=255, verbose_name="Título Principal", default="Aceleramos negócios e lançamos foguetes")
     hero_subtitle = RichTextField(blank=True, verbose_name="Subtítulo", default="<p>Desde 2014, ajudamos empresas a crescer com estratégias afiadas, dados precisos e um time de elite. Se sua meta é escalar, nós temos o combustível.</p>")
@@ -194,11 +200,9 @@ class HomePage(Page):
     ]
 
     def get_context(self, request):
-        from solutions.models import SolutionSection
-        from companies.models import Company
+        from .snapshot import snapshot_context
         context = super().get_context(request)
-        context['sections'] = SolutionSection.objects.filter(is_active=True).order_by('order')
-        context['companies'] = Company.objects.filter(is_active=True).order_by('order', 'name')
+        context.update(snapshot_context(self, preview=getattr(request, 'is_preview', False)))
         return context
 
 
@@ -575,7 +579,7 @@ class OndeEstamosPage(Page):
 
     def get_context(self, request):
         context = super().get_context(request)
-        context["locations"] = Location.objects.filter(is_active=True).order_by("order", "city")
+        context.update(location_context())
         return context
 
     class Meta:
@@ -0,0 +1,46 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.images import get_image_model
+from wagtail.signals import page_published
+
+from common.renditions import IMAGE_METADATA_FIELDS
+from companies.models import Company
+from solutions.models import SolutionSection
+
+from .models import HomePage
+from .snapshot import invalidate_snippets, rebuild_in_background
+
+logger = logging.getLogger(__name__)
+
+
+def on_home_published(sender, instance, **kwargs):
+    # A nova revisão já muda a chave; só é preciso aquecer o snapshot
+    transaction.on_commit(lambda: rebuild_in_background([instance.pk]))
+
+
+def on_snippet_changed(sender, **kwargs):
+    invalidate_snippets()
+    transaction.on_commit(rebuild_in_background)
+
+
+def on_image_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IMAGE_METADATA_FIELDS:
+        return
+    in_use = (
+        SolutionSection.objects.filter(image=instance).exists()
+        or Company.objects.filter(logo=instance).exists()
+        or HomePage.objects.filter(about_image=instance).exists()
+    )
+    if in_use:
+        on_snippet_changed(sender)
+
+
+page_published.connect(on_home_published, sender=HomePage)
+
+for model in (SolutionSection, Company):
+    post_save.connect(on_snippet_changed, sender=model)
+    post_delete.connect(on_snippet_changed, sender=model)
+
+post_save.connect(on_image_changed, sender=get_image_model())
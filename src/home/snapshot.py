@@ -0,0 +1,136 @@
+"""
+Snapshot materializado do contexto da HomePage.
+
+Seções de soluções, empresas, o HTML das seções dinâmicas (StreamField) e a
+imagem da seção Sobre são montados uma única vez e guardados em cache, com
+chave formada pela revisão publicada da página e pela versão dos snippets.
+Publicar a página ou alterar uma seção/empresa reconstrói o snapshot em
+segundo plano (ver home.signals), e a renderização da home não consulta o
+banco enquanto o snapshot estiver válido.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from wagtail.images import get_image_model
+
+from common.renditions import specs_for
+
+logger = logging.getLogger(__name__)
+
+SNIPPETS_VERSION_KEY = 'home:snapshot:snippets'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24  # 24 horas
+BODY_TEMPLATE = 'home/partials/home_body.html'
+ABOUT_IMAGE_SPEC = 'fill-600x400'
+
+
+def with_renditions(queryset, field, specs):
+    """Carrega a imagem e apenas as renditions usadas pelo template"""
+    renditions = get_image_model().get_rendition_model().objects.filter(filter_spec__in=specs)
+    return queryset.select_related(field).prefetch_related(
+        Prefetch(f'{field}__renditions', queryset=renditions)
+    )
+
+
+def snapshot_key(page):
+    version = cache.get(SNIPPETS_VERSION_KEY) or 0
+    revision_id = page.live_revision_id or page.latest_revision_id or 0
+    return f'home:snapshot:{page.pk}:{revision_id}:{version}'
+
+
+def build_snapshot(page, preview=False):
+    """Monta o snapshot completo da HomePage (consultas e renderização)"""
+    from companies.models import Company
+    from solutions.models import SolutionSection
+
+    sections = list(with_renditions(
+        SolutionSection.objects.filter(is_active=True).order_by('order'),
+        'image', specs_for('solution_sections'),
+    ))
+    companies = list(with_renditions(
+        Company.objects.filter(is_active=True).order_by('order', 'name'),
+        'logo', specs_for('company_logos'),
+    ))
+
+    about_image_html = ''
+    if page.about_image_id:
+        rendition = page.about_image.get_rendition(ABOUT_IMAGE_SPEC)
+        about_image_html = rendition.img_tag({'class': 'img-fluid rounded'})
+
+    body_html = render_to_string(BODY_TEMPLATE, {
+        'page': page,
+        'sections': sections,
+        'companies': companies,
+        # Rascunho não pode usar nem gravar o cache de blocos (common.blockcache)
+        'block_cache': not preview,
+    })
+
+    return {
+        'sections': sections,
+        'companies': companies,
+        'about_image_html': about_image_html,
+        'body_html': body_html,
+    }
+
+
+def get_snapshot(page):
+    """Snapshot da página a partir do cache, montado na hora se ausente"""
+    key = snapshot_key(page)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(page)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def snapshot_context(page, preview=False):
+    """
+    Variáveis de contexto do template home_page.html. A pré-visualização
+    mostra um rascunho, que é montado na hora e não entra no cache.
+    """
+    snapshot = build_snapshot(page, preview=True) if preview else get_snapshot(page)
+    return {
+        'sections': snapshot['sections'],
+        'companies': snapshot['companies'],
+        'about_image_html': mark_safe(snapshot['about_image_html']),
+        'body_html': mark_safe(snapshot['body_html']),
+    }
+
+
+def rebuild_snapshots(page_ids=None):
+    """Reconstrói e grava o snapshot das HomePages publicadas"""
+    from .models import HomePage
+
+    pages = HomePage.objects.live()
+    if page_ids is not None:
+        pages = pages.filter(pk__in=page_ids)
+
+    rebuilt = 0
+    for page in pages:
+        cache.set(snapshot_key(page), build_snapshot(page), SNAPSHOT_TIMEOUT)
+        rebuilt += 1
+    return rebuilt
+
+
+def rebuild_in_background(page_ids=None):
+    """Agenda a reconstrução em uma thread, sem bloquear quem publicou"""
+    def run():
+        try:
+            rebuild_snapshots(page_ids)
+        except Exception as e:
+            logger.error(f"Erro ao reconstruir o snapshot da home: {e}")
+        finally:
+            # Conexões são por thread; a desta thread não será reutilizada
+            connections.close_all()
+
+    threading.Thread(target=run, name='home-snapshot', daemon=True).start()
+
+
+def invalidate_snippets():
+    """Troca a versão dos snippets usados pela home"""
+    cache.set(SNIPPETS_VERSION_KEY, time.time_ns(), None)
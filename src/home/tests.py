@@ -1,9 +1,16 @@
+from django.core.cache import cache
 from django.urls import reverse
 from home.models import HomePage
+from home.snapshot import snapshot_context
 
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
 from wagtail.models import Page
 from wagtail.test.utils import WagtailPageTestCase
 
+from companies.models import Company, CompanyCategory
+from solutions.models import SolutionSection
+
 
 class HomeSetUpTests(WagtailPageTestCase):
     """
@@ -41,3 +48,60 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class HomeSnapshotTests(WagtailPageTestCase):
+    """
+    O contexto da home vem de um snapshot em cache, invalidado pela revisão
+    publicada e pela versão dos snippets.
+    """
+
+    def setUp(self):
+        cache.clear()
+        image = Image.objects.create(title="Imagem", file=get_test_image_file())
+        SolutionSection.objects.create(title="Mídia Paga", subtitle="Anúncios", image=image)
+        category = CompanyCategory.objects.create(name="CRM", slug="crm")
+        Company.objects.create(
+            name="Kaizen CRM", slug="kaizen-crm", tagline="CRM", description="<p>CRM</p>",
+            category=category, logo=image,
+        )
+
+        self.homepage = HomePage(
+            title="Home",
+            slug="home-snapshot",
+            about_image=image,
+            body=[
+                ('solutions_section', {'title': "Soluções", 'subtitle': "Tudo", 'solutions': []}),
+                ('clients_carousel', {'title': "Clientes"}),
+            ],
+        )
+        Page.objects.get(pk=1).get_children().first().add_child(instance=self.homepage)
+        self.homepage.save_revision().publish()
+
+    def test_steady_state_context_has_no_queries(self):
+        page = HomePage.objects.get(pk=self.homepage.pk)
+        snapshot_context(page)
+        with self.assertNumQueries(0):
+            context = snapshot_context(page)
+        self.assertIn("Mídia Paga", context['body_html'])
+        self.assertIn("Kaizen CRM", context['body_html'])
+        self.assertIn("fill-600x400", context['about_image_html'])
+
+    def test_page_renders_from_snapshot(self):
+        response = self.client.get(self.homepage.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Mídia Paga")
+
+    def test_snippet_change_invalidates_snapshot(self):
+        page = HomePage.objects.get(pk=self.homepage.pk)
+        snapshot_context(page)
+        SolutionSection.objects.create(title="SEO", subtitle="Busca orgânica")
+        self.assertIn("SEO", snapshot_context(page)['body_html'])
+
+    def test_new_revision_invalidates_snapshot(self):
+        page = HomePage.objects.get(pk=self.homepage.pk)
+        snapshot_context(page)
+        page.body = [('clients_carousel', {'title': "Marcas parceiras"})]
+        page.save_revision().publish()
+        page = HomePage.objects.get(pk=self.homepage.pk)
+        self.assertIn("Marcas parceiras", snapshot_context(page)['body_html'])
@@ -0,0 +1,126 @@
+"""
+Mescla de leads duplicados (mesmo tipo e mesmo e-mail normalizado).
+
+O lead mais antigo é mantido; campos vazios dele são preenchidos com o
+valor mais recente dos duplicados, o status fica o mais avançado e os
+touchpoints e emails do outbox passam a apontar para ele. Os grupos são
+processados em lotes, cada lote em sua própria transação.
+
+Usado pelo comando `manage.py dedupe_leads` e pela migração que cria a
+restrição única (com os modelos históricos, via `apps`).
+"""
+import logging
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Lower, NullIf, Trim
+
+logger = logging.getLogger(__name__)
+
+STATUS_ORDER = ['step1', 'step2', 'step3', 'completed']
+
+# Campos preenchidos a partir dos duplicados quando vazios no lead mantido
+FILL_FIELDS = [
+    'name', 'phone', 'monthly_revenue', 'business_area', 'main_challenge', 'website_social',
+    'current_activity', 'experience_years', 'franchise_timeline', 'franchise_type',
+    'investment_range', 'additional_info', 'calendly_event_id', 'scheduled_date', 'utm_parameters_id',
+]
+
+
+def normalized_email():
+    """Mesma normalização de leads.models.normalize_email, em SQL"""
+    return NullIf(Lower(Trim('email')), Value(''))
+
+
+def normalize_all(apps=global_apps):
+    """Preenche email_normalized dos leads que ainda não o têm (um único UPDATE)"""
+    Lead = apps.get_model('leads', 'Lead')
+    return Lead.objects.filter(email_normalized__isnull=True).update(email_normalized=normalized_email())
+
+
+def duplicate_groups(apps=global_apps):
+    """(lead_type, e-mail normalizado) com mais de um lead, inclusive leads ainda não normalizados"""
+    Lead = apps.get_model('leads', 'Lead')
+    return (
+        Lead.objects
+        .annotate(key=normalized_email())
+        .filter(key__isnull=False)
+        .values('lead_type', 'key')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+
+
+def merge_group(leads, apps=global_apps):
+    """Mescla os leads de um grupo (ordenados do mais antigo ao mais novo)"""
+    Lead = apps.get_model('leads', 'Lead')
+    Touchpoint = apps.get_model('leads', 'Touchpoint')
+    OutboundEmail = apps.get_model('contact', 'OutboundEmail')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    survivor, duplicates = leads[0], leads[1:]
+    changed = set()
+    for duplicate in reversed(duplicates):
+        for field in FILL_FIELDS:
+            value = getattr(duplicate, field)
+            if value not in (None, '') and getattr(survivor, field) in (None, ''):
+                setattr(survivor, field, value)
+                changed.add(field)
+    statuses = [lead.status for lead in leads if lead.status in STATUS_ORDER]
+    if statuses:
+        status = max(statuses, key=STATUS_ORDER.index)
+        if status != survivor.status:
+            survivor.status = status
+            changed.add('status')
+    if not survivor.confirmation_email_sent and any(lead.confirmation_email_sent for lead in duplicates):
+        survivor.confirmation_email_sent = True
+        changed.add('confirmation_email_sent')
+    if survivor.email_normalized != survivor.key:
+        survivor.email_normalized = survivor.key
+        changed.add('email_normalized')
+
+    duplicate_ids = [lead.id for lead in duplicates]
+    Touchpoint.objects.filter(lead_id__in=duplicate_ids).update(lead_id=survivor.id)
+    content_type = ContentType.objects.filter(app_label='leads', model='lead').first()
+    if content_type is not None:
+        OutboundEmail.objects.filter(
+            content_type_id=content_type.id, object_id__in=[str(pk) for pk in duplicate_ids],
+        ).update(object_id=str(survivor.id))
+    Lead.objects.filter(id__in=duplicate_ids).delete()
+    if changed:
+        survivor.save(update_fields=sorted(changed))
+    return len(duplicate_ids)
+
+
+def merge_duplicates(batch_size=500, apps=global_apps):
+    """
+    Mescla todos os grupos duplicados e normaliza os leads restantes.
+    Retorna (grupos, leads removidos).
+    """
+    Lead = apps.get_model('leads', 'Lead')
+    groups = removed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(duplicate_groups(apps)[:batch_size])
+            if not batch:
+                break
+            keys = {(group['lead_type'], group['key']) for group in batch}
+            members = {}
+            for lead in (
+                Lead.objects
+                .select_for_update()
+                .annotate(key=normalized_email())
+                .filter(key__in={email for _, email in keys})
+                .order_by('created_at', 'id')
+            ):
+                key = (lead.lead_type, lead.key)
+                if key in keys:
+                    members.setdefault(key, []).append(lead)
+            for leads in members.values():
+                removed += merge_group(leads, apps)
+                groups += 1
+        logger.info(f"Leads: {groups} grupo(s) mesclados, {removed} duplicado(s) removidos")
+    normalize_all(apps)
+    return groups, removed
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from leads.dedupe import duplicate_groups, merge_duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        "Mescla leads duplicados (mesmo tipo e e-mail normalizado) em lotes: mantém o "
+        "mais antigo, completa campos vazios, move touchpoints e emails da fila e "
+        "normaliza os e-mails de leads gravados sem passar pelo model (ex.: importações)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Grupos de duplicados por transação')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta os grupos duplicados')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{duplicate_groups().count()} grupo(s) de leads duplicados")
+            return
+        groups, removed = merge_duplicates(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{groups} grupo(s) mesclados, {removed} lead(s) duplicados removidos"
+        ))
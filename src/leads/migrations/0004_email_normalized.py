@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def normalize_and_merge(apps, schema_editor):
+    from leads.dedupe import merge_duplicates
+
+    merge_duplicates(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0006_email_outbox'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('leads', '0003_utmparameters_touchpoint_lead_utm_parameters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='email_normalized',
+            field=models.EmailField(blank=True, editable=False, max_length=254, null=True, verbose_name='E-mail normalizado'),
+        ),
+        migrations.RunPython(normalize_and_merge, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Migração separada: a restrição é criada depois do commit da mescla
+
+    dependencies = [
+        ('leads', '0004_email_normalized'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='lead',
+            constraint=models.UniqueConstraint(fields=('lead_type', 'email_normalized'), name='leads_lead_type_email_unique'),
+        ),
+    ]
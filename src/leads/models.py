@@ -4,6 +4,12 @@ from django.core.validators import RegexValidator
 import json
 
 
+def normalize_email(email):
+    """E-mail usado na unicidade do lead (None quando vazio)"""
+    email = (email or '').strip().lower()
+    return email or None
+
+
 class UTMParameters(models.Model):
     """
     Modelo para rastrear parâmetros UTM dos leads
@@ -91,6 +97,7 @@ class Lead(models.Model):
     # Passo 1 - Dados básicos
     name = models.CharField(max_length=100, verbose_name="Nome")
     email = models.EmailField(verbose_name="E-mail")
+    email_normalized = models.EmailField(null=True, blank=True, editable=False, verbose_name="E-mail normalizado")
     phone = models.CharField(
         max_length=20, 
         verbose_name="Telefone",
@@ -269,10 +276,21 @@ class Lead(models.Model):
         verbose_name = "Lead"
         verbose_name_plural = "Leads"
         ordering = ['-created_at']
+        constraints = [
+            # Alvo do INSERT ... ON CONFLICT em leads.upsert
+            models.UniqueConstraint(fields=['lead_type', 'email_normalized'], name='leads_lead_type_email_unique'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.email}"
     
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+        super().save(*args, **kwargs)
+    
     def get_phone_display(self):
         """Retorna o telefone formatado para exibição"""
         return self.phone
@@ -0,0 +1,127 @@
+import io
+import json
+import threading
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+from contact.models import OutboundEmail
+from contact.outbox import enqueue
+
+from .models import Lead, Touchpoint
+from .upsert import upsert_lead
+
+
+class LeadUpsertTests(TestCase):
+    """Gravação do lead com INSERT ... ON CONFLICT e atualização só do que mudou"""
+
+    def post(self, **data):
+        return self.client.post('/leads/api/leads/', json.dumps(data), content_type='application/json')
+
+    def test_step1_upserts_by_normalized_email(self):
+        with self.assertNumQueries(1):
+            response = self.post(step='1', name="Ana", email="Ana@Example.com ", phone="51999999999")
+        lead_id = response.json()['lead_id']
+
+        response = self.post(step='1', name="Ana Souza", email="ana@example.com", phone="51888888888")
+        self.assertEqual(response.json()['lead_id'], lead_id)
+        lead = Lead.objects.get()
+        self.assertEqual((lead.name, lead.phone, lead.email_normalized), ("Ana Souza", "51888888888", "ana@example.com"))
+
+        # Franquia e negócio são leads distintos para o mesmo e-mail
+        self.post(type='franchise_lead', name="Ana", email="ana@example.com", phone="51999999999")
+        self.assertEqual(Lead.objects.filter(email_normalized="ana@example.com").count(), 2)
+
+    def test_step2_is_a_single_update(self):
+        lead = upsert_lead('business', "ana@example.com", name="Ana", phone="51999999999", status='step1')
+        with self.assertNumQueries(1):
+            response = self.post(step='2', lead_id=lead.pk, monthly_revenue='10k-50k', business_area='ecommerce')
+        self.assertEqual(response.status_code, 200)
+        lead.refresh_from_db()
+        self.assertEqual((lead.status, lead.business_area), ('step2', 'ecommerce'))
+        self.assertEqual(self.post(step='2', lead_id=999999).status_code, 404)
+
+    def test_step3_updates_only_changed_columns(self):
+        lead = upsert_lead('business', "ana@example.com", name="Ana", phone="51999999999", status='step2')
+        with CaptureQueriesContext(connection) as queries:
+            self.post(step='3', lead_id=lead.pk, calendly_event_id="evt-1")
+        update = next(query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "leads_lead"'))
+        self.assertIn('"calendly_event_id"', update)
+        self.assertNotIn('"name"', update)
+        lead.refresh_from_db()
+        self.assertEqual(lead.status, 'completed')
+
+
+class AsyncLeadAPITests(TestCase):
+    """LeadAPIView é assíncrona e atende pelo AsyncClient (caminho ASGI)"""
+
+    async def test_multi_step_flow_over_asgi(self):
+        from .views import LeadAPIView
+
+        self.assertTrue(LeadAPIView.view_is_async)
+        post = lambda **data: self.async_client.post('/leads/api/leads/', json.dumps(data), content_type='application/json')
+
+        response = await post(step='1', name="Ana", email="ana@example.com", phone="51999999999")
+        lead_id = response.json()['lead_id']
+        response = await post(step='2', lead_id=lead_id, monthly_revenue='10k-50k', business_area='tecnologia')
+        self.assertEqual(response.status_code, 200)
+        response = await post(step='3', lead_id=lead_id, calendly_event_id='evt-1')
+        self.assertTrue(response.json()['success'])
+
+        lead = await Lead.objects.aget(pk=lead_id)
+        self.assertEqual((lead.status, lead.business_area, lead.calendly_event_id), ('completed', 'tecnologia', 'evt-1'))
+        self.assertEqual(await OutboundEmail.objects.acount(), 2)
+
+        response = await post(step='2', lead_id=999999)
+        self.assertEqual(response.status_code, 404)
+
+
+class LeadDedupeTests(TestCase):
+    """Mescla de duplicados anteriores à restrição única"""
+
+    def make_raw(self, **fields):
+        # Simula linhas antigas/importadas: grava sem passar por Lead.save()
+        defaults = {'name': "Ana", 'phone': "", 'lead_type': 'business', 'status': 'step1'}
+        return Lead.objects.bulk_create([Lead(**{**defaults, **fields})])[0]
+
+    def test_merges_into_oldest_lead(self):
+        survivor = upsert_lead('business', "ana@example.com", name="Ana", phone="", status='step1')
+        duplicate = self.make_raw(email="ANA@example.com", phone="51999999999", status='completed',
+                                  business_area='ecommerce')
+        Touchpoint.objects.create(lead=duplicate, event_type='page_view')
+        enqueue("Oi", ["ana@example.com"], body="Olá", related=duplicate, status_field='confirmation_email_sent')
+        other = self.make_raw(email="bruno@example.com")
+
+        call_command('dedupe_leads', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(set(Lead.objects.values_list('pk', flat=True)), {survivor.pk, other.pk})
+        survivor.refresh_from_db()
+        self.assertEqual((survivor.phone, survivor.status, survivor.business_area), ("51999999999", 'completed', 'ecommerce'))
+        self.assertEqual(survivor.touchpoints.count(), 1)
+        self.assertEqual(OutboundEmail.objects.get().object_id, str(survivor.pk))
+        other.refresh_from_db()
+        self.assertEqual(other.email_normalized, "bruno@example.com")
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentLeadUpsertTests(TransactionTestCase):
+    """Submissões simultâneas do mesmo e-mail não criam duplicados"""
+
+    def test_concurrent_step1(self):
+        barrier = threading.Barrier(4)
+
+        def submit(index):
+            try:
+                barrier.wait()
+                upsert_lead('business', "ana@example.com", name=f"Ana {index}", phone="51999999999", status='step1')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(Lead.objects.filter(email_normalized="ana@example.com").count(), 1)
@@ -0,0 +1,38 @@
+"""
+Escrita de leads sem corrida e com o mínimo de consultas.
+
+O passo 1 e o formulário de franquia gravam com um único
+INSERT ... ON CONFLICT (lead_type, email_normalized) DO UPDATE: submissões
+simultâneas do mesmo e-mail atualizam o mesmo lead em vez de criar
+duplicados. Os passos seguintes atualizam apenas as colunas que mudaram.
+"""
+from django.utils import timezone
+
+from .models import Lead, normalize_email
+
+
+def upsert_lead(lead_type, email, **fields):
+    """Cria ou atualiza o lead do e-mail em uma única consulta. Retorna o Lead (com pk)."""
+    lead = Lead(lead_type=lead_type, email=email.strip(), email_normalized=normalize_email(email), **fields)
+    Lead.objects.bulk_create(
+        [lead],
+        update_conflicts=True,
+        unique_fields=['lead_type', 'email_normalized'],
+        update_fields=['email', *fields, 'updated_at'],
+    )
+    return lead
+
+
+def update_lead(lead, **values):
+    """Grava apenas os valores diferentes dos atuais. Retorna os campos alterados."""
+    changed = [name for name, value in values.items() if getattr(lead, name) != value]
+    for name in changed:
+        setattr(lead, name, values[name])
+    if changed:
+        lead.save(update_fields=[*changed, 'updated_at'])
+    return changed
+
+
+def update_lead_by_id(lead_id, **values):
+    """UPDATE direto das colunas do passo, sem ler o lead. Retorna False se não existir."""
+    return Lead.objects.filter(id=lead_id).update(**values, updated_at=timezone.now()) > 0
@@ -6,4 +6,5 @@ app_name = 'leads'
 urlpatterns = [
     path('api/leads/', views.LeadAPIView.as_view(), name='lead_api'),
     path('api/leads/<int:lead_id>/', views.get_lead_data, name='get_lead_data'),
+    path('api/leads/touchpoints/', views.touchpoints, name='touchpoints'),
 ]
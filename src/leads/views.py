@@ -1,15 +1,19 @@
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views import View
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
 import json
 import logging
 
+from common.touchpoints import ingest
+from contact.outbox import enqueue
 from .models import Lead
+from .upsert import update_lead, update_lead_by_id, upsert_lead
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +21,12 @@ logger = logging.getLogger(__name__)
 @method_decorator(csrf_exempt, name='dispatch')
 class LeadAPIView(View):
     """
-    API para gerenciar leads do formulário multi-passo
+    API para gerenciar leads do formulário multi-passo. Assíncrona: o acesso
+    ao banco vai para o thread único de código síncrono do processo
+    (sync_to_async com thread_sensitive=True), fora do event loop sob ASGI.
     """
     
-    def post(self, request):
+    async def post(self, request):
         try:
             # Verificar se é FormData (franqueados) ou JSON (negócios)
             if request.content_type == 'application/x-www-form-urlencoded':
@@ -32,17 +38,17 @@ class LeadAPIView(View):
             
             # Se for lead de franquia, usar endpoint específico
             if lead_type == 'franchise_lead':
-                return self._handle_franchise_lead(data)
+                return await self._handle_franchise_lead(data)
             
             # Lógica original para leads de negócio
             step = data.get('step')
             
             if step == '1':
-                return self._handle_step1(data)
+                return await self._handle_step1(data)
             elif step == '2':
-                return self._handle_step2(data)
+                return await self._handle_step2(data)
             elif step == '3':
-                return self._handle_step3(data)
+                return await self._handle_step3(data)
             else:
                 return JsonResponse({'error': 'Step inválido'}, status=400)
                 
@@ -52,7 +58,7 @@ class LeadAPIView(View):
             logger.error(f"Erro na API de leads: {str(e)}")
             return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
     
-    def _handle_step1(self, data):
+    async def _handle_step1(self, data):
         """Passo 1: Salvar dados básicos"""
         name = data.get('name', '').strip()
         email = data.get('email', '').strip()
@@ -61,22 +67,8 @@ class LeadAPIView(View):
         if not all([name, email, phone]):
             return JsonResponse({'error': 'Todos os campos são obrigatórios'}, status=400)
         
-        # Criar ou atualizar lead
-        lead, created = Lead.objects.get_or_create(
-            email=email,
-            defaults={
-                'name': name,
-                'phone': phone,
-                'status': 'step1'
-            }
-        )
-        
-        if not created:
-            # Atualizar dados existentes
-            lead.name = name
-            lead.phone = phone
-            lead.status = 'step1'
-            lead.save()
+        # Criar ou atualizar lead (um único INSERT ... ON CONFLICT)
+        lead = await sync_to_async(upsert_lead)('business', email, name=name, phone=phone, status='step1')
         
         return JsonResponse({
             'success': True,
@@ -84,7 +76,7 @@ class LeadAPIView(View):
             'message': 'Dados salvos com sucesso!'
         })
     
-    def _handle_step2(self, data):
+    async def _handle_step2(self, data):
         """Passo 2: Salvar informações do negócio"""
         lead_id = data.get('lead_id')
         monthly_revenue = data.get('monthly_revenue', '')
@@ -95,25 +87,24 @@ class LeadAPIView(View):
         if not lead_id:
             return JsonResponse({'error': 'Lead ID é obrigatório'}, status=400)
         
-        try:
-            lead = Lead.objects.get(id=lead_id)
-        except Lead.DoesNotExist:
+        # Atualizar dados do negócio (UPDATE direto, sem ler o lead)
+        updated = await sync_to_async(update_lead_by_id)(
+            lead_id,
+            monthly_revenue=monthly_revenue,
+            business_area=business_area,
+            main_challenge=main_challenge,
+            website_social=website_social,
+            status='step2',
+        )
+        if not updated:
             return JsonResponse({'error': 'Lead não encontrado'}, status=404)
         
-        # Atualizar dados do negócio
-        lead.monthly_revenue = monthly_revenue
-        lead.business_area = business_area
-        lead.main_challenge = main_challenge
-        lead.website_social = website_social
-        lead.status = 'step2'
-        lead.save()
-        
         return JsonResponse({
             'success': True,
             'message': 'Informações do negócio salvas!'
         })
     
-    def _handle_step3(self, data):
+    async def _handle_step3(self, data):
         """Passo 3: Finalizar lead e enviar email de confirmação"""
         lead_id = data.get('lead_id')
         calendly_event_id = data.get('calendly_event_id', '')
@@ -123,33 +114,30 @@ class LeadAPIView(View):
             return JsonResponse({'error': 'Lead ID é obrigatório'}, status=400)
         
         try:
-            lead = Lead.objects.get(id=lead_id)
+            lead = await Lead.objects.aget(id=lead_id)
         except Lead.DoesNotExist:
             return JsonResponse({'error': 'Lead não encontrado'}, status=404)
         
-        # Atualizar dados do agendamento
-        lead.calendly_event_id = calendly_event_id
+        # Atualizar dados do agendamento (apenas colunas alteradas)
+        values = {'calendly_event_id': calendly_event_id, 'status': 'completed'}
         if scheduled_date:
             from datetime import datetime
-            lead.scheduled_date = datetime.fromisoformat(scheduled_date.replace('Z', '+00:00'))
-        lead.status = 'completed'
-        lead.save()
+            values['scheduled_date'] = datetime.fromisoformat(scheduled_date.replace('Z', '+00:00'))
         
-        # Enviar email de confirmação
-        try:
-            self._send_confirmation_email(lead)
-            lead.confirmation_email_sent = True
-            lead.save()
-        except Exception as e:
-            logger.error(f"Erro ao enviar email: {str(e)}")
-            # Não falhar o processo por causa do email
+        await sync_to_async(self._complete_lead)(lead, values)
         
         return JsonResponse({
             'success': True,
             'message': 'Lead finalizado com sucesso!'
         })
     
-    def _handle_franchise_lead(self, data):
+    def _complete_lead(self, lead, values):
+        # Emails vão para a fila na mesma transação; o worker marca confirmation_email_sent
+        with transaction.atomic():
+            update_lead(lead, **values)
+            self._queue_confirmation_email(lead)
+    
+    async def _handle_franchise_lead(self, data):
         """Processar lead de franqueado completo"""
         try:
             # Dados básicos
@@ -168,12 +156,11 @@ class LeadAPIView(View):
             if not all([name, email, phone]):
                 return JsonResponse({'error': 'Nome, email e telefone são obrigatórios'}, status=400)
             
-            # Criar lead de franquia
-            lead = Lead.objects.create(
+            # Criar ou atualizar lead de franquia (emails na mesma transação)
+            lead = await sync_to_async(self._save_franchise_lead)(
+                email,
                 name=name,
-                email=email,
                 phone=phone,
-                lead_type='franchise',
                 current_activity=current_activity,
                 experience_years=experience_years,
                 franchise_timeline=franchise_timeline,
@@ -183,15 +170,6 @@ class LeadAPIView(View):
                 status='completed'
             )
             
-            # Enviar email de confirmação
-            try:
-                self._send_franchise_confirmation_email(lead)
-                lead.confirmation_email_sent = True
-                lead.save()
-            except Exception as e:
-                logger.error(f"Erro ao enviar email de franquia: {str(e)}")
-                # Não falhar o processo por causa do email
-            
             return JsonResponse({
                 'success': True,
                 'lead_id': lead.id,
@@ -202,8 +180,14 @@ class LeadAPIView(View):
             logger.error(f"Erro ao processar lead de franquia: {str(e)}")
             return JsonResponse({'error': 'Erro ao processar dados de franqueado'}, status=500)
     
-    def _send_confirmation_email(self, lead):
-        """Enviar email de confirmação de agendamento"""
+    def _save_franchise_lead(self, email, **values):
+        with transaction.atomic():
+            lead = upsert_lead('franchise', email, **values)
+            self._queue_franchise_confirmation_email(lead)
+        return lead
+    
+    def _queue_confirmation_email(self, lead):
+        """Enfileirar emails de confirmação de agendamento"""
         subject = f"Confirmação de Agendamento - {lead.name}"
         
         # Renderizar template do email
@@ -234,27 +218,29 @@ class LeadAPIView(View):
         # Email para o comercial
         commercial_email = getattr(settings, 'COMMERCIAL_EMAIL', 'comercial@agenciakaizen.com.br')
         
-        send_mail(
+        enqueue(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[commercial_email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[commercial_email],
+            body=plain_message,
+            html_body=html_message,
+            category='lead_notification',
+            related=lead,
+            status_field='confirmation_email_sent',
         )
         
         # Email de confirmação para o lead
-        send_mail(
+        enqueue(
             subject=f"Confirmação de Agendamento - Agência Kaizen",
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[lead.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[lead.email],
+            body=plain_message,
+            html_body=html_message,
+            category='lead_confirmation',
+            related=lead,
+            status_field='confirmation_email_sent',
         )
     
-    def _send_franchise_confirmation_email(self, lead):
-        """Enviar email de confirmação para franqueados"""
+    def _queue_franchise_confirmation_email(self, lead):
+        """Enfileirar emails de confirmação para franqueados"""
         subject = f"Interesse em Franquia - {lead.name}"
         
         # Renderizar template do email
@@ -289,23 +275,25 @@ class LeadAPIView(View):
         # Email para o comercial/franquias
         franchise_email = getattr(settings, 'FRANCHISE_EMAIL', 'franquias@agenciakaizen.com.br')
         
-        send_mail(
+        enqueue(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[franchise_email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[franchise_email],
+            body=plain_message,
+            html_body=html_message,
+            category='franchise_lead_notification',
+            related=lead,
+            status_field='confirmation_email_sent',
         )
         
         # Email de confirmação para o lead
-        send_mail(
+        enqueue(
             subject=f"Confirmação de Interesse em Franquia - Agência Kaizen",
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[lead.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[lead.email],
+            body=plain_message,
+            html_body=html_message,
+            category='franchise_lead_confirmation',
+            related=lead,
+            status_field='confirmation_email_sent',
         )
 
 
@@ -334,3 +322,13 @@ def get_lead_data(request, lead_id):
     except Exception as e:
         logger.error(f"Erro ao buscar lead: {str(e)}")
         return JsonResponse({'error': 'Erro interno do servidor'}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def touchpoints(request):
+    """
+    Ingestão de touchpoints do funil de leads: um evento, uma lista ou
+    {"events": [...]} (também via navigator.sendBeacon), gravados em lote.
+    """
+    return ingest(request, 'leads')
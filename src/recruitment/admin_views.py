@@ -0,0 +1,53 @@
+"""
+Busca de candidatos no Wagtail Admin: texto livre sobre habilidades,
+cargo, cidade, motivação e currículo, com facetas por área, estado e
+experiências (ver recruitment.search).
+"""
+from django.contrib.auth.decorators import permission_required
+from django.core.paginator import Paginator
+from django.shortcuts import render
+
+from .models import RecruitmentApplication
+from .search import EXPERIENCE_FLAGS, parse_filters, search_candidates
+
+PER_PAGE = 25
+
+
+def toggle_url(request, field):
+    """Querystring atual ligando/desligando um filtro de experiência"""
+    params = request.GET.copy()
+    params.pop('p', None)
+    if params.get(field):
+        del params[field]
+    else:
+        params[field] = '1'
+    return f"?{params.urlencode()}"
+
+
+@permission_required('recruitment.view_recruitmentapplication', raise_exception=True)
+def candidate_search(request):
+    query = request.GET.get('q', '').strip()
+    filters = parse_filters(request.GET)
+    results, facets = search_candidates(query, filters)
+    page = Paginator(results, PER_PAGE).get_page(request.GET.get('p'))
+
+    area_labels = dict(RecruitmentApplication._meta.get_field('desired_area').choices)
+    return render(request, 'recruitment/admin/candidate_search.html', {
+        'query': query,
+        'filters': filters,
+        'page': page,
+        'areas': [
+            {'value': value, 'label': area_labels.get(value, value), 'count': count}
+            for value, count in facets['desired_area'].items()
+        ],
+        'states': [{'value': value, 'count': count} for value, count in facets['state'].items()],
+        'experience': [
+            {
+                'label': label,
+                'count': facets['experience'][field],
+                'active': field in filters,
+                'url': toggle_url(request, field),
+            }
+            for field, label in EXPERIENCE_FLAGS
+        ],
+    })
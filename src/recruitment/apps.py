@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class RecruitmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recruitment'
-    verbose_name = "Recrutamento"
\ No newline at end of file
+    verbose_name = "Recrutamento"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from recruitment.search import index_pending_resumes
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrai (uma única vez) o texto dos currículos das candidaturas e atualiza "
+        "o índice de busca de candidatos. Para a carga inicial do índice use "
+        "também `manage.py update_index`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Candidaturas por lote')
+
+    def handle(self, *args, **options):
+        total = index_pending_resumes(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Texto extraído de {total} currículo(s)"))
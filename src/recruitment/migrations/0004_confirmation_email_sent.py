@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0003_recruitmentapplication_instagram_profile_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recruitmentapplication',
+            name='confirmation_email_sent',
+            field=models.BooleanField(default=False, verbose_name='Email de Confirmação Enviado'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recruitment', '0004_confirmation_email_sent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recruitmentapplication',
+            name='resume_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Texto do Currículo'),
+        ),
+        migrations.AddField(
+            model_name='recruitmentapplication',
+            name='resume_text_extracted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Texto do Currículo Extraído em'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitmentapplication',
+            index=models.Index(fields=['desired_area', 'state'], name='recruitment_area_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recruitmentapplication',
+            index=models.Index(fields=['state'], name='recruitment_state_idx'),
+        ),
+    ]
@@ -11,7 +11,7 @@ from wagtail.blocks import (
 from wagtail.images.blocks import ImageChooserBlock
 
 
-class RecruitmentApplication(models.Model):
+class RecruitmentApplication(index.Indexed, models.Model):
     """
     Modelo para candidaturas de recrutamento
     """
@@ -132,6 +132,12 @@ class RecruitmentApplication(models.Model):
     resume_file = models.FileField(upload_to='recruitment/resumes/', blank=True, verbose_name="Currículo")
     cover_letter = models.TextField(blank=True, verbose_name="Carta de Apresentação")
     
+    # Texto do currículo, extraído uma única vez para a busca (ver recruitment.search)
+    resume_text = models.TextField(blank=True, editable=False, verbose_name="Texto do Currículo")
+    resume_text_extracted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Texto do Currículo Extraído em"
+    )
+    
     # Status da Candidatura
     status = models.CharField(
         max_length=50,
@@ -145,6 +151,10 @@ class RecruitmentApplication(models.Model):
         default='nova',
         verbose_name="Status"
     )
+    confirmation_email_sent = models.BooleanField(
+        default=False,
+        verbose_name="Email de Confirmação Enviado"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Criado em")
@@ -154,6 +164,40 @@ class RecruitmentApplication(models.Model):
         verbose_name = "Candidatura"
         verbose_name_plural = "Candidaturas"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['desired_area', 'state'], name='recruitment_area_state_idx'),
+            models.Index(fields=['state'], name='recruitment_state_idx'),
+        ]
+    
+    # Busca de candidatos: no PostgreSQL o boost vira o peso do tsvector
+    # (4 -> A, 3 -> B, 2 -> C, sem boost -> D)
+    search_fields = [
+        index.SearchField('technical_skills', boost=4),
+        index.SearchField('current_position', boost=3),
+        index.SearchField('get_desired_area_display', boost=3),
+        index.SearchField('city', boost=2),
+        index.SearchField('full_name'),
+        index.SearchField('current_company'),
+        index.SearchField('course_name'),
+        index.SearchField('languages'),
+        index.SearchField('certifications'),
+        index.SearchField('motivation'),
+        index.SearchField('career_goals'),
+        index.SearchField('cover_letter'),
+        index.SearchField('resume_text'),
+        index.FilterField('desired_area'),
+        index.FilterField('state'),
+        index.FilterField('status'),
+        index.FilterField('experience_years'),
+        index.FilterField('created_at'),
+        index.FilterField('crm_experience'),
+        index.FilterField('social_media_experience'),
+        index.FilterField('google_ads_experience'),
+        index.FilterField('facebook_ads_experience'),
+        index.FilterField('analytics_experience'),
+        index.FilterField('seo_experience'),
+        index.FilterField('content_creation_experience'),
+    ]
     
     def __str__(self):
         return f"{self.full_name} - {self.desired_area}"
@@ -0,0 +1,146 @@
+"""
+Busca de candidatos.
+
+As candidaturas são indexadas pelo backend de busca do Wagtail: no
+PostgreSQL, um tsvector por candidatura em wagtailsearch_indexentry (com
+índice GIN), com pesos vindos do boost de cada campo em
+RecruitmentApplication.search_fields — habilidades (A), cargo e área (B),
+cidade (C), o restante e o texto do currículo (D). O índice é atualizado
+a cada save pelos sinais do Wagtail, então uma nova candidatura entra na
+busca sem reindexação completa (`manage.py update_index` só é necessário
+para a carga inicial).
+
+O texto do currículo é extraído uma única vez e guardado em resume_text:
+vem do Upload processado pelo worker de uploads (sinal upload_processed)
+ou, para arquivos enviados no formulário antigo, do próprio arquivo via
+`manage.py index_resumes`.
+"""
+import io
+import logging
+from collections import OrderedDict
+
+from django.db.models import Count, Q
+from django.utils import timezone
+from wagtail.search.backends import get_search_backend
+
+from common.uploads import DOCX, PDF, extract_docx_text, extract_pdf_text, sniff_type, upload_settings
+
+from .models import RecruitmentApplication
+
+logger = logging.getLogger(__name__)
+
+EXPERIENCE_FLAGS = [
+    ('crm_experience', 'CRM'),
+    ('social_media_experience', 'Redes Sociais'),
+    ('google_ads_experience', 'Google Ads'),
+    ('facebook_ads_experience', 'Facebook Ads'),
+    ('analytics_experience', 'Analytics'),
+    ('seo_experience', 'SEO'),
+    ('content_creation_experience', 'Criação de Conteúdo'),
+]
+FACET_FIELDS = ['desired_area', 'state']
+
+
+def extract_resume_text(application):
+    """
+    Texto do currículo de uma candidatura. Usa o texto já extraído pelo
+    worker de uploads; devolve None se o upload ainda não foi processado.
+    """
+    from common.models import Upload
+
+    name = application.resume_file.name
+    upload = Upload.objects.filter(file=name).only('status', 'extracted_text').first()
+    if upload is not None:
+        if upload.status == 'stored':
+            return None
+        return upload.extracted_text
+
+    with application.resume_file.open('rb') as stored:
+        data = io.BytesIO(stored.read())
+    detected = sniff_type(data.getvalue()[:16], data)
+    data.seek(0)
+    if detected == DOCX:
+        text = extract_docx_text(data)
+    elif detected == PDF:
+        text = extract_pdf_text(data)
+    else:
+        text = ''
+    return text[:upload_settings()['MAX_TEXT_LENGTH']]
+
+
+def set_resume_text(application, text):
+    """Grava o texto do currículo; o post_save reindexa a candidatura"""
+    application.resume_text = text
+    application.resume_text_extracted_at = timezone.now()
+    application.save(update_fields=['resume_text', 'resume_text_extracted_at'])
+
+
+def index_pending_resumes(batch_size=100):
+    """Extrai o texto dos currículos ainda não extraídos. Retorna o total."""
+    pending = (
+        RecruitmentApplication.objects
+        .filter(resume_text_extracted_at__isnull=True)
+        .exclude(resume_file='')
+        .order_by('pk')
+    )
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        for application in batch:
+            last_pk = application.pk
+            try:
+                text = extract_resume_text(application)
+            except Exception as e:
+                # Arquivo ilegível: registra e não tenta de novo
+                logger.error(f"Erro ao extrair o currículo da candidatura {application.pk}: {e}")
+                text = ''
+            if text is None:
+                continue
+            set_resume_text(application, text)
+            total += 1
+
+
+def parse_filters(params):
+    """Filtros válidos da querystring (área, estado e experiências)"""
+    filters = {}
+    desired_area = params.get('desired_area')
+    if desired_area in dict(RecruitmentApplication._meta.get_field('desired_area').choices):
+        filters['desired_area'] = desired_area
+    state = (params.get('state') or '').strip().upper()
+    if len(state) == 2:
+        filters['state'] = state
+    for field, _ in EXPERIENCE_FLAGS:
+        if params.get(field):
+            filters[field] = True
+    return filters
+
+
+def search_candidates(query='', filters=None):
+    """
+    Busca candidaturas por texto (ordenadas por relevância) e filtros.
+    Retorna (resultados, facetas); os resultados aceitam fatiamento e
+    count(), então podem ser paginados sem carregar tudo.
+    """
+    queryset = RecruitmentApplication.objects.filter(**(filters or {}))
+    query = (query or '').strip()
+    if query:
+        results = get_search_backend().search(query, queryset)
+        facets = {field: results.facet(field) for field in FACET_FIELDS}
+        experience = {field: results.facet(field).get(True, 0) for field, _ in EXPERIENCE_FLAGS}
+    else:
+        results = queryset.order_by('-created_at')
+        facets = {
+            field: OrderedDict(
+                queryset.order_by().values_list(field).annotate(count=Count('pk')).order_by('-count')
+            )
+            for field in FACET_FIELDS
+        }
+        # Todas as experiências em uma única consulta
+        experience = queryset.order_by().aggregate(**{
+            field: Count('pk', filter=Q(**{field: True})) for field, _ in EXPERIENCE_FLAGS
+        })
+    facets['experience'] = experience
+    return results, facets
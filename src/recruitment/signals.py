@@ -0,0 +1,17 @@
+from common.signals import upload_processed
+
+from .models import RecruitmentApplication
+from .search import set_resume_text
+
+
+def on_upload_processed(sender, upload, **kwargs):
+    """Currículo processado depois da candidatura: copia o texto extraído"""
+    if upload.purpose != 'resume':
+        return
+    for application in RecruitmentApplication.objects.filter(
+        resume_file=upload.file.name, resume_text_extracted_at__isnull=True,
+    ):
+        set_resume_text(application, upload.extracted_text)
+
+
+upload_processed.connect(on_upload_processed)
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.models import Upload
+from common.tests import make_docx
+
+from .models import RecruitmentApplication
+
+
+class RecruitmentUploadTests(TestCase):
+    """Candidatura com currículo enviado pelo upload em partes"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def payload(self, **extra):
+        data = {
+            'full_name': "Ana Souza", 'email': "ana@example.com", 'phone': "51999999999",
+            'cpf': "12345678909", 'position_interest': "marketing", 'salary_expectation': "5000",
+            'work_modality_preference': "remoto", 'motivation': "Crescer", 'state': "RS",
+            'city': "Porto Alegre", 'instagram_profile': "@ana", 'birth_date': "1995-01-01",
+        }
+        data.update(extra)
+        return json.dumps(data)
+
+    def test_application_uses_stored_upload(self):
+        name = default_storage.save('uploads/curriculo.pdf', ContentFile(b'%PDF-1.4'))
+        upload = Upload.objects.create(
+            purpose='resume', original_filename="curriculo.pdf", total_size=8, received=8,
+            status='stored', file=name, stored_at=timezone.now(),
+        )
+        response = self.client.post(
+            '/api/application/', self.payload(resume_upload_id=str(upload.pk)), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        application = RecruitmentApplication.objects.get()
+        self.assertEqual(application.resume_file.name, name)
+
+        # O mesmo upload não pode ser usado por outra candidatura
+        response = self.client.post(
+            '/api/application/', self.payload(resume_upload_id=str(upload.pk)), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(RecruitmentApplication.objects.count(), 1)
+
+
+class CandidateSearchTests(TestCase):
+    """Busca full-text de candidatos com facetas"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_application(self, **fields):
+        data = {
+            'full_name': "Ana Souza", 'email': "ana@example.com", 'phone': "51999999999",
+            'birth_date': "1995-01-01", 'cpf': "12345678909", 'rg': "123", 'address': "Rua A",
+            'city': "Porto Alegre", 'state': "RS", 'zip_code': "90000-000",
+            'current_position': "Analista", 'current_company': "ACME", 'experience_years': 3,
+            'education_level': 'superior_completo', 'desired_area': 'marketing_digital', 'availability': 'imediata',
+            'technical_skills': "Excel", 'languages': "Inglês", 'motivation': "Crescer",
+            'salary_expectation': "5000", 'career_goals': "Liderar",
+        }
+        data.update(fields)
+        # O índice de busca é atualizado após o commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return RecruitmentApplication.objects.create(**data)
+
+    def test_search_matches_skills_and_facets(self):
+        from .search import search_candidates
+
+        self.make_application(full_name="Bruno", technical_skills="Google Ads, Python", google_ads_experience=True)
+        self.make_application(full_name="Carla", technical_skills="Photoshop", desired_area='design', state='SC')
+        self.make_application(full_name="Diego", motivation="Quero aprender Python", state='SC')
+
+        results, facets = search_candidates("python")
+        self.assertEqual({application.full_name for application in results}, {"Bruno", "Diego"})
+        self.assertEqual(dict(facets['state']), {'RS': 1, 'SC': 1})
+        self.assertEqual(facets['experience']['google_ads_experience'], 1)
+
+        results, facets = search_candidates("python", {'state': 'SC'})
+        self.assertEqual([application.full_name for application in results], ["Diego"])
+
+        results, facets = search_candidates("", {'state': 'SC'})
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(dict(facets['desired_area']), {'design': 1, 'marketing_digital': 1})
+        self.assertEqual(facets['experience']['google_ads_experience'], 0)
+
+    def test_resume_text_indexed_when_upload_is_processed(self):
+        from common.uploads import process_upload
+
+        from .search import search_candidates
+
+        name = default_storage.save('uploads/curriculo.docx', ContentFile(make_docx("Especialista em Salesforce")))
+        upload = Upload.objects.create(
+            purpose='resume', original_filename="curriculo.docx", total_size=1, received=1,
+            status='stored', file=name, stored_at=timezone.now(), attached_at=timezone.now(),
+        )
+        application = self.make_application(resume_file=name)
+        self.assertEqual(list(search_candidates("salesforce")[0]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_upload(upload)
+        application.refresh_from_db()
+        self.assertIn("Salesforce", application.resume_text)
+        self.assertIsNotNone(application.resume_text_extracted_at)
+        self.assertEqual(list(search_candidates("salesforce")[0]), [application])
+
+    def test_index_resumes_extracts_legacy_files_once(self):
+        from django.core.management import call_command
+
+        name = default_storage.save('recruitment/resumes/cv.docx', ContentFile(make_docx("Kotlin e Swift")))
+        application = self.make_application(resume_file=name)
+        call_command('index_resumes', stdout=io.StringIO())
+        application.refresh_from_db()
+        self.assertIn("Kotlin", application.resume_text)
+
+        with self.assertNumQueries(1):
+            call_command('index_resumes', stdout=io.StringIO())
+
+    def test_admin_search_view(self):
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'senha')
+        self.client.force_login(user)
+        self.make_application(full_name="Bruno", technical_skills="SEO avançado", seo_experience=True)
+
+        response = self.client.get('/admin/reports/candidates/', {'q': "seo", 'seo_experience': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Bruno")
+        self.assertContains(response, "Marketing Digital")
+
+    def test_menu_item_follows_view_permission(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import Permission
+        from django.test import RequestFactory
+
+        from .wagtail_hooks import register_candidate_search_menu_item
+
+        user = get_user_model().objects.create_user('rh', 'rh@example.com', 'senha', is_staff=True)
+        user.user_permissions.add(Permission.objects.get(codename='access_admin'))
+        request = RequestFactory().get('/admin/')
+        request.user = user
+        item = register_candidate_search_menu_item()
+        self.assertFalse(item.is_shown(request))
+
+        user.user_permissions.add(Permission.objects.get(codename='view_recruitmentapplication'))
+        request.user = get_user_model().objects.get(pk=user.pk)  # descarta o cache de permissões
+        self.assertTrue(item.is_shown(request))
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/admin/reports/candidates/').status_code, 200)
 
-# Create your tests here.
@@ -1,16 +1,19 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 import json
 import logging
 
+from common.uploads import UploadError, check_file_size, take_upload
+from contact.outbox import enqueue
 from .models import RecruitmentApplication, FoguetePage
 
 logger = logging.getLogger(__name__)
@@ -67,10 +70,12 @@ def foguete_page(request):
 @method_decorator(csrf_exempt, name='dispatch')
 class RecruitmentAPIView(View):
     """
-    API para processar candidaturas de recrutamento
+    API para processar candidaturas de recrutamento. Assíncrona: a gravação
+    vai para o thread único de código síncrono do processo (sync_to_async
+    com thread_sensitive=True), fora do event loop sob ASGI.
     """
     
-    def post(self, request):
+    async def post(self, request):
         try:
             # Verificar se é FormData ou JSON
             if request.content_type == 'application/json':
@@ -95,13 +100,20 @@ class RecruitmentAPIView(View):
                         'message': f'Campo obrigatório: {field}'
                     }, status=400)
             
-            # Processar arquivo de currículo (obrigatório)
+            # Currículo (obrigatório): id de um upload em partes (/api/uploads/)
+            # ou, no formulário antigo, arquivo multipart com o mesmo limite
+            resume_upload_id = data.get('resume_upload_id')
             resume_file = files.get('resume') if files else None
-            if not resume_file:
+            if not resume_upload_id and not resume_file:
                 return JsonResponse({
                     'success': False,
                     'message': 'Campo obrigatório: resume (Currículo)'
                 }, status=400)
+            if resume_file:
+                try:
+                    check_file_size(resume_file, 'resume')
+                except UploadError as e:
+                    return JsonResponse({'success': False, 'message': str(e)}, status=e.status)
             
             # Mapear position_interest para desired_area
             position_mapping = {
@@ -118,7 +130,34 @@ class RecruitmentAPIView(View):
             }
             desired_area = position_mapping.get(data.get('position_interest', 'outro'), 'outro')
             
-            # Criar candidatura com todos os campos obrigatórios
+            application = await sync_to_async(self._create_application)(
+                data, resume_upload_id, resume_file, desired_area,
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'application_id': application.id,
+                'message': 'Candidatura enviada com sucesso!'
+            })
+            
+        except UploadError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=e.status)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'message': f'Erro: {str(e)}'
+            }, status=500)
+    
+    def _create_application(self, data, resume_upload_id, resume_file, desired_area):
+        """Criar candidatura e enfileirar os emails na mesma transação"""
+        with transaction.atomic():
+            resume_text = {}
+            if resume_upload_id:
+                upload = take_upload(resume_upload_id, 'resume')
+                resume_file = upload.file.name
+                if upload.status == 'processed':
+                    # Texto já extraído: a candidatura entra no índice com o currículo
+                    resume_text = {'resume_text': upload.extracted_text, 'resume_text_extracted_at': timezone.now()}
             application = RecruitmentApplication.objects.create(
                 full_name=data.get('full_name'),
                 email=data.get('email'),
@@ -154,68 +193,36 @@ class RecruitmentAPIView(View):
                 portfolio_url=data.get('portfolio_url', ''),
                 work_modality_preference=data.get('work_modality_preference', 'remoto'),
                 resume_file=resume_file,
+                **resume_text,
             )
-            
-            # Enviar emails
-            self._send_confirmation_email(application)
-            self._send_rh_notification_email(application)
-            
-            return JsonResponse({
-                'success': True,
-                'application_id': application.id,
-                'message': 'Candidatura enviada com sucesso!'
-            })
-            
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'message': f'Erro: {str(e)}'
-            }, status=500)
+            self._queue_confirmation_email(application)
+            self._queue_rh_notification_email(application)
+        return application
     
-    def _send_confirmation_email(self, application):
-        """Enviar email de confirmação para o candidato"""
-        try:
-            subject = f'Candidatura Recebida - {application.full_name}'
-            
-            context = {
-                'application': application,
-                'company_name': 'Agência Kaizen',
-            }
-            
-            html_message = render_to_string('recruitment/email_confirmation.html', context)
-            
-            send_mail(
-                subject=subject,
-                message='',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[application.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-        except Exception as e:
-            logger.error(f"Erro ao enviar email de confirmação: {str(e)}")
+    def _queue_confirmation_email(self, application):
+        """Enfileirar email de confirmação para o candidato"""
+        context = {
+            'application': application,
+            'company_name': 'Agência Kaizen',
+        }
+        enqueue(
+            subject=f'Candidatura Recebida - {application.full_name}',
+            to=[application.email],
+            html_body=render_to_string('recruitment/email_confirmation.html', context),
+            category='recruitment_confirmation',
+            related=application,
+            status_field='confirmation_email_sent',
+        )
     
-    def _send_rh_notification_email(self, application):
-        """Enviar notificação para RH sobre nova candidatura"""
-        try:
-            subject = f'Nova Candidatura - {application.full_name} - {application.desired_area}'
-            
-            context = {
-                'application': application,
-                'company_name': 'Agência Kaizen',
-            }
-            
-            html_message = render_to_string('recruitment/rh_notification_email.html', context)
-            
-            send_mail(
-                subject=subject,
-                message='',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=['rh@agenciakaizen.com.br'],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-        except Exception as e:
-            logger.error(f"Erro ao enviar email para RH: {str(e)}")
\ No newline at end of file
+    def _queue_rh_notification_email(self, application):
+        """Enfileirar notificação para RH sobre nova candidatura"""
+        context = {
+            'application': application,
+            'company_name': 'Agência Kaizen',
+        }
+        enqueue(
+            subject=f'Nova Candidatura - {application.full_name} - {application.desired_area}',
+            to=['rh@agenciakaizen.com.br'],
+            html_body=render_to_string('recruitment/rh_notification_email.html', context),
+            category='recruitment_rh_notification',
+        )
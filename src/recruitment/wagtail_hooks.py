@@ -0,0 +1,26 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .admin_views import candidate_search
+
+
+@hooks.register("register_admin_urls")
+def register_candidate_search_url():
+    return [
+        path('reports/candidates/', candidate_search, name='recruitment_candidate_search'),
+    ]
+
+
+class CandidateSearchMenuItem(MenuItem):
+    """Visível para quem pode abrir o relatório, não só para superusuários"""
+
+    def is_shown(self, request):
+        return request.user.has_perm('recruitment.view_recruitmentapplication')
+
+
+@hooks.register("register_reports_menu_item")
+def register_candidate_search_menu_item():
+    return CandidateSearchMenuItem(
+        "Busca de Candidatos", reverse('recruitment_candidate_search'), icon_name="search", order=910
+    )
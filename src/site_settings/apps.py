@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class SiteSettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'site_settings'
-    verbose_name = 'Configurações do Site'
\ No newline at end of file
+    verbose_name = 'Configurações do Site'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+
+from analytics.models import AnalyticsSettings
+from common.renditions import IMAGE_METADATA_FIELDS
+from wagtail.images import get_image_model
+
+from .models import PartnerLogo, SiteSettings
+from .snapshot import invalidate_snapshot
+
+
+def invalidate_site_snapshot(sender, **kwargs):
+    invalidate_snapshot()
+
+
+def invalidate_on_settings_change(sender, created=False, **kwargs):
+    # for_site() cria a linha com valores padrão durante a própria montagem
+    # do snapshot; só edições posteriores mudam o conteúdo
+    if not created:
+        invalidate_snapshot()
+
+
+for model in (SiteSettings, AnalyticsSettings):
+    post_save.connect(invalidate_on_settings_change, sender=model)
+    post_delete.connect(invalidate_site_snapshot, sender=model)
+
+post_save.connect(invalidate_site_snapshot, sender=PartnerLogo)
+post_delete.connect(invalidate_site_snapshot, sender=PartnerLogo)
+
+def invalidate_on_image_change(sender, instance, update_fields=None, **kwargs):
+    """Troca de arquivo/ponto focal de uma imagem muda a URL do fundo e dos logos"""
+    if update_fields and set(update_fields) <= IMAGE_METADATA_FIELDS:
+        return
+    in_use = (
+        SiteSettings.objects.filter(background_image=instance).exists()
+        or PartnerLogo.objects.filter(logo=instance).exists()
+    )
+    if in_use:
+        invalidate_snapshot()
+
+
+post_save.connect(invalidate_on_image_change, sender=get_image_model())
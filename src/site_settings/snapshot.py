@@ -0,0 +1,117 @@
+"""
+Snapshot das configurações globais usadas pelo template base.
+
+SiteSettings, AnalyticsSettings, logos de parceiros ativos, o CSS de fundo
+e os snippets de tracking já renderizados ficam juntos em um único objeto, memorizado na requisição e em
+cache entre requisições. Salvar qualquer um desses modelos troca a versão do
+snapshot (ver site_settings.signals), invalidando todos os hosts de uma vez.
+"""
+import time
+
+from django.core.cache import cache
+from django.http.request import split_domain_port
+
+SNAPSHOT_VERSION_KEY = 'site_settings:snapshot:version'
+SNAPSHOT_TIMEOUT = 60 * 60  # 1 hora
+REQUEST_ATTR = '_site_settings_snapshot'
+
+
+def build_background_style(settings):
+    """CSS inline da imagem de fundo baseado nas configurações do site"""
+    if not settings or not settings.background_image:
+        return ""
+
+    # Constrói o CSS para a imagem de fundo
+    background_url = settings.background_image.file.url
+
+    # Sobreposição com gradiente (mais forte no topo, some para preto embaixo)
+    overlay_opacity = float(settings.background_overlay_opacity)
+    top_opacity = min(overlay_opacity + 0.30, 0.95)
+    mid_opacity = min(overlay_opacity + 0.45, 0.98)
+
+    style_parts = [
+        (
+            "background-image: "
+            f"linear-gradient(180deg, rgba(0,0,0,{top_opacity}) 0%, rgba(0,0,0,{mid_opacity}) 40%, rgba(0,0,0,1) 75%, rgba(0,0,0,1) 100%), "
+            f"url('{background_url}')"
+        ),
+        "background-position: top center",
+        "background-size: cover",
+        "background-repeat: no-repeat",
+        "background-attachment: scroll",
+    ]
+
+    return "; ".join(style_parts)
+
+
+def build_partner_logos():
+    """Logos de parceiros ativos, com a rendition do rodapé já resolvida"""
+    from .models import PartnerLogo
+
+    partners = []
+    logos = PartnerLogo.objects.filter(is_active=True).select_related('logo').order_by('order', 'name')
+    for partner in logos:
+        logo = None
+        if partner.logo:
+            rendition = partner.logo.get_rendition('height-40')
+            logo = {'url': rendition.url, 'width': rendition.width, 'height': rendition.height}
+        partners.append({'name': partner.name, 'url': partner.url, 'logo': logo})
+    return partners
+
+
+def build_snapshot(site):
+    """Monta o snapshot completo de um site"""
+    from analytics.models import AnalyticsSettings
+    from analytics.tracking import render_tracking
+    from .models import SiteSettings
+
+    if site is None:
+        site_settings = SiteSettings.objects.first()
+        analytics_settings = AnalyticsSettings.objects.first()
+    else:
+        site_settings = SiteSettings.for_site(site)
+        analytics_settings = AnalyticsSettings.for_site(site)
+
+    return {
+        'site_id': site.pk if site else None,
+        'site_settings': site_settings,
+        'analytics_settings': analytics_settings,
+        'partner_logos': build_partner_logos(),
+        'background_style': build_background_style(site_settings),
+        'tracking': render_tracking(analytics_settings),
+    }
+
+
+def snapshot_cache_key(request):
+    version = cache.get(SNAPSHOT_VERSION_KEY) or 0
+    if request is None:
+        return f'site_settings:snapshot:{version}:default'
+    # get_host() valida contra ALLOWED_HOSTS: um Host arbitrário não cria chaves novas
+    hostname = split_domain_port(request.get_host())[0]
+    return f'site_settings:snapshot:{version}:{hostname}:{request.get_port()}'
+
+
+def get_snapshot(request=None):
+    """
+    Retorna o snapshot para a requisição: primeiro da própria requisição,
+    depois do cache e, por último, reconstruído a partir do banco.
+    """
+    if request is not None and hasattr(request, REQUEST_ATTR):
+        return getattr(request, REQUEST_ATTR)
+
+    key = snapshot_cache_key(request)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        from wagtail.models import Site
+        site = Site.find_for_request(request) if request is not None else None
+        snapshot = build_snapshot(site)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+
+    if request is not None:
+        setattr(request, REQUEST_ATTR, snapshot)
+    return snapshot
+
+
+def invalidate_snapshot():
+    """Troca a versão do snapshot, descartando o cache de todos os hosts"""
+    cache.set(SNAPSHOT_VERSION_KEY, time.time_ns(), None)
@@ -1,6 +1,6 @@
 from django import template
-from django.template import Context
-from site_settings.models import SiteSettings, PartnerLogo
+from django.utils.safestring import mark_safe
+from site_settings.snapshot import get_snapshot
 
 register = template.Library()
 
@@ -8,48 +8,40 @@ register = template.Library()
 @register.simple_tag(takes_context=True)
 def get_site_settings(context):
     """Retorna as configurações do site para o contexto atual"""
-    request = context.get('request')
-    if request and hasattr(request, 'site'):
-        return SiteSettings.for_site(request.site)
-    elif request:
-        from wagtail.models import Site
-        site = Site.find_for_request(request)
-        return SiteSettings.for_site(site)
-    return SiteSettings.objects.first()
+    return get_snapshot(context.get('request'))['site_settings']
+
+
+@register.simple_tag(takes_context=True)
+def get_analytics_settings(context):
+    """Retorna as configurações de analytics do site para o contexto atual"""
+    return get_snapshot(context.get('request'))['analytics_settings']
 
 
 @register.simple_tag(takes_context=True)
 def get_background_style(context):
     """Retorna o CSS inline para a imagem de fundo baseado nas configurações do site"""
-    settings = get_site_settings(context)
-    
-    if not settings or not settings.background_image:
-        return ""
-    
-    # Constrói o CSS para a imagem de fundo
-    background_url = settings.background_image.file.url
-    
-    # Sobreposição com gradiente (mais forte no topo, some para preto embaixo)
-    overlay_opacity = float(settings.background_overlay_opacity)
-    top_opacity = min(overlay_opacity + 0.30, 0.95)
-    mid_opacity = min(overlay_opacity + 0.45, 0.98)
-    
-    style_parts = [
-        (
-            "background-image: "
-            f"linear-gradient(180deg, rgba(0,0,0,{top_opacity}) 0%, rgba(0,0,0,{mid_opacity}) 40%, rgba(0,0,0,1) 75%, rgba(0,0,0,1) 100%), "
-            f"url('{background_url}')"
-        ),
-        "background-position: top center",
-        "background-size: cover",
-        "background-repeat: no-repeat",
-        "background-attachment: scroll",
-    ]
-    
-    return "; ".join(style_parts)
-
-
-@register.simple_tag()
-def get_partner_logos():
+    return get_snapshot(context.get('request'))['background_style']
+
+
+@register.simple_tag(takes_context=True)
+def get_partner_logos(context):
     """Retorna logos de parceiros ativos para o footer"""
-    return PartnerLogo.objects.filter(is_active=True).order_by('order', 'name')
+    return get_snapshot(context.get('request'))['partner_logos']
+
+
+@register.simple_tag(takes_context=True)
+def tracking_head(context):
+    """Snippets de tracking do <head> (GTM, GA4, Facebook Pixel, LinkedIn)"""
+    return mark_safe(get_snapshot(context.get('request'))['tracking']['head'])
+
+
+@register.simple_tag(takes_context=True)
+def tracking_body(context):
+    """Snippet noscript do GTM para o início do <body>"""
+    return mark_safe(get_snapshot(context.get('request'))['tracking']['body'])
+
+
+@register.simple_tag(takes_context=True)
+def tracking_events(context):
+    """Configuração e script de eventos de tracking para o fim do <body>"""
+    return mark_safe(get_snapshot(context.get('request'))['tracking']['events'])
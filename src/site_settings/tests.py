@@ -1,3 +1,96 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.db import connection
+from django.template import RequestContext, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
 
-# Create your tests here.
+from analytics.models import AnalyticsSettings
+
+from .models import PartnerLogo, SiteSettings
+from .snapshot import snapshot_cache_key
+
+TEMPLATE = (
+    '{% load site_settings_tags %}'
+    '{% get_background_style as bg %}{{ bg }}'
+    '{% get_partner_logos as partners %}{% for p in partners %}<img src="{{ p.logo.url }}">{% endfor %}'
+    '{% get_site_settings as ss %}{% get_analytics_settings as analytics %}'
+)
+
+
+class SiteSettingsSnapshotTests(TestCase):
+    """As configurações globais devem vir do snapshot, sem consultas por requisição"""
+
+    def setUp(self):
+        cache.clear()
+        self.image = Image.objects.create(title="Logo", file=get_test_image_file())
+        PartnerLogo.objects.create(name="Google", logo=self.image)
+        settings = SiteSettings.for_site(Site.objects.get(is_default_site=True))
+        settings.background_image = self.image
+        settings.save()
+        self.template = Template(TEMPLATE)
+
+    def render(self):
+        request = RequestFactory().get('/')
+        return self.template.render(RequestContext(request, {}))
+
+    def test_cached_snapshot_renders_without_queries(self):
+        first = self.render()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.render()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(first, second)
+        self.assertIn('height-40', second)
+
+    def test_partner_logo_change_invalidates_snapshot(self):
+        self.assertEqual(self.render().count('<img'), 1)
+        PartnerLogo.objects.create(name="Meta", logo=self.image)
+        self.assertEqual(self.render().count('<img'), 2)
+
+    @override_settings(ALLOWED_HOSTS=['agenciakaizen.com.br'])
+    def test_cache_key_uses_validated_host(self):
+        factory = RequestFactory()
+        self.assertIn(':agenciakaizen.com.br:', snapshot_cache_key(factory.get('/', HTTP_HOST='agenciakaizen.com.br')))
+        # Host fora do ALLOWED_HOSTS não gera uma chave nova no cache
+        with self.assertRaises(DisallowedHost):
+            snapshot_cache_key(factory.get('/', HTTP_HOST='qualquer.example'))
+
+
+class TrackingSnippetTests(TestCase):
+    """Snippets de tracking pré-renderizados no snapshot"""
+
+    TEMPLATE = '{% load site_settings_tags %}{% tracking_head %}|{% tracking_body %}|{% tracking_events %}'
+
+    def setUp(self):
+        cache.clear()
+        self.analytics = AnalyticsSettings.for_site(Site.objects.get(is_default_site=True))
+        self.template = Template(self.TEMPLATE)
+
+    def render(self):
+        request = RequestFactory().get('/')
+        return self.template.render(RequestContext(request, {}))
+
+    def test_snippets_are_cached_and_invalidated_on_save(self):
+        html = self.render()
+        self.assertIn("'GTM-5JCWMWQ'", html)
+        self.assertIn('"facebookPixelEnabled": false', html)
+        self.assertIn('function sendGTMEvent', html)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(), html)
+
+        self.analytics.facebook_pixel_enabled = True
+        self.analytics.facebook_pixel_id = '12345'
+        self.analytics.save()
+        html = self.render()
+        self.assertIn("fbq('init', '12345')", html)
+        self.assertIn('"facebookPixelEnabled": true', html)
+
+    @override_settings(TRACKING={'STATIC_EVENTS_JS': True})
+    def test_static_events_js_uses_hashed_url(self):
+        html = self.render()
+        self.assertNotIn('function sendGTMEvent', html)
+        self.assertRegex(html, r'<script src="/static/js/tracking-events\.js\?v=[0-9a-f]{12}" defer></script>')
+        self.assertIn('window.kaizenTracking = {"gtmEnabled": true', html)
@@ -9,6 +9,7 @@ from wagtail import blocks
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
 from modelcluster.models import ClusterableModel
 from wagtail.images.models import Image
+from common.profiling import QueryBudget
 
 
 class ServiceIcon(models.Model):
@@ -157,6 +158,8 @@ class SolutionsPage(Page):
     """
     Página principal de soluções
     """
+    query_budget = QueryBudget(queries=40, duplicates=10)
+
     hero_title = models.CharField(
         max_length=200,
         default="Estratégias de impacto para resultados reais",